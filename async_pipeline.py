@@ -0,0 +1,327 @@
+"""
+asyncio 接口：在事件循环中逐页/逐文件获得结果，渲染、处理、写盘互相重叠
+
+    渲染线程 ──[有界队列 queue_size]──> 处理（执行器中并发）──[有界队列 transform_workers]──> 写盘（执行器中按页序）
+
+- 渲染在后台线程中进行，队列满时渲染线程阻塞等待，渲染快于写盘时内存不会无限增长
+- 颜色处理等 CPU 步骤通过 loop.run_in_executor 执行，最多同时处理 transform_workers 页，结果仍按页码顺序交出
+- 写盘同样在执行器中进行，事件循环始终不被阻塞
+- 消费方提前退出（break 或任务被取消）时，后台渲染线程在当前页完成后停止
+
+用法:
+    async for page_number, img in aiter_processed_pages('文档.pdf', build_stages(recolor=True)):
+        await upload(page_number, img)
+
+    page_count, output_path = await process_pdf_async('文档.pdf', recolor=True, merge_to_pdf=True)
+
+    async for file_result in aiter_recolor_directory('图片目录', workers=4):
+        print(file_result.input_path, file_result.status)
+
+默认执行器是线程池：PIL 和 numpy 在处理像素时会释放 GIL，并且 build_stages 生成的处理步骤是闭包，
+不能传给进程池。目录批处理与同步版本一样使用进程池。
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+import memory_budget
+import metrics
+from batch_executor import collect_tasks, run_task
+from color_convert import recolor_file
+from file_scanner import IMAGE_EXTENSIONS
+from image_invert import invert_file
+from image_output import output_path_for
+from pdf_to_image import iter_pdf_pages
+from pipeline import build_sink, build_stages
+from rasterizer import DEFAULT_WINDOW_SIZE, get_backend
+
+# 渲染与处理之间的队列长度（页）
+DEFAULT_QUEUE_SIZE = 4
+
+# 同时进行颜色处理的页数
+DEFAULT_TRANSFORM_WORKERS = min(4, os.cpu_count() or 1)
+
+# 后台线程等待队列空位时检查停止标志的间隔（秒）
+_STOP_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+async def _aiter_in_thread(make_iterator, queue_size):
+    """
+    在后台线程中运行阻塞的迭代器，通过有界队列把每一项交给事件循环
+
+    参数:
+        make_iterator: 返回迭代器的函数，在后台线程中调用
+        queue_size: 队列长度，队列满时后台线程阻塞
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(queue_size)
+    stop = threading.Event()
+
+    def put(item):
+        """阻塞直到放入队列；消费方已退出时返回False"""
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(_STOP_POLL_INTERVAL)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def produce():
+        iterator = None
+        try:
+            iterator = make_iterator()
+            for item in iterator:
+                if stop.is_set() or not put((item, None)):
+                    return
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                close()
+        put((_DONE, None))
+
+    # 后台线程不继承当前上下文，渲染埋点通过 bind 计入调用方的 Metrics
+    producer = loop.run_in_executor(None, metrics.bind(produce))
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop.set()
+        # 等后台线程处理完当前页并关闭文档
+        await asyncio.shield(producer)
+
+
+async def aiter_pages(pdf_path, dpi=200, pages=None, backend=None, color_mode='rgb',
+                      window_size=DEFAULT_WINDOW_SIZE, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    异步逐页渲染PDF，依次生成 (页码, 图片)
+
+    渲染在后台线程中进行，最多领先消费方 queue_size 页。
+
+    参数:
+        pdf_path: PDF文件路径
+        dpi: 渲染分辨率，默认200
+        pages: 页码范围字符串或页码列表，为None时渲染全部页面
+        backend: 光栅化后端名称或实例，为None时自动选择
+        color_mode: 'rgb'、'gray' 或 'bilevel'
+        window_size: pdf2image 后端每批渲染的页数
+        queue_size: 已渲染但尚未被取走的最大页数
+    """
+    def make_iterator():
+        rendered = iter_pdf_pages(pdf_path, dpi, window_size, backend=backend, color_mode=color_mode, pages=pages)
+        return metrics.timed_iter(rendered, 'render')
+
+    async for item in _aiter_in_thread(make_iterator, queue_size):
+        yield item
+
+
+def _apply_stages(stages, img):
+    with metrics.stage('transform'):
+        for stage in stages:
+            img = stage(img)
+    return img
+
+
+async def aiter_processed_pages(pdf_path, stages, dpi=200, pages=None, backend=None, color_mode='rgb',
+                                queue_size=DEFAULT_QUEUE_SIZE, transform_workers=DEFAULT_TRANSFORM_WORKERS,
+                                executor=None, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    异步渲染并处理PDF页面，按页码顺序生成处理后的 (页码, 图片)
+
+    参数:
+        pdf_path: PDF文件路径
+        stages: 处理步骤列表，见 pipeline.build_stages
+        dpi、pages、backend、color_mode、queue_size、window_size: 见 aiter_pages
+        transform_workers: 同时处理的最大页数，也是处理结果等待取走的队列长度
+        executor: 执行处理步骤的 concurrent.futures 执行器，为None时使用事件循环的默认线程池
+    """
+    loop = asyncio.get_running_loop()
+    # 进程池中的埋点在子进程里，无法计入当前 Metrics
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        apply_stages = _apply_stages
+    else:
+        apply_stages = metrics.bind(_apply_stages)
+    # 队列中是 (页码, 处理中的 future)，按页码顺序排列；None 表示结束，异常实例表示渲染出错
+    pending = asyncio.Queue(transform_workers)
+
+    async def feed():
+        try:
+            async for page_number, img in aiter_pages(pdf_path, dpi, pages, backend, color_mode, window_size,
+                                                      queue_size):
+                future = loop.run_in_executor(executor, apply_stages, stages, img)
+                await pending.put((page_number, future))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await pending.put(e)
+            return
+        await pending.put(None)
+
+    feeder = asyncio.ensure_future(feed())
+    try:
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            page_number, future = item
+            yield page_number, await future
+    finally:
+        feeder.cancel()
+        try:
+            await feeder
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_pipeline_async(pdf_path, stages, sink, dpi=200, pages=None, backend=None, color_mode='rgb',
+                             progress=None, queue_size=DEFAULT_QUEUE_SIZE,
+                             transform_workers=DEFAULT_TRANSFORM_WORKERS, executor=None,
+                             window_size=DEFAULT_WINDOW_SIZE):
+    """
+    pipeline.run_pipeline 的异步版本，输出结果与同步版本完全相同
+
+    写盘在默认线程池中按页码顺序进行，写盘期间后续页面的渲染和处理继续进行，
+    但受队列长度限制，不会超前太多。
+
+    参数:
+        sink: 输出端，见 pipeline.ImageDirectorySink / pipeline.PdfSink
+        progress: 进度回调，签名为 progress(已处理页数, None, 输出路径)，在事件循环线程中调用
+        其他参数见 aiter_processed_pages
+
+    返回:
+        处理的页数
+    """
+    loop = asyncio.get_running_loop()
+    write, close = metrics.bind(sink.write), metrics.bind(sink.close)
+    try:
+        async for page_number, img in aiter_processed_pages(pdf_path, stages, dpi, pages, backend, color_mode,
+                                                            queue_size, transform_workers, executor, window_size):
+            output_path = await loop.run_in_executor(None, write, page_number, img)
+            if progress:
+                progress(sink.count, None, output_path)
+    except BaseException:
+        sink.abort()
+        raise
+    await loop.run_in_executor(None, close)
+    return sink.count
+
+
+async def process_pdf_async(pdf_path, output_base_dir=None, dpi=200, recolor=False, invert=False,
+                            merge_to_pdf=False, color_map=None, tolerance=0, mode='exact', progress=None,
+                            backend=None, output_format=None, color_mode='rgb', pages=None,
+                            queue_size=DEFAULT_QUEUE_SIZE, transform_workers=DEFAULT_TRANSFORM_WORKERS,
+                            skip_blank=False):
+    """
+    pipeline.process_pdf 的异步版本，参数与返回值相同，另外:
+        queue_size、transform_workers: 见 aiter_processed_pages
+
+    不做任何颜色处理时等同于异步的 convert_pdf_to_images。
+    设置了内存预算（见 memory_budget）时，渲染窗口与同步版本一样按页面大小暂存或缩小，
+    队列长度和同时处理的页数也按预算减少。
+    """
+    stages = build_stages(recolor, invert, color_map, tolerance, mode)
+    sink, output_path = build_sink(pdf_path, output_base_dir, merge_to_pdf, output_format, skip_blank)
+    backend = get_backend(backend)
+    memory_plan = memory_budget.plan_pdf(pdf_path, dpi, color_mode, backend, 1, DEFAULT_WINDOW_SIZE)
+    backend = memory_budget.spill_backend(backend, memory_plan)
+    # 队列中和正在处理的页面已经解码，不能暂存，只能缩短队列、减少同时处理的页数
+    queue_plan = memory_budget.plan(memory_plan.page_bytes, transform_workers, queue_size)
+    page_count = await run_pipeline_async(pdf_path, stages, sink, dpi, pages, backend, color_mode, progress,
+                                          queue_plan.window_size, queue_plan.workers,
+                                          window_size=memory_plan.window_size)
+    return page_count, output_path
+
+
+async def aiter_batch(tasks, func, workers=None, kwargs=None):
+    """
+    在进程池中批量处理文件，按完成顺序异步生成 batch_executor.FileResult
+
+    同时提交给进程池的任务不超过 workers 的两倍，任务列表很长时也不会一次性全部排队。
+
+    参数:
+        tasks: [(输入路径, 输出路径), ...]
+        func: 模块级的单文件处理函数，签名为 func(input_path, output_path, **kwargs)
+        workers: 进程数，为None时使用全部CPU核心，设置了内存预算时按最大的图片自动减少
+        kwargs: 传给 func 的额外参数
+    """
+    if kwargs is None:
+        kwargs = {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not tasks:
+        return
+    workers = memory_budget.plan_images([input_path for input_path, _ in tasks], workers).workers
+    loop = asyncio.get_running_loop()
+    task_iter = iter(tasks)
+    running = set()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+
+    def submit_next():
+        for input_path, output_path in task_iter:
+            future = metrics.submit(executor, run_task, func, input_path, output_path, kwargs)
+            running.add(asyncio.wrap_future(future, loop=loop))
+            return
+
+    try:
+        for _ in range(workers * 2):
+            submit_next()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                running.discard(future)
+                submit_next()
+                file_result = metrics.merge_result(future.result())
+                metrics.add('files')
+                yield file_result
+    finally:
+        # 提前退出时取消尚未开始的任务，不在事件循环中等待正在运行的任务
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def aiter_recolor_directory(input_dir, output_dir=None, workers=None, color_map=None, tolerance=0,
+                                  mode='exact', output_format=None):
+    """
+    color_convert.process_directory_batch 的异步版本，按完成顺序生成每个文件的 FileResult
+
+    参数含义与 process_directory_batch 相同（不支持 skip_existing 和增量清单）
+    """
+    if output_dir is None:
+        output_dir = os.path.join(input_dir, 'color_converted')
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(input_path, output_path_for(output_path, output_format))
+             for input_path, output_path in collect_tasks(input_dir, output_dir, IMAGE_EXTENSIONS)]
+    kwargs = {'color_map': color_map, 'tolerance': tolerance, 'mode': mode, 'output_format': output_format}
+    async for file_result in aiter_batch(tasks, recolor_file, workers, kwargs):
+        yield file_result
+
+
+async def aiter_invert_directory(input_dir, output_dir=None, workers=None, recursive=True, name_prefix='',
+                                 output_format=None):
+    """
+    image_invert.invert_directory_batch 的异步版本，按完成顺序生成每个文件的 FileResult
+
+    参数含义与 invert_directory_batch 相同（不支持 skip_existing 和增量清单）
+    """
+    if output_dir is None:
+        output_dir = os.path.join(input_dir, 'inverted')
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(input_path, output_path_for(output_path, output_format))
+             for input_path, output_path in collect_tasks(input_dir, output_dir, IMAGE_EXTENSIONS,
+                                                          recursive, name_prefix)]
+    async for file_result in aiter_batch(tasks, invert_file, workers, {'output_format': output_format}):
+        yield file_result
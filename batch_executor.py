@@ -0,0 +1,190 @@
+import os
+import time
+
+import file_scanner
+import memory_budget
+import metrics
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FileResult:
+    """单个文件的处理结果"""
+    input_path: str
+    output_path: str
+    status: str  # 'processed' / 'failed' / 'skipped'
+    seconds: float = 0.0
+    error: str = None
+
+
+@dataclass
+class BatchResult:
+    """一次批量处理的汇总结果"""
+    files: list = field(default_factory=list)
+    elapsed: float = 0.0
+    workers: int = 1
+
+    def _count(self, status):
+        return sum(1 for item in self.files if item.status == status)
+
+    @property
+    def processed(self):
+        return self._count('processed')
+
+    @property
+    def failed(self):
+        return self._count('failed')
+
+    @property
+    def skipped(self):
+        return self._count('skipped')
+
+    @property
+    def timings(self):
+        """[(输入路径, 耗时秒数), ...]，只包含实际处理过的文件"""
+        return [(item.input_path, item.seconds) for item in self.files if item.status != 'skipped']
+
+    @property
+    def errors(self):
+        """[(输入路径, 错误信息), ...]"""
+        return [(item.input_path, item.error) for item in self.files if item.status == 'failed']
+
+    def to_dict(self):
+        """转换为可直接序列化为 JSON 的字典"""
+        return {
+            'processed': self.processed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'elapsed': self.elapsed,
+            'workers': self.workers,
+            'files': [vars(item) for item in self.files],
+        }
+
+
+def is_up_to_date(input_path, output_path):
+    """输出文件存在且不早于输入文件时视为已是最新"""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def collect_tasks(input_dir, output_dir, extensions, recursive=True, name_prefix='', sniff=True):
+    """
+    收集目录中指定扩展名的文件，并在输出目录中创建相同的目录结构
+
+    参数:
+        input_dir: 输入目录
+        output_dir: 输出目录，位于输入目录内时会被跳过；可以与输入目录相同
+        extensions: 小写扩展名元组，例如 ('.png',)
+        recursive: 是否递归子目录
+        name_prefix: 输出文件名前缀
+        sniff: 为True时没有扩展名或扩展名不认识的文件按文件头识别格式，输出文件名补上对应的扩展名
+
+    返回:
+        [(输入路径, 输出路径), ...]，按目录深度优先、文件名自然排序
+    """
+    # 输出目录位于输入目录内时跳过其中的内容；与输入目录相同时输出文件直接写在原图旁边
+    exclude = []
+    if os.path.abspath(output_dir) != os.path.abspath(input_dir):
+        exclude.append(output_dir)
+    tasks = []
+    created = set()
+    for rel_path, file_format in file_scanner.scan_directory(input_dir, extensions, recursive, exclude, sniff):
+        # 在输出目录中创建对应的子目录
+        rel_dir, name = os.path.split(rel_path)
+        current_output_dir = os.path.join(output_dir, rel_dir) if rel_dir else output_dir
+        if rel_dir and rel_dir not in created:
+            os.makedirs(current_output_dir, exist_ok=True)
+            created.add(rel_dir)
+        if not name.lower().endswith(extensions):
+            name += file_scanner.FORMAT_EXTENSIONS.get(file_format, '')
+        tasks.append((os.path.join(input_dir, rel_path), os.path.join(current_output_dir, name_prefix + name)))
+    return tasks
+
+
+def run_task(func, input_path, output_path, kwargs):
+    """
+    执行单个文件任务并计时
+
+    异常不会向外抛出，而是记录在结果中，保证一个坏文件不会中断整个批次。
+    """
+    start = time.perf_counter()
+    try:
+        func(input_path, output_path, **kwargs)
+    except Exception as e:
+        return FileResult(input_path, output_path, 'failed', time.perf_counter() - start, str(e))
+    return FileResult(input_path, output_path, 'processed', time.perf_counter() - start)
+
+
+def run_batch(tasks, func, workers=1, kwargs=None, skip_existing=False, progress=None, on_result=None):
+    """
+    批量执行文件处理任务
+
+    参数:
+        tasks: [(输入路径, 输出路径), ...]
+        func: 处理单个文件的函数，签名为 func(input_path, output_path, **kwargs)，
+              出错时应直接抛出异常；多进程时必须是模块级函数
+        workers: 进程数，默认1（在当前进程中顺序执行）；为None时使用全部CPU核心，
+                 设置了内存预算（见 memory_budget）时按最大的图片自动减少
+        kwargs: 传给 func 的额外参数
+        skip_existing: 为True时跳过输出已是最新的文件；也可以传入判断函数
+                       skip_existing(input_path, output_path)，返回True的文件被跳过
+        progress: 进度回调，签名为 progress(已完成数, 总数, 输入路径)
+        on_result: 每个文件处理完成后在当前进程中调用，参数为 FileResult
+
+    返回:
+        BatchResult
+    """
+    if kwargs is None:
+        kwargs = {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    result = BatchResult(workers=workers)
+    start = time.perf_counter()
+    total = len(tasks)
+
+    if skip_existing is True:
+        skip_existing = is_up_to_date
+
+    def finish(file_result):
+        result.files.append(file_result)
+        metrics.add('files')
+        if on_result:
+            on_result(file_result)
+        if progress:
+            progress(len(result.files), total, file_result.input_path)
+
+    pending = []
+    for input_path, output_path in tasks:
+        if skip_existing and skip_existing(input_path, output_path):
+            result.files.append(FileResult(input_path, output_path, 'skipped'))
+            if progress:
+                progress(len(result.files), total, input_path)
+        else:
+            pending.append((input_path, output_path))
+
+    if workers > 1 and len(pending) > 1:
+        # 设置了内存预算时按最大的图片减少进程数
+        workers = memory_budget.plan_images([input_path for input_path, _ in pending], workers).workers
+        result.workers = workers
+    if workers > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = [metrics.submit(executor, run_task, func, input_path, output_path, kwargs)
+                       for input_path, output_path in pending]
+            try:
+                for future in as_completed(futures):
+                    finish(metrics.merge_result(future.result()))
+            except BaseException:
+                # 回调中途中断时取消尚未开始的任务
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+    else:
+        for input_path, output_path in pending:
+            finish(run_task(func, input_path, output_path, kwargs))
+
+    result.elapsed = time.perf_counter() - start
+    return result
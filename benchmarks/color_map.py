@@ -0,0 +1,77 @@
+"""
+颜色映射基准测试：对比旧的布尔掩码方案与查表映射引擎（整幅/分条）在 4K 页面上的耗时
+
+用法:
+    python -m benchmarks.color_map --width 3840 --height 2160 --repeat 5
+"""
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from color_map import STRIP_PIXELS, map_colors
+
+
+def legacy_mask_convert(img):
+    """旧版 convert_colors 的掩码实现，作为对比基准"""
+    img_array = np.array(img)
+    white_mask = (img_array == [255, 255, 255]).all(axis=2)
+    black_mask = (img_array == [0, 0, 0]).all(axis=2)
+    img_array[white_mask] = [255, 223, 63]
+    img_array[black_mask] = [31, 77, 120]
+    return Image.fromarray(img_array)
+
+
+def make_page(width, height, seed=0):
+    """生成模拟文字页面：白底、黑色笔画，外加少量抗锯齿灰边"""
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    ink = rng.random((height, width)) < 0.08
+    page[ink] = 0
+    edge = rng.random((height, width)) < 0.02
+    page[edge] = rng.integers(1, 255, size=(int(edge.sum()), 1), dtype=np.uint8)
+    return page
+
+
+def best_time(func, img, repeat):
+    """重复执行取最快一次，返回 (秒数, 结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(img)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='颜色映射基准测试')
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--strip-pixels', type=int, default=STRIP_PIXELS, help='分条处理时每条的像素数')
+    args = parser.parse_args()
+
+    page = Image.fromarray(make_page(args.width, args.height))
+    legacy_time, legacy_result = best_time(legacy_mask_convert, page, args.repeat)
+    lut_time, lut_result = best_time(lambda img: map_colors(img, strip_pixels=None), page, args.repeat)
+    strip_time, strip_result = best_time(
+        lambda img: map_colors(img, strip_pixels=args.strip_pixels), page, args.repeat)
+
+    if legacy_result.tobytes() != lut_result.tobytes():
+        raise SystemExit('结果不一致：查表映射与掩码方案输出不同')
+    if strip_result.tobytes() != lut_result.tobytes():
+        raise SystemExit('结果不一致：分条处理与整幅处理输出不同')
+
+    megapixels = args.width * args.height / 1e6
+    print(f'页面尺寸: {args.width}x{args.height} ({megapixels:.1f} MP)')
+    print(f'掩码方案: {legacy_time * 1000:8.1f} ms')
+    print(f'查表映射: {lut_time * 1000:8.1f} ms  (加速比 {legacy_time / lut_time:.2f}x)')
+    print(f'分条映射: {strip_time * 1000:8.1f} ms  (加速比 {legacy_time / strip_time:.2f}x，'
+          f'每条 {args.strip_pixels} 像素)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+基准测试用的合成测试数据
+
+所有内容都由固定随机种子在本地生成，不依赖网络、字体文件或外部工具：
+- 多页矢量PDF：直接写出 PDF 对象（Helvetica 标准字体的文字、线条、矩形和曲线），
+  包含文字页、矢量图形页和图文混排页，页面尺寸有 A4、A3、Letter
+- 扫描页图片：用 PIL 绘制的 A4 页面（黑字白底加少量彩色块），按 150–600 DPI 保存为 PNG 和 JPEG
+
+同样的参数总是生成同样的内容。生成结果按参数的哈希缓存在目录中，重复运行时直接复用。
+
+用法:
+    corpus = build_corpus('/tmp/bench_corpus', pages=4, image_count=2, image_dpis=(150, 300))
+    corpus.pdfs['text_a4']          # PDF 路径
+    corpus.images(300, 'png')       # 300 DPI 的 PNG 页面路径列表
+"""
+import hashlib
+import json
+import os
+import random
+
+# 生成器版本，修改生成逻辑时递增，使旧缓存失效
+CORPUS_VERSION = 1
+
+# 页面尺寸（点，1/72 英寸）
+PAGE_SIZES = {
+    'a4': (595, 842),
+    'a3': (842, 1191),
+    'letter': (612, 792),
+}
+
+# PDF 文档: 名称 → (页面尺寸, 内容类型)
+PDF_DOCUMENTS = {
+    'text_a4': ('a4', 'text'),
+    'vector_a3': ('a3', 'vector'),
+    'mixed_letter': ('letter', 'mixed'),
+}
+
+# 图片格式 → 扩展名
+IMAGE_FORMATS = {'png': '.png', 'jpeg': '.jpg'}
+
+# JPEG 保存质量
+JPEG_QUALITY = 90
+
+_WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut '
+          'labore et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris '
+          'nisi aliquip ex ea commodo consequat duis aute irure in reprehenderit voluptate velit esse '
+          'cillum fugiat nulla pariatur excepteur sint occaecat cupidatat non proident').split()
+
+# 彩色块使用的颜色
+_ACCENT_COLORS = ((31, 77, 120), (200, 40, 40), (40, 150, 70), (230, 160, 20))
+
+
+def _sentence(rng, length):
+    return ' '.join(rng.choice(_WORDS) for _ in range(length))
+
+
+def _pdf_string(text):
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def _text_ops(rng, x, top, width, bottom, size=10):
+    """从 top 开始向下排版段落，直到 bottom"""
+    leading = size * 1.2
+    chars_per_line = max(10, int(width / (size * 0.5)))
+    ops = [f'BT /F1 {size} Tf {leading:.1f} TL {x} {top} Td']
+    y = top
+    while y > bottom:
+        line = _sentence(rng, 30)[:chars_per_line]
+        ops.append(f'{_pdf_string(line)} Tj T*')
+        y -= leading
+        if rng.random() < 0.15:
+            # 段落间空一行
+            ops.append('T*')
+            y -= leading
+    ops.append('ET')
+    return ops
+
+
+def _vector_ops(rng, x, y, width, height):
+    """在 (x, y, width, height) 区域内绘制柱状图、表格线和曲线"""
+    ops = ['q 0.5 w 0 0 0 RG']
+    # 柱状图
+    bars = 12
+    bar_width = width / bars
+    for i in range(bars):
+        r, g, b = (c / 255 for c in rng.choice(_ACCENT_COLORS))
+        bar_height = rng.uniform(0.1, 0.45) * height
+        ops.append(f'{r:.3f} {g:.3f} {b:.3f} rg {x + i * bar_width + 2:.1f} {y:.1f} '
+                   f'{bar_width - 4:.1f} {bar_height:.1f} re f')
+    # 表格网格
+    grid_top = y + height
+    for i in range(11):
+        row_y = grid_top - i * height * 0.05
+        ops.append(f'{x:.1f} {row_y:.1f} m {x + width:.1f} {row_y:.1f} l S')
+    for i in range(7):
+        col_x = x + i * width / 6
+        ops.append(f'{col_x:.1f} {grid_top:.1f} m {col_x:.1f} {grid_top - height * 0.5:.1f} l S')
+    # 贝塞尔曲线
+    for _ in range(8):
+        points = [f'{x + rng.uniform(0, width):.1f} {y + rng.uniform(0, height):.1f}' for _ in range(4)]
+        ops.append(f'{points[0]} m {points[1]} {points[2]} {points[3]} c S')
+    ops.append('Q')
+    return ops
+
+
+def _page_content(rng, page_size, kind):
+    """生成一页的内容流"""
+    width, height = page_size
+    margin = 50
+    if kind == 'text':
+        ops = _text_ops(rng, margin, height - margin, width - 2 * margin, margin)
+    elif kind == 'vector':
+        ops = _vector_ops(rng, margin, margin, width - 2 * margin, height - 2 * margin)
+    else:
+        middle = height / 2
+        ops = (_text_ops(rng, margin, height - margin, width - 2 * margin, middle + 10, size=14)
+               + _vector_ops(rng, margin, margin, width - 2 * margin, middle - margin - 10))
+    return '\n'.join(ops).encode('latin-1')
+
+
+def write_pdf(path, pages):
+    """
+    写出一个只使用 Helvetica 标准字体的PDF
+
+    参数:
+        path: 输出路径
+        pages: [(宽, 高, 内容流字节串)] 列表
+    """
+    # 对象编号: 1 目录, 2 页面树, 3 字体, 之后每页两个对象（页面、内容流）
+    kids = ' '.join(f'{4 + 2 * i} 0 R' for i in range(len(pages)))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>'.encode(),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    for i, (width, height, content) in enumerate(pages):
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>'.encode())
+        objects.append(f'<< /Length {len(content)} >>\nstream\n'.encode() + content + b'\nendstream')
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f'{number} 0 obj\n'.encode() + body + b'\nendobj\n')
+        xref_offset = f.tell()
+        f.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+        for offset in offsets:
+            f.write(f'{offset:010d} 00000 n \n'.encode())
+        f.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
+
+
+def write_synthetic_pdf(path, page_count, page_size='a4', kind='mixed', seed=0):
+    """
+    生成多页合成PDF
+
+    参数:
+        path: 输出路径
+        page_count: 页数
+        page_size: PAGE_SIZES 中的名称
+        kind: 'text'（文字）、'vector'（矢量图形）或 'mixed'（图文混排）
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    size = PAGE_SIZES[page_size]
+    write_pdf(path, [(*size, _page_content(rng, size, kind)) for _ in range(page_count)])
+
+
+def _load_font(size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # 旧版 Pillow 只有固定大小的点阵字体
+        return ImageFont.load_default()
+
+
+def synthetic_page_image(dpi, seed=0, page_size='a4'):
+    """
+    绘制一张模拟扫描页：白底黑字，带几块彩色图形
+
+    返回:
+        RGB 模式的 PIL 图片，尺寸为页面尺寸按 dpi 换算的像素数
+    """
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    scale = dpi / 72
+    width, height = (round(side * scale) for side in PAGE_SIZES[page_size])
+    img = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    font = _load_font(round(10 * scale))
+    margin = round(50 * scale)
+    leading = round(12 * scale)
+
+    y = margin
+    figure_top = height // 2
+    figure_bottom = figure_top + height // 5
+    while y < height - margin:
+        if figure_top <= y < figure_bottom:
+            # 彩色柱状图
+            bar_width = (width - 2 * margin) // 10
+            for i in range(10):
+                bar_height = rng.randint((figure_bottom - figure_top) // 5, figure_bottom - figure_top)
+                left = margin + i * bar_width
+                draw.rectangle((left + 4, figure_bottom - bar_height, left + bar_width - 4, figure_bottom),
+                               fill=rng.choice(_ACCENT_COLORS))
+            draw.line((margin, figure_bottom, width - margin, figure_bottom), fill=(0, 0, 0),
+                      width=max(1, round(scale)))
+            y = figure_bottom + leading
+            continue
+        draw.text((margin, y), _sentence(rng, 14), fill=(0, 0, 0), font=font)
+        y += leading
+    return img
+
+
+class Corpus:
+    """已生成的测试数据目录"""
+
+    def __init__(self, root, spec):
+        self.root = root
+        self.spec = spec
+        self.pdfs = {name: os.path.join(root, 'pdf', f'{name}.pdf') for name in spec['pdfs']}
+
+    @property
+    def key(self):
+        return self.spec['key']
+
+    def image_dir(self, dpi, image_format):
+        return os.path.join(self.root, 'images', f'{dpi}dpi', image_format)
+
+    def images(self, dpi, image_format):
+        """指定 DPI 和格式的页面图片路径列表，按页码排序"""
+        extension = IMAGE_FORMATS[image_format]
+        return [os.path.join(self.image_dir(dpi, image_format), f'page_{i}{extension}')
+                for i in range(1, self.spec['image_count'] + 1)]
+
+
+def corpus_spec(pages, image_count, image_dpis, seed=0):
+    """生成参数，key 为参数的哈希，用作缓存目录名"""
+    spec = {
+        'version': CORPUS_VERSION,
+        'seed': seed,
+        'pages': pages,
+        'pdfs': PDF_DOCUMENTS,
+        'image_count': image_count,
+        'image_dpis': sorted(image_dpis),
+        'jpeg_quality': JPEG_QUALITY,
+    }
+    spec['key'] = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+    return spec
+
+
+def build_corpus(root, pages=4, image_count=2, image_dpis=(150, 300), seed=0, progress=None):
+    """
+    生成（或复用已缓存的）测试数据
+
+    参数:
+        root: 缓存根目录，数据生成在其中以参数哈希命名的子目录里
+        pages: 每个PDF的页数
+        image_count: 每种 DPI 生成的页面图片数
+        image_dpis: 页面图片的 DPI 列表
+        seed: 随机种子
+        progress: 进度回调，参数为说明文字
+
+    返回:
+        Corpus
+    """
+    spec = corpus_spec(pages, image_count, image_dpis, seed)
+    corpus = Corpus(os.path.join(root, spec['key']), spec)
+    marker = os.path.join(corpus.root, 'corpus.json')
+    if os.path.exists(marker):
+        return corpus
+
+    os.makedirs(os.path.join(corpus.root, 'pdf'), exist_ok=True)
+    for index, (name, (page_size, kind)) in enumerate(sorted(PDF_DOCUMENTS.items())):
+        if progress:
+            progress(f'生成PDF: {name}')
+        write_synthetic_pdf(corpus.pdfs[name], pages, page_size, kind, seed + index)
+
+    for dpi in spec['image_dpis']:
+        if progress:
+            progress(f'生成 {dpi} DPI 页面图片')
+        for image_format in IMAGE_FORMATS:
+            os.makedirs(corpus.image_dir(dpi, image_format), exist_ok=True)
+        for page, path in enumerate(corpus.images(dpi, 'png')):
+            img = synthetic_page_image(dpi, seed + page)
+            img.save(path)
+            img.save(corpus.images(dpi, 'jpeg')[page], 'JPEG', quality=JPEG_QUALITY)
+            img.close()
+
+    # 最后写入标记，生成中断时下次会重新生成
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(spec, f, ensure_ascii=False, indent=2)
+    return corpus
@@ -0,0 +1,104 @@
+"""
+目录扫描基准测试：对比旧的 os.walk 收集方式与 file_scanner 的首次扫描和缓存命中后的重新扫描
+
+在临时目录中生成一棵目录树（空文件，混有少量非图片文件），把目录的修改时间调到几分钟前，
+模拟已经存在的图片库；同时检查三种方式收集到的文件集合相同。
+
+用法:
+    python -m benchmarks.directory_scan
+    python -m benchmarks.directory_scan --files 100000 --dirs 500 --repeat 3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import file_scanner
+
+# 生成文件时轮流使用的扩展名，其中 .txt 不应被收集
+EXTENSIONS = ('.png', '.jpg', '.png', '.tif', '.txt')
+
+
+def build_tree(root, file_count, dir_count):
+    """生成 dir_count 个子目录（两层）并把 file_count 个文件平均分配到其中，返回全部目录"""
+    directories = [root]
+    for index in range(dir_count):
+        parent = directories[index // 20] if index >= 20 else root
+        path = os.path.join(parent, f'dir_{index}')
+        os.mkdir(path)
+        directories.append(path)
+    for index in range(file_count):
+        directory = directories[index % len(directories)]
+        open(os.path.join(directory, f'page_{index}{EXTENSIONS[index % len(EXTENSIONS)]}'), 'wb').close()
+    # 刚修改过的目录不会被缓存，把修改时间调到几分钟前
+    past = time.time() - 300
+    for directory in directories:
+        os.utime(directory, (past, past))
+    return directories
+
+
+def legacy_scan(root, extensions):
+    """旧的收集方式：os.walk + 逐目录 abspath 前缀比较 + 排序"""
+    output_dir_abs = os.path.abspath(os.path.join(root, 'output'))
+    paths = []
+    for current, dirs, files in os.walk(root):
+        if os.path.abspath(current).startswith(output_dir_abs):
+            continue
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                paths.append(os.path.join(current, name))
+    return paths
+
+
+def scanner_scan(root, extensions):
+    return file_scanner.list_files(root, extensions, recursive=True, exclude=[os.path.join(root, 'output')],
+                                   sniff=False)
+
+
+def best_time(func, repeat, before=None):
+    """重复执行取最快一次，返回 (秒数, 结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='目录扫描基准测试')
+    parser.add_argument('--files', type=int, default=100000, help='文件数，默认100000')
+    parser.add_argument('--dirs', type=int, default=500, help='子目录数，默认500')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='scan_bench_')
+    try:
+        directories = build_tree(root, args.files, args.dirs)
+        extensions = file_scanner.IMAGE_EXTENSIONS
+        legacy_time, legacy_paths = best_time(lambda: legacy_scan(root, extensions), args.repeat)
+        cold_time, cold_paths = best_time(lambda: scanner_scan(root, extensions), args.repeat,
+                                          file_scanner.clear_cache)
+        scanner_scan(root, extensions)
+        warm_time, warm_paths = best_time(lambda: scanner_scan(root, extensions), args.repeat)
+
+        if not set(legacy_paths) == set(cold_paths) == set(warm_paths):
+            raise SystemExit('扫描结果与 os.walk 不一致')
+
+        print(f'目录树: {len(directories)} 个目录，{args.files} 个文件，其中图片 {len(legacy_paths)} 个')
+        print(f'{"方式":<20} {"耗时(ms)":>10} {"加速比":>8}')
+        for label, elapsed in (('os.walk（旧）', legacy_time), ('scandir 首次扫描', cold_time),
+                               ('scandir 缓存命中', warm_time)):
+            print(f'{label:<20} {elapsed * 1000:>10.1f} {legacy_time / elapsed:>8.2f}')
+    finally:
+        shutil.rmtree(root)
+        file_scanner.clear_cache()
+
+
+if __name__ == '__main__':
+    main()
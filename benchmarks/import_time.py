@@ -0,0 +1,106 @@
+"""
+冷启动导入耗时基准测试与守卫
+
+在全新的解释器中用 python -X importtime 导入各个入口模块，统计导入耗时的中位数，
+并检查导入时是否意外加载了重量级后端（PyQt6、numpy、PIL、pdf2image）。
+超出预算或加载了不该加载的模块时以非零状态退出，可直接放进 CI。
+
+用法:
+    python -m benchmarks.import_time --repeat 7
+    python -m benchmarks.import_time --scale 2   # 在较慢的机器上放宽预算
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_BACKENDS = ('PyQt6', 'numpy', 'PIL', 'pdf2image')
+
+# 入口模块 → (导入耗时预算毫秒, 导入时不允许加载的模块)
+TARGETS = {
+    'cli': (120, HEAVY_BACKENDS),
+    'pdf_to_image': (80, HEAVY_BACKENDS),
+    'color_convert': (80, HEAVY_BACKENDS),
+    'image_invert': (80, HEAVY_BACKENDS),
+    'pdf_writer': (80, HEAVY_BACKENDS),
+    'pipeline': (80, HEAVY_BACKENDS),
+    'pdf_gui': (400, ('numpy', 'PIL', 'pdf2image')),
+}
+
+_PROBE = 'import {module}, sys, json; print(json.dumps(sorted(sys.modules)))'
+
+
+def measure(module):
+    """
+    在新解释器中导入一次模块
+
+    返回:
+        (导入耗时毫秒, 已加载的模块名集合)
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        # 格式: "import time:   self | cumulative | name"，顶层模块名前没有缩进
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].rstrip() == f' {module}':
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f'未能从 importtime 输出中找到模块: {module}')
+    return cumulative_us / 1000.0, set(json.loads(completed.stdout))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动导入耗时基准测试')
+    parser.add_argument('modules', nargs='*', help='要测试的模块，默认全部入口模块')
+    parser.add_argument('--repeat', type=int, default=5, help='每个模块重复导入的次数，取中位数')
+    parser.add_argument('--scale', type=float, default=1.0, help='预算放大倍数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules or TARGETS:
+        budget, forbidden = TARGETS.get(module, (None, HEAVY_BACKENDS))
+        timings = []
+        loaded = set()
+        for _ in range(args.repeat):
+            elapsed, loaded = measure(module)
+            timings.append(elapsed)
+        median = statistics.median(timings)
+        leaked = sorted(name for name in forbidden if name in loaded)
+        over_budget = budget is not None and median > budget * args.scale
+        results.append({
+            'module': module,
+            'median_ms': round(median, 2),
+            'min_ms': round(min(timings), 2),
+            'budget_ms': budget * args.scale if budget is not None else None,
+            'leaked': leaked,
+            'ok': not leaked and not over_budget,
+        })
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f'{"模块":<16} {"中位数(ms)":>10} {"最快(ms)":>10} {"预算(ms)":>10}  结果')
+        for result in results:
+            budget = f'{result["budget_ms"]:.0f}' if result['budget_ms'] is not None else '-'
+            if result['leaked']:
+                verdict = '导入了重量级模块: ' + ', '.join(result['leaked'])
+            elif not result['ok']:
+                verdict = '超出预算'
+            else:
+                verdict = '通过'
+            print(f'{result["module"]:<16} {result["median_ms"]:>10.1f} {result["min_ms"]:>10.1f} '
+                  f'{budget:>10}  {verdict}')
+
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+颜色反转基准测试：对比旧的 ImageOps.invert(img.convert('RGB')) 与查表反转在各种图片模式上的耗时
+
+同时检查结果正确：颜色通道取反，透明通道不变。
+
+用法:
+    python -m benchmarks.invert --width 3840 --height 2160 --repeat 5
+"""
+import argparse
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from image_invert import invert_image
+
+
+def legacy_invert(img):
+    """旧版反转实现：统一转为RGB，丢弃透明通道"""
+    return ImageOps.invert(img.convert('RGB'))
+
+
+def make_images(width, height, seed=0):
+    """生成各种模式的测试图片"""
+    rng = np.random.default_rng(seed)
+    rgba = rng.integers(0, 256, size=(height, width, 4), dtype=np.uint8)
+    gray = rgba[:, :, 0]
+    return {
+        'RGB': Image.fromarray(rgba[:, :, :3]),
+        'RGBA': Image.fromarray(rgba),
+        'L': Image.fromarray(gray),
+        'P': Image.fromarray(gray).convert('P'),
+        '1': Image.fromarray(gray).convert('1', dither=Image.Dither.NONE),
+    }
+
+
+def expected_result(img):
+    """用 numpy 计算的参考结果"""
+    if img.mode == '1':
+        return ~np.asarray(img)
+    if img.mode == 'P':
+        return 255 - np.asarray(img.convert('RGB'))
+    array = np.asarray(img).copy()
+    if img.mode == 'RGBA':
+        array[:, :, :3] = 255 - array[:, :, :3]
+        return array
+    return 255 - array
+
+
+def best_time(func, img, repeat):
+    """重复执行取最快一次，返回 (秒数, 结果)；每次都在副本上执行，避免原地修改影响下一次"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        source = img.copy()
+        start = time.perf_counter()
+        result = func(source)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='颜色反转基准测试')
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'页面尺寸: {args.width}x{args.height}')
+    print(f'{"模式":<6} {"旧实现(ms)":>10} {"查表(ms)":>10} {"原地(ms)":>10} {"加速比":>8}')
+    for mode, img in make_images(args.width, args.height).items():
+        legacy_time, _ = best_time(legacy_invert, img, args.repeat)
+        lut_time, lut_result = best_time(invert_image, img, args.repeat)
+        in_place_time, in_place_result = best_time(lambda source: invert_image(source, in_place=True),
+                                                   img, args.repeat)
+
+        expected = expected_result(img)
+        for result in (lut_result, in_place_result):
+            if result.mode != img.mode:
+                raise SystemExit(f'{mode}: 反转后模式变为 {result.mode}')
+            actual = np.asarray(result.convert('RGB') if mode == 'P' else result)
+            if not np.array_equal(actual, expected):
+                raise SystemExit(f'{mode}: 反转结果不正确')
+
+        print(f'{mode:<6} {legacy_time * 1000:>10.1f} {lut_time * 1000:>10.1f} {in_place_time * 1000:>10.1f} '
+              f'{legacy_time / min(lut_time, in_place_time):>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
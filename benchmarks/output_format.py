@@ -0,0 +1,88 @@
+"""
+输出格式基准测试：比较各种格式与编码参数的编码耗时和文件大小
+
+不指定图片时生成一张 A4、200 DPI 的双色文字页（与默认颜色转换的输出相同），
+这是本工具最常见的输出内容。
+
+用法:
+    python -m benchmarks.output_format
+    python -m benchmarks.output_format page_1.png --repeat 5
+"""
+import argparse
+import io
+import random
+import time
+
+from image_output import OutputFormat
+
+# (说明, OutputFormat 参数)
+CONFIGS = [
+    ('PNG 默认', {}),
+    ('PNG level=1', {'compress_level': 1}),
+    ('PNG optimize', {'optimize': True}),
+    ('PNG 调色板', {'palette': True}),
+    ('PNG 调色板 level=1', {'palette': True, 'compress_level': 1}),
+    ('PNG 1位', {'bilevel': True}),
+    ('WebP q=80', {'name': 'webp', 'quality': 80}),
+    ('JPEG q=85', {'name': 'jpeg', 'quality': 85}),
+    ('TIFF deflate', {'name': 'tiff'}),
+    ('TIFF 1位 G4', {'name': 'tiff', 'bilevel': True}),
+]
+
+
+def synthetic_page(width=1654, height=2339, seed=0):
+    """生成双色（背景黄、文字蓝）的模拟文字页"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    img = Image.new('RGB', (width, height), (255, 223, 63))
+    draw = ImageDraw.Draw(img)
+    for top in range(120, height - 120, 40):
+        left = 120
+        while left < width - 200:
+            word = rng.randint(20, 120)
+            draw.rectangle([left, top, left + word, top + 18], fill=(31, 77, 120))
+            left += word + rng.randint(12, 30)
+    return img
+
+
+def measure(img, output_format, repeat):
+    """返回 (最快一次的编码秒数, 字节数)"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        output_format.save(img, buffer)
+        elapsed = time.perf_counter() - start
+        size = buffer.tell()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='输出格式编码耗时与文件大小基准测试')
+    parser.add_argument('image', nargs='?', help='用于测试的图片，默认使用生成的双色文字页')
+    parser.add_argument('--repeat', type=int, default=3, help='每种格式重复次数，取最快一次')
+    args = parser.parse_args()
+
+    if args.image:
+        from PIL import Image
+
+        with Image.open(args.image) as img:
+            img = img.convert('RGB')
+    else:
+        img = synthetic_page()
+    print(f'测试图片: {img.size[0]}x{img.size[1]} {img.mode}')
+
+    print(f'{"格式":<20} {"编码(ms)":>10} {"大小(KB)":>10} {"相对大小":>8}')
+    baseline = None
+    for label, options in CONFIGS:
+        elapsed, size = measure(img, OutputFormat(**options), args.repeat)
+        if baseline is None:
+            baseline = size
+        print(f'{label:<20} {elapsed * 1000:>10.1f} {size / 1024:>10.1f} {size / baseline:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+页面传递基准测试：比较进程间用 multiprocessing.Queue 传递 pickle 后的图片与共享内存页面环
+
+一个进程连续发送同一幅渲染尺寸的页面，另一个进程逐页接收并读取全部像素（计算取值范围），
+统计每秒传递的页数和像素数据量。默认模拟 300 DPI 的 A4 RGB 页面（2479x3508）。
+
+用法:
+    python -m benchmarks.page_transport
+    python -m benchmarks.page_transport --pages 50 --dpi 200 --mode L
+"""
+import argparse
+import json
+import multiprocessing
+import time
+
+from page_buffer import SLOT_LAYOUTS, PageRing
+
+# A4 纸的尺寸（PDF 点数）
+A4_POINTS = (595, 842)
+
+# 统计数据量时每像素的字节数（1 位页面按解包后的 8 位灰度计）
+PIXEL_BYTES = {'RGB': 3, 'L': 1, '1': 1}
+
+
+def page_size(dpi):
+    return tuple(round(points * dpi / 72) for points in A4_POINTS)
+
+
+def make_page(size, mode):
+    """带噪声的页面，避免 pickle 或管道因为数据全相同而占便宜"""
+    from PIL import Image
+
+    return Image.effect_noise(size, 64).convert(mode)
+
+
+def _queue_producer(queue, start, page_count, size, mode):
+    img = make_page(size, mode)
+    start.wait()
+    for page_number in range(1, page_count + 1):
+        queue.put((page_number, img))
+    queue.put(None)
+
+
+def _queue_consumer(queue, done):
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        item[1].getextrema()
+    done.put(time.perf_counter())
+
+
+def _ring_producer(ring, start, page_count, size, mode):
+    img = make_page(size, mode)
+    start.wait()
+    for page_number in range(1, page_count + 1):
+        ring.put(page_number, img)
+    ring.finish()
+
+
+def _ring_consumer(ring, done, restore_rgb):
+    for _, img in ring.iter_pages(restore_rgb):
+        img.getextrema()
+    done.put(time.perf_counter())
+
+
+def run(method, page_count, size, mode, slots):
+    """执行一种传递方式，返回耗时秒数"""
+    context = multiprocessing.get_context()
+    start = context.Event()
+    done = context.Queue()
+    ring = None
+    if method == 'pickle':
+        queue = context.Queue(slots)
+        producer = context.Process(target=_queue_producer, args=(queue, start, page_count, size, mode))
+        consumer = context.Process(target=_queue_consumer, args=(queue, done))
+    else:
+        ring = PageRing(slots, size[0] * size[1] * SLOT_LAYOUTS[mode][1], context)
+        producer = context.Process(target=_ring_producer, args=(ring, start, page_count, size, mode))
+        consumer = context.Process(target=_ring_consumer, args=(ring, done, method == 'ring'))
+    try:
+        producer.start()
+        consumer.start()
+        # 等两个进程都准备好（生成测试页面）后再开始计时
+        time.sleep(0.5)
+        begin = time.perf_counter()
+        start.set()
+        end = done.get()
+        producer.join()
+        consumer.join()
+        return end - begin
+    finally:
+        if ring is not None:
+            ring.close()
+            ring.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='进程间页面传递基准测试（pickle 队列 vs 共享内存页面环）')
+    parser.add_argument('--pages', type=int, default=30, help='传递的页数，默认30')
+    parser.add_argument('--dpi', type=int, default=300, help='模拟的渲染分辨率（A4），默认300')
+    parser.add_argument('--mode', choices=list(SLOT_LAYOUTS), default='RGB', help='页面模式，默认RGB')
+    parser.add_argument('--slots', type=int, default=4, help='队列长度/环中的槽数，默认4')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出结果')
+    args = parser.parse_args()
+
+    size = page_size(args.dpi)
+    page_bytes = size[0] * size[1] * PIXEL_BYTES[args.mode]
+    methods = [('pickle', 'pickle + Queue'), ('ring', '共享内存环')]
+    if args.mode == 'RGB':
+        methods.append(('ring-rgbx', '共享内存环（RGBX 零拷贝）'))
+
+    results = []
+    for method, label in methods:
+        elapsed = run(method, args.pages, size, args.mode, args.slots)
+        results.append({'method': method, 'label': label, 'seconds': elapsed,
+                         'pages_per_sec': args.pages / elapsed if elapsed else 0.0,
+                         'mb_per_sec': args.pages * page_bytes / elapsed / 1e6 if elapsed else 0.0})
+
+    if args.json:
+        print(json.dumps({'pages': args.pages, 'size': size, 'mode': args.mode, 'results': results},
+                         ensure_ascii=False, indent=2))
+        return
+    print(f'测试页面: {size[0]}x{size[1]} {args.mode}，共 {args.pages} 页')
+    print(f'{"方式":<24} {"耗时(秒)":>10} {"页/秒":>8} {"MB/秒":>8} {"加速比":>8}')
+    baseline = results[0]['pages_per_sec']
+    for result in results:
+        speedup = result['pages_per_sec'] / baseline if baseline else 0.0
+        print(f'{result["label"]:<24} {result["seconds"]:>10.2f} {result["pages_per_sec"]:>8.1f} '
+              f'{result["mb_per_sec"]:>8.0f} {speedup:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
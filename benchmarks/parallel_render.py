@@ -0,0 +1,64 @@
+"""
+并行渲染基准测试：统计不同进程数下的渲染吞吐量（页/秒）
+
+用法:
+    python -m benchmarks.parallel_render 文档.pdf --dpi 200 --workers 1,2,4,8
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from pdf_to_image import convert_pdf_to_images
+
+
+def run_once(pdf_path, dpi, workers):
+    """在临时目录中完整转换一次，返回 (页数, 耗时秒数)"""
+    output_base_dir = tempfile.mkdtemp(prefix='bench_render_')
+    try:
+        start = time.perf_counter()
+        # 屏蔽逐页打印，避免终端输出影响计时
+        with contextlib.redirect_stdout(io.StringIO()):
+            page_count = convert_pdf_to_images(pdf_path, output_base_dir, dpi, workers=workers)
+        return page_count, time.perf_counter() - start
+    finally:
+        shutil.rmtree(output_base_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF并行渲染基准测试')
+    parser.add_argument('pdf_path', help='用于测试的PDF文件')
+    parser.add_argument('--dpi', type=int, default=200, help='渲染分辨率，默认200')
+    parser.add_argument('--workers', default=None,
+                        help='逗号分隔的进程数列表，默认 1,2,4,...,CPU核心数')
+    parser.add_argument('--repeat', type=int, default=1, help='每种进程数重复次数，取最快一次')
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(',')]
+    else:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = []
+        workers = 1
+        while workers < cpu_count:
+            worker_counts.append(workers)
+            workers *= 2
+        worker_counts.append(cpu_count)
+
+    print(f'{"进程数":>6} {"页数":>6} {"耗时(秒)":>10} {"页/秒":>8} {"加速比":>8}')
+    baseline = None
+    for workers in worker_counts:
+        runs = [run_once(args.pdf_path, args.dpi, workers) for _ in range(args.repeat)]
+        page_count, elapsed = min(runs, key=lambda run: run[1])
+        pages_per_sec = page_count / elapsed if elapsed else 0.0
+        if baseline is None:
+            baseline = pages_per_sec
+        speedup = pages_per_sec / baseline if baseline else 0.0
+        print(f'{workers:>6} {page_count:>6} {elapsed:>10.2f} {pages_per_sec:>8.2f} {speedup:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
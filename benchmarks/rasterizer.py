@@ -0,0 +1,60 @@
+"""
+光栅化后端基准测试：比较各后端渲染单页的延迟
+
+每个后端从打开文档开始计时，记录产出每一页所用的时间（含 pdf2image 的子进程与临时文件开销），
+只渲染不保存，避免编码时间干扰比较。
+
+用法:
+    python -m benchmarks.rasterizer 文档.pdf --dpi 200
+    python -m benchmarks.rasterizer 文档.pdf --backends pdf2image,pypdfium2 --pages 10
+"""
+import argparse
+import statistics
+import time
+
+from rasterizer import DEFAULT_WINDOW_SIZE, available_backends, get_backend
+
+
+def measure(backend, pdf_path, dpi, page_count, window_size):
+    """渲染前 page_count 页，返回每页的耗时秒数列表"""
+    latencies = []
+    start = time.perf_counter()
+    for _, image in backend.iter_pages(pdf_path, dpi, 1, page_count, window_size):
+        image.load()
+        now = time.perf_counter()
+        latencies.append(now - start)
+        image.close()
+        start = now
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF光栅化后端单页延迟基准测试')
+    parser.add_argument('pdf_path', help='用于测试的PDF文件')
+    parser.add_argument('--dpi', type=int, default=200, help='渲染分辨率，默认200')
+    parser.add_argument('--backends', default=None, help='逗号分隔的后端列表，默认测试所有已安装的后端')
+    parser.add_argument('--pages', type=int, default=None, help='只渲染前N页，默认全部')
+    parser.add_argument('--window-size', type=int, default=DEFAULT_WINDOW_SIZE,
+                        help='pdf2image 每次调用渲染的页数')
+    args = parser.parse_args()
+
+    names = args.backends.split(',') if args.backends else available_backends()
+    print(f'{"后端":<12} {"页数":>6} {"中位数(ms)":>10} {"平均(ms)":>10} {"最慢(ms)":>10} {"页/秒":>8}')
+    for name in names:
+        backend = get_backend(name)
+        try:
+            page_count = backend.page_count(args.pdf_path)
+            if args.pages:
+                page_count = min(page_count, args.pages)
+            latencies = measure(backend, args.pdf_path, args.dpi, page_count, args.window_size)
+        except Exception as e:
+            print(f'{name:<12} 渲染失败: {e}')
+            continue
+        total = sum(latencies)
+        print(f'{name:<12} {len(latencies):>6} {statistics.median(latencies) * 1000:>10.1f} '
+              f'{total / len(latencies) * 1000:>10.1f} {max(latencies) * 1000:>10.1f} '
+              f'{len(latencies) / total if total else 0.0:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
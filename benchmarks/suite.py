@@ -0,0 +1,390 @@
+"""
+可复现的综合基准测试：在合成测试数据上测量渲染、颜色转换、反转和合并PDF
+
+测试数据由 benchmarks.corpus 用固定种子在本地生成，不需要网络，也不需要准备任何文件。
+每个用例在单独的子进程中运行，统计:
+- 吞吐量（页/秒或文件/秒，以及输入 MB/秒）
+- 每页/每个文件的延迟百分位（p50/p90/p99/最大）
+- 子进程的峰值常驻内存，以及相对开始测量前的增量
+- 各阶段（render/decode/transform/encode/write）的平均耗时，见 metrics
+
+结果可以保存为基线 JSON，之后的运行与基线比较，吞吐量下降或峰值内存上升超过阈值时报告回归。
+
+用法:
+    python -m benchmarks.suite                                  # quick 配置
+    python -m benchmarks.suite --profile full --save-baseline   # 保存为 benchmarks/baselines/full.json
+    python -m benchmarks.suite --compare                        # 与同配置的基线比较，有回归时返回1
+    python -m benchmarks.suite --cases render,merge --repeat 5 --output 结果.json
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import IMAGE_FORMATS, PDF_DOCUMENTS, build_corpus
+
+# 结果文件格式版本
+RESULT_VERSION = 1
+
+# 测试配置: 每个PDF的页数、每种 DPI 的图片数、合并用例的页数（循环使用图片）、渲染 DPI、图片 DPI
+PROFILES = {
+    'quick': {'pages': 4, 'image_count': 2, 'merge_pages': 40, 'render_dpis': (150, 300),
+              'image_dpis': (150, 300)},
+    'full': {'pages': 12, 'image_count': 6, 'merge_pages': 200, 'render_dpis': (150, 300, 600),
+             'image_dpis': (150, 300, 600)},
+}
+
+DEFAULT_BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), 'pdf_tools_bench_corpus')
+
+# 超过该比例的吞吐量下降或内存上升视为回归
+DEFAULT_THRESHOLD = 0.15
+
+
+def percentile(values, q):
+    """线性插值的百分位数，q 为 0-100"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _reset_peak_rss():
+    """
+    Linux 上清零本进程的峰值内存记录（VmHWM），使之后的峰值只反映被测操作
+
+    返回:
+        是否成功，不支持时返回False，此时峰值包含此前的模块导入等
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _read_rss():
+    """
+    读取本进程当前与峰值常驻内存（字节）
+
+    返回:
+        (当前, 峰值)；没有 /proc 时当前为None，峰值取 metrics.peak_rss()
+    """
+    import metrics
+
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    name, value = line.split(':')
+                    values[name] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return values.get('VmRSS'), values.get('VmHWM', metrics.peak_rss())
+
+
+def build_cases(corpus, profile, backend=None):
+    """
+    根据测试数据生成用例列表
+
+    返回:
+        [用例字典]，包含 name、op、inputs 以及各操作的参数
+    """
+    from rasterizer import available_backends
+
+    cases = []
+    if backend or available_backends():
+        for name in sorted(PDF_DOCUMENTS):
+            for dpi in profile['render_dpis']:
+                cases.append({'name': f'render/{name}/{dpi}dpi', 'op': 'render', 'unit': 'page',
+                              'inputs': [corpus.pdfs[name]], 'dpi': dpi, 'backend': backend})
+    else:
+        print('没有可用的光栅化后端，跳过渲染用例')
+    for dpi in profile['image_dpis']:
+        for image_format in IMAGE_FORMATS:
+            images = corpus.images(dpi, image_format)
+            for op in ('recolor', 'invert'):
+                cases.append({'name': f'{op}/{image_format}/{dpi}dpi', 'op': op, 'unit': 'file',
+                              'inputs': images, 'dpi': dpi})
+            # 合并直接搬运压缩数据，单页耗时很短，用较多页数减少计时误差
+            pages = (images * profile['merge_pages'])[:profile['merge_pages']]
+            cases.append({'name': f'merge/{image_format}/{dpi}dpi', 'op': 'merge', 'unit': 'page',
+                          'inputs': pages, 'dpi': dpi})
+    return cases
+
+
+def _prepare_render(case):
+    from pdf_to_image import render_pdf
+    from rasterizer import get_backend
+
+    backend = get_backend(case['backend'])
+    case['backend'] = backend.name
+
+    def run(workdir, on_item):
+        render_pdf(case['inputs'][0], workdir, case['dpi'], progress=lambda *_: on_item(), backend=backend)
+    return run
+
+
+def _prepare_recolor(case):
+    from color_convert import recolor_file
+
+    def run(workdir, on_item):
+        for path in case['inputs']:
+            recolor_file(path, os.path.join(workdir, os.path.basename(path)))
+            on_item()
+    return run
+
+
+def _prepare_invert(case):
+    from image_invert import invert_file
+
+    def run(workdir, on_item):
+        for path in case['inputs']:
+            invert_file(path, os.path.join(workdir, os.path.basename(path)))
+            on_item()
+    return run
+
+
+def _prepare_merge(case):
+    from pdf_writer import merge_images_to_pdf
+
+    def run(workdir, on_item):
+        merge_images_to_pdf(case['inputs'], os.path.join(workdir, 'merged.pdf'), progress=lambda *_: on_item())
+    return run
+
+
+# 操作名称 → 准备函数，准备函数导入所需模块并返回 run(workdir, on_item)
+OPERATIONS = {
+    'render': _prepare_render,
+    'recolor': _prepare_recolor,
+    'invert': _prepare_invert,
+    'merge': _prepare_merge,
+}
+
+
+def _measure(run, case, repeat, warmup):
+    """预热后重复执行 run，统计延迟、吞吐量、内存和各阶段耗时"""
+    import metrics
+
+    # 模块导入完成后的内存，作为增量的起点
+    _reset_peak_rss()
+    rss_before, _ = _read_rss()
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    latencies = []
+    durations = []
+    item_count = 0
+    try:
+        for _ in range(warmup):
+            run(workdir, lambda: None)
+            shutil.rmtree(workdir, ignore_errors=True)
+            os.makedirs(workdir)
+
+        with metrics.collect() as collected:
+            for _ in range(repeat):
+                count = 0
+                last = start = time.perf_counter()
+
+                def on_item():
+                    nonlocal count, last
+                    now = time.perf_counter()
+                    latencies.append(now - last)
+                    last = now
+                    count += 1
+
+                run(workdir, on_item)
+                durations.append(time.perf_counter() - start)
+                item_count = count
+                shutil.rmtree(workdir, ignore_errors=True)
+                os.makedirs(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    _, peak = _read_rss()
+    input_bytes = sum(os.path.getsize(path) for path in case['inputs'])
+    median_seconds = percentile(durations, 50)
+    return {
+        'op': case['op'],
+        'unit': case['unit'],
+        'backend': case.get('backend'),
+        'items': item_count,
+        'runs': repeat,
+        'seconds': median_seconds,
+        'throughput': item_count / median_seconds if median_seconds else 0.0,
+        'mb_per_sec': input_bytes / median_seconds / 1e6 if median_seconds else 0.0,
+        'latency_ms': {name: percentile(latencies, q) * 1000
+                       for name, q in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))},
+        'peak_rss_mb': peak / 1e6 if peak is not None else None,
+        'rss_delta_mb': (peak - rss_before) / 1e6 if peak is not None and rss_before is not None else None,
+        'stages_ms': {name: stage['seconds'] / repeat * 1000
+                      for name, stage in collected.snapshot()['stages'].items()},
+    }
+
+
+def run_case(case, repeat, warmup):
+    """
+    在当前进程中运行一个用例（由 run_isolated 在子进程中调用）
+
+    返回:
+        结果字典
+    """
+    # 屏蔽各工具的逐页打印，避免终端输出影响计时
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _measure(OPERATIONS[case['op']](case), case, repeat, warmup)
+
+
+def run_isolated(case, repeat, warmup):
+    """在新启动的子进程中运行用例，使峰值内存只反映该用例"""
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(run_case, case, repeat, warmup).result()
+
+
+def environment():
+    """记录影响结果的运行环境"""
+    import numpy
+    import PIL
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'pillow': PIL.__version__,
+        'numpy': numpy.__version__,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    比较两次结果
+
+    返回:
+        (行列表, 回归数)，每行为 (用例, 基线吞吐量, 当前吞吐量, 吞吐量变化, 内存变化, 结论)
+    """
+    rows = []
+    regressions = 0
+    for name, result in current['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            rows.append((name, None, result['throughput'], None, None, '新增'))
+            continue
+        speed_change = result['throughput'] / base['throughput'] - 1 if base['throughput'] else 0.0
+        memory_change = None
+        if base.get('peak_rss_mb') and result.get('peak_rss_mb'):
+            memory_change = result['peak_rss_mb'] / base['peak_rss_mb'] - 1
+        if speed_change < -threshold or (memory_change is not None and memory_change > threshold):
+            verdict = '回归'
+            regressions += 1
+        elif speed_change > threshold:
+            verdict = '提升'
+        else:
+            verdict = '持平'
+        rows.append((name, base['throughput'], result['throughput'], speed_change, memory_change, verdict))
+    return rows, regressions
+
+
+def print_results(results):
+    print(f'{"用例":<26} {"数量":>4} {"吞吐量":>12} {"MB/秒":>8} {"p50(ms)":>9} {"p90(ms)":>9} '
+          f'{"p99(ms)":>9} {"峰值内存(MB)":>12} {"增量(MB)":>9}')
+    for name, result in results['cases'].items():
+        latency = result['latency_ms']
+        unit = '页/秒' if result['unit'] == 'page' else '个/秒'
+        peak = result['peak_rss_mb']
+        delta = result['rss_delta_mb']
+        print(f'{name:<26} {result["items"]:>4} {result["throughput"]:>8.2f}{unit:>4} {result["mb_per_sec"]:>8.2f} '
+              f'{latency["p50"]:>9.1f} {latency["p90"]:>9.1f} {latency["p99"]:>9.1f} '
+              f'{peak if peak is not None else float("nan"):>12.1f} '
+              f'{delta if delta is not None else float("nan"):>9.1f}')
+
+
+def print_comparison(rows, threshold):
+    print(f'\n与基线比较（阈值 {threshold:.0%}）')
+    print(f'{"用例":<26} {"基线":>10} {"当前":>10} {"吞吐量":>9} {"内存":>9}  结论')
+    for name, base, current, speed_change, memory_change, verdict in rows:
+        base_text = f'{base:.2f}' if base is not None else '-'
+        speed_text = f'{speed_change:+.1%}' if speed_change is not None else '-'
+        memory_text = f'{memory_change:+.1%}' if memory_change is not None else '-'
+        print(f'{name:<26} {base_text:>10} {current:>10.2f} {speed_text:>9} {memory_text:>9}  {verdict}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合成数据上的综合基准测试')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick', help='测试配置，默认 quick')
+    parser.add_argument('--cases', default=None,
+                        help='逗号分隔的用例名称前缀，例如 render,merge/png，默认运行全部')
+    parser.add_argument('--backend', default=None, help='渲染使用的光栅化后端，默认自动选择')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例测量的次数，默认3')
+    parser.add_argument('--warmup', type=int, default=1, help='测量前预热运行的次数，默认1')
+    parser.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR, help='测试数据缓存目录')
+    parser.add_argument('--output', default=None, help='把结果写入 JSON 文件')
+    parser.add_argument('--baseline', default=None,
+                        help='基线文件路径，默认 benchmarks/baselines/<配置名>.json')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--compare', action='store_true', help='与基线比较，有回归时返回1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='判定回归的变化比例，默认0.15')
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    baseline_path = args.baseline or os.path.join(DEFAULT_BASELINE_DIR, f'{args.profile}.json')
+    baseline = None
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            raise SystemExit(f'基线文件不存在: {baseline_path}')
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    corpus = build_corpus(args.corpus_dir, profile['pages'], profile['image_count'], profile['image_dpis'],
+                          progress=print)
+    cases = build_cases(corpus, profile, args.backend)
+    if args.cases:
+        prefixes = tuple(args.cases.split(','))
+        cases = [case for case in cases if case['name'].startswith(prefixes)]
+
+    results = {
+        'version': RESULT_VERSION,
+        'profile': args.profile,
+        'corpus': corpus.key,
+        'repeat': args.repeat,
+        'environment': environment(),
+        'cases': {},
+    }
+    for index, case in enumerate(cases, 1):
+        print(f'[{index}/{len(cases)}] {case["name"]}', file=sys.stderr)
+        results['cases'][case['name']] = run_isolated(case, args.repeat, args.warmup)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n基线已保存: {baseline_path}')
+    if baseline is not None:
+        if baseline.get('corpus') != results['corpus']:
+            print('\n注意: 基线使用的测试数据与本次不同，比较结果可能没有意义')
+        if baseline.get('environment') != results['environment']:
+            print('注意: 基线的运行环境与本次不同')
+        rows, regressions = compare(baseline, results, args.threshold)
+        print_comparison(rows, args.threshold)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""
+PDF工具集的命令行入口（不依赖 PyQt6）
+
+用法:
+    python cli.py render 文档.pdf "扫描件/*.pdf" -o 输出目录 --dpi 200 --workers 8
+    python cli.py render 扫描件目录 --recursive -o 输出目录  # 所有文档的页面共用一个进程池
+    python cli.py render 文档.pdf --recolor --pdf -o 输出目录
+    python cli.py render 文档.pdf --recolor --workers 4  # 1个进程渲染、4个进程做颜色处理
+    python cli.py recolor 图片目录 -o 输出目录 --workers 8
+    python cli.py invert 图片目录 a.png -o 输出目录
+    python cli.py invert 图片目录 --recursive --workers 8
+    python cli.py merge 图片目录 -o 合并.pdf
+    python cli.py merge 扫描件目录 -o 合并.pdf --skip-blank  # 跳过空白页
+    python cli.py render 文档.pdf --json  # 以 JSON 输出耗时统计
+    python cli.py --metrics 指标.prom --events render 文档.pdf  # 分阶段指标与事件流
+    python cli.py render 文档.pdf --backend pdf2image  # 指定光栅化后端
+    python cli.py --memory-budget 6G render 扫描件目录 --dpi 600  # 按内存预算自动降低并行度
+    python cli.py recolor 图片目录 --palette --compress-level 1  # 调色板PNG、快速压缩
+    python cli.py render 文档.pdf --format webp --quality 80
+    python cli.py render 文档.pdf --color-mode gray --recolor --pdf  # 黑白文字文档
+    python cli.py render 文档.pdf --pages 1-5,20,40-  # 只渲染部分页面
+    python cli.py render 文档.pdf --thumbnail 256  # 长边256像素的缩略图
+    python cli.py info 文档.pdf  # 页数、页面尺寸和文档信息，不渲染
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import memory_budget
+import metrics
+from color_convert import process_directory_batch, recolor_file
+from file_scanner import IMAGE_EXTENSIONS, list_files
+from image_invert import invert_directory_batch, invert_file
+from image_output import FORMATS, OutputFormat, output_path_for
+from pdf_to_image import (DEFAULT_THUMBNAIL_SIZE, collect_pdf_documents, parse_page_ranges, probe_pdf, render_pdf,
+                          render_pdf_batch, render_thumbnails)
+from page_buffer import process_pdf_shared
+from pdf_writer import merge_images_to_pdf
+from pipeline import process_pdf
+from rasterizer import BACKENDS, COLOR_MODES
+
+
+def expand_inputs(patterns, directory_extensions=None):
+    """
+    展开输入参数中的通配符，保持参数顺序并去重
+
+    参数:
+        patterns: 文件、目录或通配符列表
+        directory_extensions: 不为None时，把目录展开为其中带这些扩展名的文件
+
+    返回:
+        路径列表
+    """
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise FileNotFoundError(f'没有匹配的文件: {pattern}')
+        for path in matches:
+            if directory_extensions is not None and os.path.isdir(path):
+                expanded = list_files(path, directory_extensions)
+            else:
+                expanded = [path]
+            for item in expanded:
+                if item not in seen:
+                    seen.add(item)
+                    paths.append(item)
+    return paths
+
+
+def parse_color(text):
+    """把 '255,223,63' 解析为 (255, 223, 63)"""
+    parts = [int(part) for part in text.split(',')]
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError(f'颜色格式应为 R,G,B: {text}')
+    return tuple(parts)
+
+
+def parse_color_pair(text):
+    """把 '255,255,255=255,223,63' 解析为 ((255, 255, 255), (255, 223, 63))"""
+    if '=' not in text:
+        raise argparse.ArgumentTypeError(f'颜色映射格式应为 R,G,B=R,G,B: {text}')
+    source, target = text.split('=', 1)
+    return parse_color(source), parse_color(target)
+
+
+def parse_pages(text):
+    """检查页码范围格式（如 1-5,20,40-），原样返回字符串，渲染时再按文档页数展开"""
+    try:
+        parse_page_ranges(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def parse_memory_size(text):
+    """检查内存大小格式（如 6G、512M），返回字节数"""
+    try:
+        return memory_budget.parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _render_item(pdf_path, args):
+    if args.thumbnail:
+        page_count, output_path = render_thumbnails(pdf_path, args.output, args.thumbnail, args.pages,
+                                                    backend=args.backend, output_format=args.output_format,
+                                                    color_mode=args.color_mode)
+    elif (args.recolor or args.invert) and not args.pdf and (args.workers or os.cpu_count() or 1) > 1:
+        # 输出为图片时一个进程渲染、多个进程做颜色处理，页面经共享内存传递
+        page_count, output_path = process_pdf_shared(pdf_path, args.output, args.dpi, args.recolor, args.invert,
+                                                     args.color_map, args.tolerance, args.mode, args.workers,
+                                                     backend=args.backend, output_format=args.output_format,
+                                                     color_mode=args.color_mode, pages=args.pages)
+    elif args.recolor or args.invert or args.pdf:
+        page_count, output_path = process_pdf(pdf_path, args.output, args.dpi, args.recolor, args.invert,
+                                              args.pdf, args.color_map, args.tolerance, args.mode,
+                                              backend=args.backend, output_format=args.output_format,
+                                              color_mode=args.color_mode, pages=args.pages,
+                                              skip_blank=args.skip_blank)
+    else:
+        page_count, output_path = render_pdf(pdf_path, args.output, args.dpi, workers=args.workers,
+                                             incremental=args.incremental, backend=args.backend,
+                                             output_format=args.output_format, color_mode=args.color_mode,
+                                             pages=args.pages)
+    return {'output': output_path, 'pages': page_count}
+
+
+def _info_item(pdf_path, args):
+    return {'output': None, 'info': probe_pdf(pdf_path, backend=args.backend)}
+
+
+def _recolor_item(path, args):
+    if os.path.isdir(path):
+        result = process_directory_batch(path, args.output, args.workers, args.color_map,
+                                         args.tolerance, args.mode, args.skip_existing,
+                                         incremental=args.incremental, output_format=args.output_format)
+        return {'output': args.output or os.path.join(path, 'color_converted'), **result.to_dict()}
+    output_dir = args.output or os.path.dirname(path)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = output_path_for(os.path.join(output_dir, os.path.basename(path)), args.output_format)
+    recolor_file(path, output_path, args.color_map, args.tolerance, args.mode, args.output_format)
+    return {'output': output_path, 'processed': 1}
+
+
+def _invert_item(path, args):
+    if os.path.isdir(path):
+        output_dir = args.output or os.path.join(path, 'inverted')
+        result = invert_directory_batch(path, output_dir, args.workers, args.recursive, 'inverted_',
+                                        incremental=args.incremental, output_format=args.output_format)
+        return {'output': output_dir, **result.to_dict()}
+    output_dir = args.output or os.path.dirname(path)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = output_path_for(os.path.join(output_dir, f'inverted_{os.path.basename(path)}'),
+                                  args.output_format)
+    invert_file(path, output_path, args.output_format)
+    return {'output': output_path, 'processed': 1}
+
+
+_ITEM_HANDLERS = {
+    'render': _render_item,
+    'recolor': _recolor_item,
+    'invert': _invert_item,
+    'info': _info_item,
+}
+
+
+def run_item(command, path, args):
+    """
+    处理单个输入并计时，出错时记录错误而不中断其他输入
+
+    返回:
+        可序列化为 JSON 的字典
+    """
+    start = time.perf_counter()
+    try:
+        record = _ITEM_HANDLERS[command](path, args)
+        record['status'] = 'ok'
+    except Exception as e:
+        record = {'status': 'failed', 'error': str(e)}
+    record['input'] = path
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def _render_batch(documents, args):
+    """多个文档直接渲染为图片时，所有页面在一个进程池中调度，--workers 是整批的进程数"""
+    result = render_pdf_batch(documents, args.dpi, args.workers, backend=args.backend,
+                              output_format=args.output_format, color_mode=args.color_mode, pages=args.pages)
+    records = []
+    for file_result in result.files:
+        record = {'status': 'ok' if file_result.status == 'processed' else 'failed',
+                  'input': file_result.input_path, 'output': file_result.output_path,
+                  'seconds': file_result.seconds, 'pages': result.page_counts.get(file_result.input_path, 0)}
+        if file_result.error:
+            record['error'] = file_result.error
+        records.append(record)
+    # 完成顺序与输入顺序不同，按输入顺序输出
+    order = {pdf_path: index for index, (pdf_path, _) in enumerate(documents)}
+    records.sort(key=lambda record: order[record['input']])
+    return records
+
+
+def run_command(args):
+    """执行子命令，返回每个输入的结果记录列表"""
+    if args.command == 'merge':
+        image_paths = expand_inputs(args.inputs, IMAGE_EXTENSIONS)
+        start = time.perf_counter()
+        try:
+            record = {'status': 'ok',
+                      'pages': merge_images_to_pdf(image_paths, args.output, skip_blank=args.skip_blank)}
+        except Exception as e:
+            record = {'status': 'failed', 'error': str(e)}
+        record.update(input=args.inputs, output=args.output, seconds=time.perf_counter() - start)
+        return [record]
+
+    if args.command == 'render':
+        documents = collect_pdf_documents(expand_inputs(args.inputs), args.output, args.recursive)
+        if len(documents) > 1 and not (args.thumbnail or args.recolor or args.invert or args.pdf
+                                       or args.incremental):
+            return _render_batch(documents, args)
+        inputs = [pdf_path for pdf_path, _ in documents]
+    elif args.command == 'info':
+        inputs = expand_inputs(args.inputs, ('.pdf',))
+    else:
+        inputs = expand_inputs(args.inputs)
+
+    if getattr(args, 'jobs', 1) > 1 and len(inputs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # 多个输入同时处理，每个输入内部仍可使用多进程；内存预算由同时处理的输入平分
+        budget = memory_budget.get_budget()
+        if budget is not None:
+            memory_budget.set_budget(budget // args.jobs)
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [metrics.submit(executor, run_item, args.command, path, args) for path in inputs]
+            return [metrics.merge_result(future.result()) for future in futures]
+    return [run_item(args.command, path, args) for path in inputs]
+
+
+def build_output_format(args):
+    """根据命令行选项创建 OutputFormat，没有指定任何输出选项时返回None（保持默认行为）"""
+    if not hasattr(args, 'format'):
+        return None
+    if not (args.format or args.quality is not None or args.compress_level is not None
+            or args.optimize or args.palette or args.bilevel):
+        return None
+    return OutputFormat(args.format or 'png', args.quality, args.compress_level, args.optimize,
+                        args.palette, args.bilevel)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='PDF工具集命令行')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出结果与耗时')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='收集分阶段性能指标并写入文件，扩展名为 .prom 时为 Prometheus 格式，否则为 JSON')
+    parser.add_argument('--events', action='store_true', help='把指标事件流以 JSON 行输出到标准错误')
+    parser.add_argument('--memory-budget', type=parse_memory_size, metavar='SIZE',
+                        help='内存预算，例如 6G，超出时自动缩小渲染窗口（或暂存到临时文件）并减少进程数；'
+                             '默认读取环境变量 PDF_TOOLS_MEMORY_BUDGET')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(subparser, output_help):
+        subparser.add_argument('inputs', nargs='+', help='输入文件、目录或通配符')
+        subparser.add_argument('-o', '--output', help=output_help)
+        subparser.add_argument('--jobs', type=int, default=1, help='同时处理的输入数，默认1')
+        subparser.add_argument('--workers', type=int, default=None,
+                               help='每个输入内部使用的进程数，默认使用全部CPU核心')
+        subparser.add_argument('--incremental', action='store_true',
+                               help='根据输出目录中的清单跳过未变化的页面/文件，并从中断处继续')
+
+    def add_output_options(subparser):
+        subparser.add_argument('--format', choices=list(FORMATS), default=None,
+                               help='图片输出格式，默认PNG（颜色处理时与输入相同）')
+        subparser.add_argument('--quality', type=int, default=None, help='WebP/JPEG 质量 1-100')
+        subparser.add_argument('--compress-level', type=int, default=None, choices=range(10),
+                               metavar='0-9', help='PNG 压缩级别，越小越快，默认6')
+        subparser.add_argument('--optimize', action='store_true', help='PNG/JPEG 额外优化编码（更慢、更小）')
+        subparser.add_argument('--palette', action='store_true', help='颜色不超过256种时保存为调色板图片')
+        subparser.add_argument('--bilevel', action='store_true', help='保存为1位黑白图片（有损）')
+
+    def add_color_options(subparser):
+        subparser.add_argument('--map', dest='color_pairs', action='append', type=parse_color_pair,
+                               metavar='R,G,B=R,G,B', help='颜色映射，可重复；默认白→黄、黑→蓝')
+        subparser.add_argument('--tolerance', type=int, default=0, help='颜色匹配容差，默认0')
+        subparser.add_argument('--gradient', dest='mode', action='store_const', const='gradient',
+                               default='exact', help='在两个端点颜色之间做渐变映射')
+
+    render = subparsers.add_parser('render', help='PDF转图片')
+    add_common(render, '输出基础目录，默认使用PDF所在目录')
+    render.add_argument('--dpi', type=int, default=200, help='图片分辨率，默认200')
+    render.add_argument('--recursive', action='store_true', help='递归查找输入目录子目录中的PDF')
+    render.add_argument('--recolor', action='store_true', help='渲染后直接做颜色转换')
+    render.add_argument('--invert', action='store_true', help='渲染后直接反转颜色')
+    render.add_argument('--pdf', action='store_true', help='处理结果合并为 <文件名>_processed.pdf')
+    render.add_argument('--skip-blank', action='store_true', help='与 --pdf 一起使用，合并时跳过空白页')
+    render.add_argument('--backend', choices=['auto', *BACKENDS], default=None,
+                        help='光栅化后端，默认读取环境变量 PDF_TOOLS_RASTERIZER 或自动检测')
+    render.add_argument('--color-mode', choices=COLOR_MODES, default='rgb',
+                        help='渲染颜色模式：rgb（彩色）、gray（灰度）、bilevel（黑白），默认rgb')
+    render.add_argument('--pages', type=parse_pages, default=None,
+                        help='只渲染这些页，例如 1-5,20,40-（40- 表示到最后一页），默认全部')
+    render.add_argument('--thumbnail', type=int, nargs='?', const=DEFAULT_THUMBNAIL_SIZE, default=None,
+                        metavar='SIZE', help=f'只生成长边不超过 SIZE 像素的缩略图（默认{DEFAULT_THUMBNAIL_SIZE}），'
+                                             '保存到 <文件名>_thumbnails 目录')
+    add_color_options(render)
+    add_output_options(render)
+
+    recolor = subparsers.add_parser('recolor', help='颜色转换')
+    add_common(recolor, '输出目录，默认在输入目录下创建 color_converted')
+    recolor.add_argument('--skip-existing', action='store_true', help='跳过输出已是最新的文件')
+    add_color_options(recolor)
+    add_output_options(recolor)
+
+    invert = subparsers.add_parser('invert', help='图片反转')
+    add_common(invert, '输出目录，默认在输入目录下创建 inverted')
+    invert.add_argument('--recursive', action='store_true', help='同时处理子目录，输出保持相同的目录结构')
+    add_output_options(invert)
+
+    info = subparsers.add_parser('info', help='查看PDF页数、页面尺寸和文档信息（不渲染）')
+    info.add_argument('inputs', nargs='+', help='PDF文件、目录或通配符')
+    info.add_argument('--backend', choices=['auto', *BACKENDS], default=None,
+                      help='读取文档使用的后端，默认自动检测')
+
+    merge = subparsers.add_parser('merge', help='图片合并PDF')
+    merge.add_argument('inputs', nargs='+', help='图片文件、目录或通配符，按给出的顺序合并')
+    merge.add_argument('-o', '--output', required=True, help='输出PDF文件')
+    merge.add_argument('--skip-blank', action='store_true', help='跳过空白页（空白分隔页、扫描的空白背面）')
+    return parser
+
+
+def print_event(event):
+    """把指标事件以 JSON 行写到标准错误"""
+    print(json.dumps(event, ensure_ascii=False), file=sys.stderr)
+
+
+def print_info(info):
+    """以文字形式输出 probe_pdf 的结果，尺寸相同的连续页面合并为一行"""
+    print(f"{info['path']}: {info['page_count']} 页，{info['file_size'] / 1024:.1f} KB")
+    for key, value in info['metadata'].items():
+        print(f'  {key}: {value}')
+    groups = []
+    for page, size in enumerate(info['page_sizes'], 1):
+        if groups and groups[-1][2] == size:
+            groups[-1][1] = page
+        else:
+            groups.append([page, page, size])
+    for first, last, size in groups:
+        pages = f'第 {first} 页' if first == last else f'第 {first}-{last} 页'
+        size_text = f'{size[0]:.0f} x {size[1]:.0f} 点' if size else '尺寸未知'
+        print(f'  {pages}: {size_text}')
+
+
+def _run_or_exit(parser, args):
+    try:
+        return run_command(args)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'thumbnail', None) and (args.recolor or args.invert or args.pdf):
+        parser.error('--thumbnail 不能与 --recolor、--invert、--pdf 同时使用')
+    if args.command == 'render' and args.skip_blank and not args.pdf:
+        parser.error('--skip-blank 需要与 --pdf 一起使用')
+    if args.command == 'render' and args.incremental and (args.thumbnail or args.recolor or args.invert
+                                                          or args.pdf):
+        parser.error('--incremental 只用于直接渲染，不能与 --thumbnail、--recolor、--invert、--pdf 同时使用')
+    if hasattr(args, 'color_pairs'):
+        args.color_map = dict(args.color_pairs) if args.color_pairs else None
+    args.output_format = build_output_format(args)
+
+    if args.memory_budget is not None:
+        memory_budget.set_budget(args.memory_budget)
+
+    start = time.perf_counter()
+    with memory_budget.track_peak_rss() as memory:
+        if args.metrics or args.events:
+            listener = print_event if args.events else None
+            with metrics.collect(listener) as collected:
+                records = _run_or_exit(parser, args)
+            if args.metrics:
+                collected.dump(args.metrics)
+        else:
+            records = _run_or_exit(parser, args)
+    elapsed = time.perf_counter() - start
+    failed = [record for record in records if record['status'] != 'ok' or record.get('failed')]
+    pages = sum(record.get('pages', 0) for record in records) if args.command == 'render' else 0
+
+    if args.json:
+        summary = {'command': args.command, 'elapsed': elapsed, 'results': records, **memory.to_dict()}
+        if pages:
+            summary.update(pages=pages, pages_per_sec=pages / elapsed)
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for record in records:
+            if record['status'] == 'ok' and 'info' in record:
+                print_info(record['info'])
+            elif record['status'] == 'ok':
+                print(f"完成: {record['input']} -> {record['output']} ({record['seconds']:.2f} 秒)")
+            else:
+                print(f"失败: {record['input']}: {record['error']}")
+        print(f'全部完成！共 {len(records)} 项，失败 {len(failed)} 项，耗时 {elapsed:.2f} 秒')
+        if pages:
+            print(f'共 {pages} 页，平均 {pages / elapsed:.1f} 页/秒')
+        print(memory.describe())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
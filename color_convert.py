@@ -1,53 +1,93 @@
 import os
-from PIL import Image
-import numpy as np
+import sys
+import memory_budget
+import metrics
+from color_map import DEFAULT_COLOR_MAP, remap_image
+from batch_executor import collect_tasks, run_batch
+from file_scanner import IMAGE_EXTENSIONS
+from image_output import get_output_format, output_path_for, save_image
+from manifest import Manifest, batch_hooks
 
-def convert_colors(image_path, output_path=None):
+def recolor_file(image_path, output_path, color_map=None, tolerance=0, mode='exact', output_format=None):
+    """
+    修改单个图片文件的颜色，出错时直接抛出异常（供批量处理使用）
+    
+    参数:
+        image_path: 输入图片路径
+        output_path: 输出图片路径
+        color_map: {源颜色: 目标颜色} 字典，为None时使用默认配色
+        tolerance: 每个通道允许的最大差值，默认0（精确匹配）
+        mode: 'exact' 按颜色替换；'gradient' 在两个端点颜色之间做渐变映射
+        output_format: 输出格式名称或 image_output.OutputFormat，为None时按扩展名保存
+    """
+    from PIL import Image
+    
+    metrics.add_file_size('bytes_in', image_path)
+    with Image.open(image_path) as img:
+        with metrics.stage('decode'):
+            img.load()
+        with metrics.stage('transform'):
+            # 一次查表完成所有颜色替换，结果直接写回解码出的图片，大图分条处理
+            new_img = remap_image(img, color_map, tolerance, mode, in_place=True)
+    save_image(new_img, output_path, output_format)
+    metrics.add_file_size('bytes_out', output_path)
+
+def convert_colors(image_path, output_path=None, color_map=None, tolerance=0, mode='exact'):
     """
     修改图片颜色
-    将白色(255,255,255)转换为(255,223,63)
+    默认将白色(255,255,255)转换为(255,223,63)
     将黑色(0,0,0)转换为(31,77,120)
     
     参数:
         image_path: 输入图片路径
         output_path: 输出图片路径，如果为None则覆盖原图片
+        color_map: {源颜色: 目标颜色} 字典，为None时使用默认配色
+        tolerance: 每个通道允许的最大差值，默认0（精确匹配）
+        mode: 'exact' 按颜色替换；'gradient' 在两个端点颜色之间做渐变映射
     """
     # 如果没有指定输出路径，则覆盖原图片
     if output_path is None:
         output_path = image_path
         
     try:
-        # 打开图片
-        img = Image.open(image_path)
-        # 转换为RGB模式
-        img = img.convert('RGB')
-        # 转换为numpy数组
-        img_array = np.array(img)
-        
-        # 创建白色和黑色的掩码
-        white_mask = (img_array == [255, 255, 255]).all(axis=2)
-        black_mask = (img_array == [0, 0, 0]).all(axis=2)
-        
-        # 替换颜色
-        img_array[white_mask] = [255, 223, 63]  # 将白色替换为指定颜色
-        img_array[black_mask] = [31, 77, 120]   # 将黑色替换为指定颜色
-        
-        # 转换回PIL图片
-        new_img = Image.fromarray(img_array)
-        # 保存图片
-        new_img.save(output_path)
+        recolor_file(image_path, output_path, color_map, tolerance, mode)
         print(f'颜色转换完成，已保存到: {output_path}')
         
     except Exception as e:
         print(f'处理图片时出现错误: {str(e)}')
 
-def process_directory(input_dir, output_dir=None):
+def collect_image_tasks(input_dir, output_dir):
     """
-    处理整个目录中的图片
+    递归收集目录中的图片文件，并在输出目录中创建相同的目录结构
+    
+    返回:
+        [(输入路径, 输出路径), ...]
+    """
+    return collect_tasks(input_dir, output_dir, IMAGE_EXTENSIONS)
+
+def process_directory_batch(input_dir, output_dir=None, workers=None, color_map=None, tolerance=0,
+                            mode='exact', skip_existing=False, progress=None, incremental=False,
+                            output_format=None):
+    """
+    使用进程池批量处理整个目录中的图片
+    
+    输出目录保持与输入目录相同的结构。单个文件出错不会中断批次，
+    错误信息和每个文件的耗时都记录在返回结果中。
     
     参数:
         input_dir: 输入目录路径
         output_dir: 输出目录路径，如果为None则在原目录创建color_converted子目录
+        workers: 进程数，为None时使用全部CPU核心
+        color_map: {源颜色: 目标颜色} 字典，为None时使用默认配色
+        tolerance: 每个通道允许的最大差值，默认0（精确匹配）
+        mode: 'exact' 按颜色替换；'gradient' 在两个端点颜色之间做渐变映射
+        skip_existing: 为True时跳过输出已是最新的文件
+        progress: 进度回调，签名为 progress(已完成数, 总数, 输入路径)
+        incremental: 为True时根据输出目录中的内容哈希清单跳过输入和参数都未变化的文件
+        output_format: 输出格式名称或 image_output.OutputFormat，为None时与输入格式相同
+    
+    返回:
+        BatchResult，包含处理/失败/跳过数量与每个文件的耗时
     """
     # 如果没有指定输出目录，则在输入目录下创建color_converted子目录
     if output_dir is None:
@@ -56,40 +96,48 @@ def process_directory(input_dir, output_dir=None):
     # 确保输出目录存在
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-        print(f'已创建输出目录: {output_dir}')
+        print(f'已创建输出目录: {output_dir}', file=sys.stderr)
     
-    # 获取输出目录的绝对路径，用于后续过滤
-    output_dir_abs = os.path.abspath(output_dir)
+    tasks = [(input_path, output_path_for(output_path, output_format))
+             for input_path, output_path in collect_image_tasks(input_dir, output_dir)]
+    kwargs = {'color_map': color_map, 'tolerance': tolerance, 'mode': mode, 'output_format': output_format}
+    if not incremental:
+        return run_batch(tasks, recolor_file, workers, kwargs, skip_existing, progress)
     
-    # 递归处理目录中的所有PNG文件
-    processed_count = 0
-    for root, dirs, files in os.walk(input_dir):
-        # 过滤掉输出目录
-        if os.path.abspath(root).startswith(output_dir_abs):
-            continue
-            
-        # 计算相对路径，用于在输出目录中创建相同的目录结构
-        rel_path = os.path.relpath(root, input_dir)
-        
-        # 创建对应的输出子目录
-        if rel_path != '.':
-            current_output_dir = os.path.join(output_dir, rel_path)
-            if not os.path.exists(current_output_dir):
-                os.makedirs(current_output_dir)
-        else:
-            current_output_dir = output_dir
-        
-        # 处理当前目录中的所有PNG文件
-        for file in files:
-            if file.lower().endswith('.png'):
-                input_path = os.path.join(root, file)
-                output_path = os.path.join(current_output_dir, file)
-                convert_colors(input_path, output_path)
-                processed_count += 1
-                print(f'已处理: {processed_count} 个文件')
+    manifest = Manifest(output_dir)
+    params = {'operation': 'recolor', 'color_map': sorted((color_map or DEFAULT_COLOR_MAP).items()),
+              'tolerance': tolerance, 'mode': mode}
+    if output_format is not None:
+        params['format'] = get_output_format(output_format).params()
+    skip_current, on_result = batch_hooks(manifest, input_dir, params)
+    try:
+        return run_batch(tasks, recolor_file, workers, kwargs, skip_current, progress, on_result)
+    finally:
+        manifest.save()
+
+def process_directory(input_dir, output_dir=None, workers=1, incremental=False):
+    """
+    处理整个目录中的图片
+    
+    参数:
+        input_dir: 输入目录路径
+        output_dir: 输出目录路径，如果为None则在原目录创建color_converted子目录
+        workers: 进程数，默认1；为None时使用全部CPU核心
+        incremental: 为True时跳过输入和参数都未变化的文件
+    
+    返回:
+        成功处理的文件数
+    """
+    with memory_budget.track_peak_rss() as memory:
+        result = process_directory_batch(input_dir, output_dir, workers, incremental=incremental)
+    
+    for input_path, error in result.errors:
+        print(f'处理图片时出现错误: {input_path}: {error}')
     
-    print(f'处理完成！共处理 {processed_count} 个文件')
-    return processed_count
+    print(f'处理完成！共处理 {result.processed} 个文件，失败 {result.failed} 个，'
+          f'跳过 {result.skipped} 个，耗时 {result.elapsed:.2f} 秒')
+    print(memory.describe())
+    return result.processed
 
 if __name__ == '__main__':
     # 示例使用
@@ -0,0 +1,293 @@
+import functools
+
+import metrics
+from page_class import is_gray, two_color_index, two_colors
+
+# numpy 与 PIL 在函数内按需导入，只导入本模块时不加载它们
+
+# 默认配色：白色→黄色，黑色→蓝色
+DEFAULT_COLOR_MAP = {
+    (255, 255, 255): (255, 223, 63),
+    (0, 0, 0): (31, 77, 120),
+}
+
+# 每个 uint8 位掩码最多容纳8种源颜色，超过时按8个一组分组查表
+GROUP_SIZE = 8
+
+# 匹配结果以调色板索引表示，0 表示未命中，因此最多支持255种源颜色
+MAX_COLORS = 255
+
+# 精确模式分条处理时每个条带的最大像素数，临时内存约为每像素十几个字节
+STRIP_PIXELS = 1 << 22
+
+
+@functools.lru_cache(maxsize=None)
+def _lowest_bit_index():
+    """位掩码 → 最低位的1所在位置+1，用于在多个源颜色同时命中时选出最靠前的一个"""
+    import numpy as np
+
+    return np.array([(v & -v).bit_length() for v in range(256)], dtype=np.uint8)
+
+
+def _normalize_color_map(color_map):
+    """把颜色映射整理成 (源颜色数组, 目标颜色数组)，并检查取值范围"""
+    import numpy as np
+
+    if color_map is None:
+        color_map = DEFAULT_COLOR_MAP
+    if not color_map:
+        raise ValueError('颜色映射不能为空')
+    if len(color_map) > MAX_COLORS:
+        raise ValueError(f'最多支持 {MAX_COLORS} 种源颜色，当前为 {len(color_map)} 种')
+
+    sources = np.array(list(color_map.keys()), dtype=np.int16)
+    targets = np.array(list(color_map.values()), dtype=np.int16)
+    if sources.shape[1:] != (3,) or targets.shape[1:] != (3,):
+        raise ValueError('颜色必须是 (R, G, B) 三元组')
+    if sources.min() < 0 or sources.max() > 255 or targets.min() < 0 or targets.max() > 255:
+        raise ValueError('颜色分量必须在 0-255 之间')
+    return sources, targets.astype(np.uint8)
+
+
+def build_match_luts(sources, tolerance=0):
+    """
+    为每组源颜色构建 RGB 三个通道各256项的位掩码查找表
+
+    表中第 k 位为1，表示该通道取值与组内第 k 个源颜色的差值不超过 tolerance。
+    三个通道的查表结果按位与之后，非零位即为该像素命中的源颜色。
+
+    参数:
+        sources: 源颜色数组，形状为 (N, 3)
+        tolerance: 每个通道允许的最大差值，0 表示精确匹配
+
+    返回:
+        每组一张可直接传给 Image.point 的768项列表
+    """
+    import numpy as np
+
+    values = np.arange(256, dtype=np.int16)
+    luts = []
+    for group_start in range(0, len(sources), GROUP_SIZE):
+        lut = np.zeros((3, 256), dtype=np.uint8)
+        for k, color in enumerate(sources[group_start:group_start + GROUP_SIZE]):
+            for channel in range(3):
+                hit = np.abs(values - color[channel]) <= tolerance
+                lut[channel][hit] |= np.uint8(1 << k)
+        luts.append(lut.ravel().tolist())
+    return luts
+
+
+def match_index(img, luts):
+    """
+    计算每个像素命中的源颜色编号
+
+    参数:
+        img: RGB 模式的 PIL 图片
+        luts: build_match_luts 返回的查找表
+
+    返回:
+        uint8 数组，0 表示未命中，k 表示命中第 k 个源颜色（从1开始）
+    """
+    import numpy as np
+
+    lowest_bit_index = _lowest_bit_index()
+    index = None
+    for group, lut in enumerate(luts):
+        # point 在 C 层一次完成三个通道的查表，按位与得到命中掩码
+        red, green, blue = img.point(lut).split()
+        bits = np.asarray(red) & np.asarray(green)
+        bits &= np.asarray(blue)
+        group_index = lowest_bit_index.take(bits)
+        if index is None:
+            index = group_index
+        else:
+            # 前面的组优先，只填补尚未命中的像素
+            fill = (index == 0) & (group_index != 0)
+            index[fill] = group_index[fill] + group * GROUP_SIZE
+    return index
+
+
+def _map_strip(img, luts, targets, in_place=False):
+    """对一幅（或一条）RGB 图片执行颜色映射，in_place 为True时直接修改 img"""
+    from PIL import Image
+
+    index = match_index(img, luts)
+
+    # 索引图直接作为调色板图片，展开后就是每个像素的目标颜色
+    palette_img = Image.frombuffer('P', img.size, index, 'raw', 'P', 0, 1)
+    palette_img.putpalette([0, 0, 0] + targets.ravel().tolist())
+    mask = Image.frombuffer('L', img.size, index, 'raw', 'L', 0, 1).point([0] + [255] * 255)
+    if in_place:
+        img.paste(palette_img.convert('RGB'), None, mask)
+        return img
+    return Image.composite(palette_img.convert('RGB'), img, mask)
+
+
+def map_colors(img, color_map=None, tolerance=0, strip_pixels=STRIP_PIXELS, in_place=False):
+    """
+    按颜色映射替换像素颜色（精确或带容差匹配）
+
+    所有源颜色通过查表一次性匹配，得到每个像素的调色板索引，
+    再以索引图作为蒙版把目标颜色合成回原图，不再为每种颜色生成整幅的布尔掩码。
+    多个源颜色同时命中时，以映射中靠前的为准。
+
+    大图按水平条带逐条处理，查表、索引和蒙版等临时数据只占一个条带的大小，
+    与整幅处理的结果逐像素相同。
+
+    参数:
+        img: RGB 模式的 PIL 图片
+        color_map: {源颜色: 目标颜色} 字典，为None时使用默认配色
+        tolerance: 每个通道允许的最大差值，默认0（精确匹配）
+        strip_pixels: 每个条带的最大像素数，为None或0时整幅一次处理
+        in_place: 为True时把结果直接写回 img，不再分配整幅的输出图片
+
+    返回:
+        替换颜色后的 RGB 图片（in_place 为True时就是 img）
+    """
+    from PIL import Image
+
+    sources, targets = _normalize_color_map(color_map)
+    luts = build_match_luts(sources, tolerance)
+
+    width, height = img.size
+    strip_height = max(1, strip_pixels // max(1, width)) if strip_pixels else height
+    if strip_height >= height:
+        return _map_strip(img, luts, targets, in_place)
+
+    result = img if in_place else Image.new('RGB', img.size)
+    for top in range(0, height, strip_height):
+        box = (0, top, width, min(top + strip_height, height))
+        # crop 得到的条带是独立副本，可以原地修改后再贴回
+        result.paste(_map_strip(img.crop(box), luts, targets, in_place=True), box)
+    return result
+
+
+def build_gradient_luts(color_map=None):
+    """
+    构建渐变模式下每个通道256项的查找表
+
+    颜色映射中的两种源颜色作为两个端点，每个通道在两个端点之间线性插值，
+    端点之外的取值被截断到端点颜色。例如默认配色中，黑→白的灰阶
+    会被平滑地映射为 蓝→黄 的渐变。
+
+    参数:
+        color_map: 恰好包含两个条目的 {源颜色: 目标颜色} 字典，为None时使用默认配色
+
+    返回:
+        形状为 (3, 256) 的 uint8 数组
+    """
+    import numpy as np
+
+    sources, targets = _normalize_color_map(color_map)
+    if len(sources) != 2:
+        raise ValueError('渐变模式的颜色映射必须恰好包含两种颜色')
+
+    # 按亮度排序，保证第一个端点较暗
+    if sources[0].sum() > sources[1].sum():
+        sources = sources[::-1]
+        targets = targets[::-1]
+
+    values = np.arange(256, dtype=np.float64)
+    luts = np.empty((3, 256), dtype=np.uint8)
+    for channel in range(3):
+        low, high = float(sources[0][channel]), float(sources[1][channel])
+        if high > low:
+            t = np.clip((values - low) / (high - low), 0.0, 1.0)
+        else:
+            # 两个端点在该通道上取值相同时，以该值为阈值二分
+            t = (values > low).astype(np.float64)
+        start, end = float(targets[0][channel]), float(targets[1][channel])
+        luts[channel] = np.rint(start + (end - start) * t).astype(np.uint8)
+    return luts
+
+
+def remap_palette(palette, color_map=None, tolerance=0, mode='exact'):
+    """
+    对调色板中的每个颜色执行颜色映射
+
+    参数:
+        palette: [R, G, B, R, G, B, ...] 形式的调色板
+        其余参数与 remap_image 相同
+
+    返回:
+        映射后的调色板，长度不变
+    """
+    from PIL import Image
+
+    colors = Image.frombytes('RGB', (len(palette) // 3, 1), bytes(palette))
+    return list(_remap_rgb(colors, color_map, tolerance, mode).tobytes())
+
+
+def _remap_rgb(img, color_map=None, tolerance=0, mode='exact', in_place=False):
+    """对 RGB 图片执行完整的颜色映射"""
+    if mode == 'gradient':
+        # point 在一次遍历中对每个通道查表
+        luts = build_gradient_luts(color_map)
+        return img.point(luts.ravel().tolist())
+    return map_colors(img, color_map, tolerance, in_place=in_place)
+
+
+def remap_image(img, color_map=None, tolerance=0, mode='exact', in_place=False):
+    """
+    对 PIL 图片执行颜色映射
+
+    灰度、黑白和调色板图片不展开为RGB：灰度值或调色板项最多256种，
+    只需映射一张256色的调色板，结果为调色板图片，逐像素结果与先转RGB再映射相同。
+
+    参数:
+        img: PIL 图片，1/L/P 模式保持紧凑的调色板形式，其他模式会被转换为RGB模式
+        color_map: {源颜色: 目标颜色} 字典，为None时使用默认配色
+        tolerance: 精确模式下每个通道允许的最大差值
+        mode: 'exact' 按颜色替换；'gradient' 在两个端点颜色之间做渐变映射
+        in_place: 为True时精确模式允许把结果直接写回 RGB 输入图片，调用方不再需要原图时使用
+
+    返回:
+        新的 PIL 图片，1/L/P 模式输入返回 P 模式，其余返回 RGB 模式
+    """
+    if mode not in ('exact', 'gradient'):
+        raise ValueError(f'未知的颜色映射模式: {mode}')
+
+    if img.mode in ('1', 'L') or (img.mode == 'P' and img.palette.mode == 'RGB'):
+        if img.mode == 'P':
+            result = img.copy()
+            palette = result.getpalette()
+        else:
+            # L → P 时索引即灰度值，调色板为灰阶
+            result = img.convert('L').convert('P')
+            palette = [value for value in range(256) for _ in range(3)]
+        result.putpalette(remap_palette(palette, color_map, tolerance, mode))
+        return result
+
+    if img.mode != 'RGB':
+        # 转换得到的是新图片，可以原地修改
+        img = img.convert('RGB')
+        in_place = True
+
+    if mode == 'gradient':
+        # 渐变模式本身就是一次查表
+        return _remap_rgb(img, color_map, tolerance, mode)
+
+    # 只有一两种颜色或纯灰度的页面不需要完整的匹配引擎，结果逐像素相同
+    colors = two_colors(img)
+    if colors is not None:
+        metrics.add('recolor_pages_bilevel')
+        return _remap_two_colors(img, colors, color_map, tolerance)
+    if is_gray(img):
+        metrics.add('recolor_pages_gray')
+        # 三个通道相同，按灰度值映射256项的调色板即可
+        return remap_image(img.getchannel(0), color_map, tolerance).convert('RGB')
+    metrics.add('recolor_pages_color')
+    return _remap_rgb(img, color_map, tolerance, mode, in_place)
+
+
+def _remap_two_colors(img, colors, color_map=None, tolerance=0):
+    """只有一到两种颜色的 RGB 图片：只映射这两种颜色，再用两项的调色板展开"""
+    from PIL import Image
+
+    mapped = remap_palette([channel for color in colors for channel in color], color_map, tolerance)
+    if len(colors) == 1:
+        return Image.new('RGB', img.size, tuple(mapped))
+    index = two_color_index(img, colors)
+    # L 模式的 putpalette 直接把图片变为调色板模式
+    index.putpalette(mapped)
+    return index.convert('RGB')
@@ -0,0 +1,205 @@
+"""
+目录扫描：反转、颜色转换、合并和批量渲染共用的文件枚举
+
+- 基于 os.scandir，文件和子目录的类型直接来自目录项，不再为每个文件单独 stat
+- 递归或只扫描顶层目录；同一目录中的文件按文件名自然排序（page_2 在 page_10 之前），
+  文件在前、子目录在后，子目录同样按自然顺序深度优先展开
+- 输出目录（以及其中的全部内容）被排除，每个目录只做一次集合查找
+- 扩展名不认识的文件可以按文件头识别格式（没有扩展名的扫描件等）
+- 每个目录的列表按目录的修改时间缓存：目录中增删、重命名文件都会改变其修改时间，
+  时间不变时直接复用上次的列表，重新扫描很大的目录树时每个目录只需要一次 stat
+
+用法:
+    for rel_path, image_format in scan_directory('图片目录', exclude=['图片目录/inverted']):
+        ...
+    paths = list_files('图片目录', recursive=False)
+"""
+import os
+import re
+import threading
+import time
+
+# 各工具统一支持的图片扩展名
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.tif', '.tiff')
+
+PDF_EXTENSIONS = ('.pdf',)
+
+# 扩展名 → 格式名称
+EXTENSION_FORMATS = {
+    '.png': 'png',
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.bmp': 'bmp',
+    '.gif': 'gif',
+    '.webp': 'webp',
+    '.tif': 'tiff',
+    '.tiff': 'tiff',
+    '.pdf': 'pdf',
+}
+
+# 格式名称 → 按文件头识别出的文件在输出时补上的扩展名
+FORMAT_EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'bmp': '.bmp', 'gif': '.gif', 'webp': '.webp',
+                     'tiff': '.tif', 'pdf': '.pdf'}
+
+# (文件头, 格式名称)
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'BM', 'bmp'),
+    (b'%PDF-', 'pdf'),
+)
+
+# 缓存的目录数上限，超过时清空重来
+MAX_CACHED_DIRECTORIES = 200000
+
+# 每个目录缓存的筛选结果数（不同扩展名组合、不同扫描根目录）上限
+MAX_CACHED_QUERIES = 8
+
+# 修改时间距现在不到该秒数的目录不缓存：同一时间刻度内的后续修改不会改变修改时间
+CACHE_SETTLE_SECONDS = 2.0
+
+_NATURAL_SORT_RE = re.compile('([0-9]+)')
+
+# 绝对路径 → [修改时间(ns), [(文件名, 小写扩展名), ...], [自然排序的子目录名, ...], {文件名: 识别出的格式},
+#             {(扩展名, 是否识别文件头, 相对目录): [(自然排序的相对路径, 格式名称), ...]}]
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def natural_sort_key(s):
+    """将字符串中的数字转换为整数，用于自然排序"""
+    return [int(text) if text.isdigit() else text.lower()
+            for text in _NATURAL_SORT_RE.split(s)]
+
+
+def sniff_format(path):
+    """按文件头识别格式，返回 EXTENSION_FORMATS 中的格式名称，无法识别或读取失败时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(16)
+    except OSError:
+        return None
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    for signature, image_format in SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    return None
+
+
+def clear_cache():
+    """清空目录列表缓存"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _list_directory(path, use_cache=True):
+    """
+    返回目录的缓存项，目录不可读时返回None
+
+    参数:
+        path: 目录的绝对路径
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if use_cache:
+        with _cache_lock:
+            entry = _cache.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry
+
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for item in entries:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        subdirs.append(item.name)
+                    elif item.is_file():
+                        name = item.name
+                        dot = name.rfind('.')
+                        files.append((name, name[dot:].lower() if dot > 0 else ''))
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    subdirs.sort(key=natural_sort_key)
+    entry = [mtime, files, subdirs, {}, {}]
+    if use_cache and time.time() - mtime / 1e9 >= CACHE_SETTLE_SECONDS:
+        with _cache_lock:
+            if len(_cache) >= MAX_CACHED_DIRECTORIES:
+                _cache.clear()
+            _cache[path] = entry
+    return entry
+
+
+def scan_directory(root, extensions=IMAGE_EXTENSIONS, recursive=True, exclude=(), sniff=False, use_cache=True):
+    """
+    扫描目录中指定格式的文件
+
+    参数:
+        root: 目录路径
+        extensions: 小写扩展名元组，例如 ('.png',)
+        recursive: 是否递归子目录
+        exclude: 要跳过的目录（例如输出目录），目录中的全部内容都被跳过；root 本身被排除时结果为空
+        sniff: 为True时扩展名不认识（或没有扩展名）的文件按文件头识别，格式在 extensions 之中的也被包括
+        use_cache: 是否使用按目录修改时间缓存的列表
+
+    返回:
+        [(相对于 root 的路径, 格式名称), ...]，按目录深度优先、文件名自然排序
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    wanted = {EXTENSION_FORMATS[extension] for extension in extensions if extension in EXTENSION_FORMATS}
+    excluded = {os.path.normcase(os.path.abspath(path)) for path in exclude if path}
+    results = []
+    stack = [(os.path.abspath(root), '')]
+    while stack:
+        directory, rel_dir = stack.pop()
+        if excluded and os.path.normcase(directory) in excluded:
+            continue
+        entry = _list_directory(directory, use_cache)
+        if entry is None:
+            continue
+        _, files, subdirs, sniffed, matches = entry
+        key = (extensions, sniff, rel_dir)
+        found = matches.get(key)
+        if found is None:
+            found = []
+            prefix = rel_dir + os.sep if rel_dir else ''
+            for name, extension in files:
+                if extension in extensions:
+                    file_format = EXTENSION_FORMATS.get(extension, extension[1:])
+                elif sniff and extension not in EXTENSION_FORMATS:
+                    if name not in sniffed:
+                        sniffed[name] = sniff_format(os.path.join(directory, name))
+                    file_format = sniffed[name]
+                    if file_format not in wanted:
+                        continue
+                else:
+                    continue
+                found.append((name, file_format))
+            # 只对筛选出的文件做自然排序
+            found.sort(key=lambda item: natural_sort_key(item[0]))
+            found = [(prefix + name, file_format) for name, file_format in found]
+            if len(matches) >= MAX_CACHED_QUERIES:
+                matches.clear()
+            matches[key] = found
+        results.extend(found)
+        if recursive:
+            # 倒序入栈，出栈时按自然顺序
+            for name in reversed(subdirs):
+                stack.append((os.path.join(directory, name), os.path.join(rel_dir, name) if rel_dir else name))
+    return results
+
+
+def list_files(root, extensions=IMAGE_EXTENSIONS, recursive=False, exclude=(), sniff=True):
+    """scan_directory 的简化版本，返回拼接好的文件路径列表（默认只扫描顶层目录）"""
+    prefix = os.path.join(root, '')
+    return [prefix + rel_path for rel_path, _ in scan_directory(root, extensions, recursive, exclude, sniff)]
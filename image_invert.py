@@ -0,0 +1,159 @@
+"""
+图片颜色反转
+
+反转通过 Image.point 查表在 C 层一次完成，透明通道保持不变；
+黑白、灰度和调色板图片按原模式处理，不展开为RGB。
+目录模式基于 batch_executor，支持多进程与递归子目录，输出目录结构与颜色转换相同。
+"""
+import os
+import metrics
+from batch_executor import collect_tasks, run_batch
+from file_scanner import IMAGE_EXTENSIONS
+from image_output import get_output_format, output_path_for, save_image
+from manifest import Manifest, batch_hooks
+
+# 增量清单中记录的处理参数
+INVERT_PARAMS = {'operation': 'invert'}
+
+# 原地反转时每个条带的最大像素数，额外内存只与条带大小有关
+STRIP_PIXELS = 1 << 22
+
+_INVERT_LUT = list(range(255, -1, -1))
+_IDENTITY_LUT = list(range(256))
+
+# 可以直接查表反转的模式 → 各通道的查找表（透明通道不变）
+_MODE_LUTS = {
+    'L': _INVERT_LUT,
+    'LA': _INVERT_LUT + _IDENTITY_LUT,
+    'RGB': _INVERT_LUT * 3,
+    'RGBA': _INVERT_LUT * 3 + _IDENTITY_LUT,
+}
+
+
+def _invert_palette(img):
+    """调色板图片只反转调色板中的颜色，RGBA 调色板的透明度不变"""
+    palette_mode = img.palette.mode
+    result = img.copy()
+    palette = result.getpalette(palette_mode)
+    result.putpalette([value if i % len(palette_mode) == 3 else 255 - value for i, value in enumerate(palette)],
+                      palette_mode)
+    return result
+
+
+def invert_image(img, in_place=False):
+    """
+    反转图片颜色
+
+    黑白、灰度和调色板图片保持原有模式（调色板图片只反转调色板），
+    带透明通道的图片只反转颜色通道，其他模式转换为RGB后反转。
+
+    参数:
+        img: PIL 图片
+        in_place: 为True时把结果直接写回 img（L/LA/RGB/RGBA），按条带处理，不分配整幅的输出图片
+
+    返回:
+        反转后的图片
+    """
+    from PIL import Image, ImageChops
+
+    if img.mode == '1':
+        # ImageOps.invert 不能正确处理 1 位图片，与全白图片做异或
+        return ImageChops.logical_xor(img, Image.new('1', img.size, 1))
+    if img.mode == 'P' and img.palette.mode in ('RGB', 'RGBA'):
+        return _invert_palette(img)
+    if img.mode not in _MODE_LUTS:
+        # 转换得到的是新图片，可以原地修改
+        img = img.convert('RGB')
+        in_place = True
+
+    lut = _MODE_LUTS[img.mode]
+    if not in_place:
+        return img.point(lut)
+    width, height = img.size
+    strip_height = max(1, STRIP_PIXELS // max(1, width))
+    for top in range(0, height, strip_height):
+        box = (0, top, width, min(top + strip_height, height))
+        img.paste(img.crop(box).point(lut), box)
+    return img
+
+
+def invert_file(input_path, output_path, output_format=None):
+    """反转单个图片文件的颜色并按输出格式保存，出错时直接抛出异常"""
+    from PIL import Image
+
+    metrics.add_file_size('bytes_in', input_path)
+    with Image.open(input_path) as img:
+        with metrics.stage('decode'):
+            img.load()
+        with metrics.stage('transform'):
+            inverted_img = invert_image(img, in_place=True)
+    save_image(inverted_img, output_path, output_format)
+    metrics.add_file_size('bytes_out', output_path)
+
+
+def invert_directory_batch(input_dir, output_dir=None, workers=None, recursive=True, name_prefix='',
+                           skip_existing=False, progress=None, incremental=False, output_format=None):
+    """
+    使用进程池批量反转目录中的图片
+
+    输出目录保持与输入目录相同的结构。单个文件出错不会中断批次，
+    错误信息和每个文件的耗时都记录在返回结果中。
+
+    参数:
+        input_dir: 输入目录路径
+        output_dir: 输出目录路径，如果为None则在原目录创建inverted子目录
+        workers: 进程数，为None时使用全部CPU核心
+        recursive: 是否处理子目录中的图片
+        name_prefix: 输出文件名前缀
+        skip_existing: 为True时跳过输出已是最新的文件
+        progress: 进度回调，签名为 progress(已完成数, 总数, 输入路径)
+        incremental: 为True时根据输出目录中的内容哈希清单跳过未变化的图片
+        output_format: 输出格式名称或 image_output.OutputFormat，为None时与输入格式相同
+
+    返回:
+        BatchResult，包含处理/失败/跳过数量与每个文件的耗时
+    """
+    if output_dir is None:
+        output_dir = os.path.join(input_dir, 'inverted')
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    tasks = [(input_path, output_path_for(output_path, output_format))
+             for input_path, output_path in collect_tasks(input_dir, output_dir, IMAGE_EXTENSIONS,
+                                                          recursive, name_prefix)]
+    kwargs = {'output_format': output_format}
+    if not incremental:
+        return run_batch(tasks, invert_file, workers, kwargs, skip_existing, progress)
+
+    manifest = Manifest(output_dir)
+    params = INVERT_PARAMS
+    if output_format is not None:
+        params = {**INVERT_PARAMS, 'format': get_output_format(output_format).params()}
+    skip_current, on_result = batch_hooks(manifest, input_dir, params)
+    try:
+        return run_batch(tasks, invert_file, workers, kwargs, skip_current, progress, on_result)
+    finally:
+        manifest.save()
+
+
+def invert_directory(input_dir, output_dir, progress=None, incremental=False, output_format=None, workers=1):
+    """
+    反转目录（不含子目录）中所有图片的颜色，输出文件名加上 inverted_ 前缀
+
+    参数:
+        input_dir: 图片目录
+        output_dir: 输出目录，不存在时自动创建
+        progress: 进度回调，签名为 progress(已处理数, 总数, 输入路径)
+        incremental: 为True时根据输出目录中的内容哈希清单跳过未变化的图片
+        output_format: 输出格式名称或 image_output.OutputFormat，为None时与输入格式相同
+        workers: 进程数，默认1；为None时使用全部CPU核心
+
+    返回:
+        处理的图片数（含因未变化而跳过的图片）
+    """
+    result = invert_directory_batch(input_dir, output_dir, workers, False, 'inverted_', progress=progress,
+                                    incremental=incremental, output_format=output_format)
+    if result.failed:
+        input_path, error = result.errors[0]
+        raise RuntimeError(f'{input_path}: {error}')
+    return result.processed + result.skipped
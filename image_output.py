@@ -0,0 +1,182 @@
+"""
+输出图片的格式与编码参数
+
+所有工具保存图片时都通过这里的 OutputFormat，统一控制格式（PNG/WebP/JPEG/TIFF）、
+压缩级别和质量，并可在保存前把图片转换为调色板或 1 位黑白，减小文件、加快编码。
+
+用法:
+    fmt = OutputFormat('png', compress_level=1, palette=True)
+    save_image(img, output_path_for('page_1.png', fmt), fmt)
+
+未指定输出格式（None）时保持原有行为：按文件扩展名保存，使用 PIL 的默认参数。
+"""
+import os
+
+import metrics
+
+# 格式名称 → (PIL 格式名, 扩展名)
+FORMATS = {
+    'png': ('PNG', '.png'),
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+    'tiff': ('TIFF', '.tif'),
+}
+
+# 调色板模式最多保留的颜色数，超过时保持原模式，避免有损量化
+PALETTE_MAX_COLORS = 256
+
+
+def to_palette(img, max_colors=PALETTE_MAX_COLORS):
+    """
+    把颜色不多的 RGB 图片无损转换为调色板图片
+
+    调色板只包含图片中实际出现的颜色，PNG 会据此自动选择 1/2/4/8 位深度。
+
+    返回:
+        P 模式图片；颜色数超过 max_colors 或不是 RGB 图片时原样返回
+    """
+    from PIL import Image
+
+    if img.mode != 'RGB':
+        return img
+    colors = img.getcolors(max_colors)
+    if colors is None:
+        return img
+    palette = [channel for _, color in colors for channel in color]
+    # 剩余位置重复最后一个颜色，量化时相同距离取最小索引，不会用到填充项
+    palette_img = Image.new('P', (1, 1))
+    palette_img.putpalette(palette + palette[-3:] * (256 - len(colors)))
+    result = img.quantize(palette=palette_img, dither=Image.Dither.NONE)
+    result.putpalette(palette)
+    return result
+
+
+def to_jpeg_mode(img):
+    """JPEG 不支持调色板、1 位和透明通道：1 位图片转为灰度，其他不支持的模式转为RGB"""
+    if img.mode == '1':
+        return img.convert('L')
+    if img.mode not in ('L', 'RGB', 'CMYK'):
+        return img.convert('RGB')
+    return img
+
+
+def to_bilevel(img):
+    """以 128 为阈值转换为 1 位黑白图片（不抖动）"""
+    from PIL import Image
+
+    if img.mode == '1':
+        return img
+    if img.mode != 'L':
+        img = img.convert('L')
+    return img.convert('1', dither=Image.Dither.NONE)
+
+
+class OutputFormat:
+    """
+    图片输出格式
+
+    参数:
+        name: 'png'、'webp'、'jpeg' 或 'tiff'
+        quality: WebP/JPEG 的质量（1-100），为None时使用 PIL 默认值
+        compress_level: PNG 的 zlib 压缩级别（0-9），越小越快、文件越大；为None时使用默认值6
+        optimize: PNG/JPEG 是否额外优化编码（更慢、文件更小）
+        palette: 颜色数不超过256时转换为调色板图片（无损），适合颜色转换后的结果
+        bilevel: 转换为 1 位黑白图片（有损），适合黑白扫描件
+    """
+
+    def __init__(self, name='png', quality=None, compress_level=None, optimize=False, palette=False,
+                 bilevel=False):
+        name = name.lower()
+        if name == 'jpg':
+            name = 'jpeg'
+        elif name == 'tif':
+            name = 'tiff'
+        if name not in FORMATS:
+            raise ValueError(f'不支持的输出格式: {name}，可选: {", ".join(FORMATS)}')
+        self.name = name
+        self.quality = quality
+        self.compress_level = compress_level
+        self.optimize = optimize
+        self.palette = palette
+        self.bilevel = bilevel
+
+    @property
+    def extension(self):
+        return FORMATS[self.name][1]
+
+    def params(self):
+        """影响输出内容的参数，用于增量清单"""
+        return {'format': self.name, 'quality': self.quality, 'compress_level': self.compress_level,
+                'optimize': self.optimize, 'palette': self.palette, 'bilevel': self.bilevel}
+
+    def prepare(self, img):
+        """按格式要求转换图片模式"""
+        if self.bilevel:
+            img = to_bilevel(img)
+        elif self.palette:
+            img = to_palette(img)
+        if self.name == 'jpeg':
+            img = to_jpeg_mode(img)
+        return img
+
+    def save_options(self, img):
+        """传给 PIL Image.save 的编码参数"""
+        options = {}
+        if self.name == 'png':
+            if self.compress_level is not None:
+                options['compress_level'] = self.compress_level
+            if self.optimize:
+                options['optimize'] = True
+        elif self.name in ('webp', 'jpeg'):
+            if self.quality is not None:
+                options['quality'] = self.quality
+            if self.optimize and self.name == 'jpeg':
+                options['optimize'] = True
+        elif self.name == 'tiff':
+            # 黑白图片用 CCITT G4，其余用 deflate
+            options['compression'] = 'group4' if img.mode == '1' else 'tiff_deflate'
+        return options
+
+    def save(self, img, path):
+        img = self.prepare(img)
+        img.save(path, FORMATS[self.name][0], **self.save_options(img))
+
+
+def get_output_format(output_format):
+    """
+    把参数统一为 OutputFormat 或 None
+
+    参数:
+        output_format: None、格式名称字符串或 OutputFormat
+    """
+    if output_format is None or isinstance(output_format, OutputFormat):
+        return output_format
+    return OutputFormat(output_format)
+
+
+def output_path_for(path, output_format):
+    """按输出格式替换文件扩展名，未指定格式时原样返回"""
+    output_format = get_output_format(output_format)
+    if output_format is None:
+        return path
+    return os.path.splitext(path)[0] + output_format.extension
+
+
+def save_image(img, path, output_format=None):
+    """
+    保存图片
+
+    参数:
+        img: PIL 图片
+        path: 输出路径
+        output_format: None、格式名称或 OutputFormat；为None时按扩展名以默认参数保存，
+                       保存为 JPEG 时调色板等图片先转换为 JPEG 支持的模式
+    """
+    output_format = get_output_format(output_format)
+    with metrics.stage('encode'):
+        if output_format is None:
+            if os.path.splitext(path)[1].lower() in ('.jpg', '.jpeg'):
+                img = to_jpeg_mode(img)
+            img.save(path)
+        else:
+            output_format.save(img, path)
@@ -0,0 +1,120 @@
+"""
+后台任务执行器：把耗时的转换工作放到 QThreadPool 中运行，界面线程只负责接收信号
+
+后台函数需要接受一个 progress 关键字参数，并在每处理完一页或一个文件时调用
+progress(已完成数, 总数或None, 说明)。任务被取消后，下一次调用 progress 时会抛出
+JobCancelled，从而在页面之间中断任务。
+"""
+import threading
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import memory_budget
+
+
+class JobCancelled(BaseException):
+    """
+    任务被取消
+
+    继承自 BaseException，这样后台代码中 except Exception 的容错处理不会把取消吞掉。
+    """
+
+
+class JobSignals(QObject):
+    """任务向界面线程发送的信号"""
+    started = pyqtSignal()
+    progress = pyqtSignal(int, int, str)  # 已完成数, 总数（未知时为0）, 说明
+    finished = pyqtSignal(object)  # 后台函数的返回值
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class Job(QRunnable):
+    """在线程池中执行的单个后台任务"""
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self._cancel_event = threading.Event()
+        # 任务运行期间观测到的进程树峰值内存，任务结束后可用 memory.describe() 报告
+        self.memory = None
+
+    def cancel(self):
+        """请求取消任务，尚未开始的任务将不会执行"""
+        self._cancel_event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _report(self, done, total, message):
+        """传给后台函数的进度回调，同时作为取消检查点"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        self.signals.progress.emit(done, total or 0, str(message))
+
+    def run(self):
+        if self._cancel_event.is_set():
+            self.signals.cancelled.emit()
+            return
+        self.signals.started.emit()
+        self.memory = memory_budget.track_peak_rss()
+        try:
+            with self.memory:
+                result = self.func(*self.args, progress=self._report, **self.kwargs)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+class JobRunner(QObject):
+    """
+    任务队列：提交的任务按顺序排队，由线程池在后台执行
+
+    默认同时只运行一个任务，后台函数本身会用多进程吃满CPU，
+    多个标签页提交的任务依次排队执行。
+    """
+
+    def __init__(self, max_concurrent=1, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_concurrent)
+        # 保持对任务的引用，直到任务结束
+        self._jobs = set()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交一个后台任务
+
+        参数:
+            func: 后台函数，会以 func(*args, progress=回调, **kwargs) 的形式调用
+
+        返回:
+            Job，可通过 job.signals 连接信号，通过 job.cancel() 取消
+        """
+        job = Job(func, *args, **kwargs)
+        self._jobs.add(job)
+        for signal in (job.signals.finished, job.signals.failed, job.signals.cancelled):
+            signal.connect(lambda *_, job=job: self._jobs.discard(job))
+        self.pool.start(job)
+        return job
+
+    def pending_count(self):
+        """尚未结束（排队中或运行中）的任务数"""
+        return len(self._jobs)
+
+    def cancel_all(self):
+        for job in list(self._jobs):
+            job.cancel()
+
+    def wait(self, msecs=-1):
+        """等待所有任务结束"""
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,189 @@
+"""
+增量/断点续传转换使用的内容哈希清单
+
+清单保存在输出目录中，记录每个输入文件的哈希、处理参数以及每个输出文件的哈希。
+再次运行时，输入和参数都未变化且输出文件完好的页面/文件会被跳过，
+中途中断的任务从第一个缺失的输出继续。
+"""
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_NAME = '.pdf_tools_manifest.json'
+MANIFEST_VERSION = 1
+
+# 处理过程中自动保存清单的最短间隔（秒），兼顾崩溃后可续传与写盘开销
+SAVE_INTERVAL = 2.0
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_file(path):
+    """返回文件的哈希、大小和修改时间记录"""
+    stat = os.stat(path)
+    return {'sha256': hash_file(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _stat_matches(path, record):
+    """文件大小和修改时间与记录一致时，认为内容未变化，无需重新计算哈希"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_size == record.get('size') and stat.st_mtime_ns == record.get('mtime_ns')
+
+
+def _normalize(params):
+    """把参数转换为 JSON 往返后的形式（元组变列表、字典键变字符串），便于与已保存的参数比较"""
+    return json.loads(json.dumps(params, sort_keys=True))
+
+
+class Manifest:
+    """
+    输出目录中的处理清单
+
+    用法:
+        manifest = Manifest(output_dir)
+        done = manifest.prepare(key, input_path, params)
+        ...处理 done 之外的输出...
+        manifest.add_output(key, name, output_path)
+        manifest.save()
+    """
+
+    def __init__(self, root):
+        """
+        参数:
+            root: 输出目录，清单文件保存在该目录下，输出名均相对于该目录
+        """
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self.entries = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data.get('entries', {})
+
+    def _describe_input(self, key, input_path):
+        """输入文件的记录；大小和修改时间未变时沿用上次的哈希"""
+        entry = self.entries.get(key)
+        if entry and _stat_matches(input_path, entry['input']):
+            return entry['input']
+        return describe_file(input_path)
+
+    def _output_is_valid(self, name, record):
+        path = os.path.join(self.root, name)
+        if _stat_matches(path, record):
+            return True
+        # 修改时间变化（例如被复制过）时再比较内容
+        try:
+            return hash_file(path) == record['sha256']
+        except OSError:
+            return False
+
+    def prepare(self, key, input_path, params):
+        """
+        开始处理一个输入
+
+        输入哈希或参数与清单不一致时，清空该输入的输出记录。
+
+        参数:
+            key: 输入在清单中的标识
+            input_path: 输入文件路径
+            params: 影响输出结果的参数字典（DPI、配色、格式等）
+
+        返回:
+            已是最新的输出名集合
+        """
+        input_record = self._describe_input(key, input_path)
+        params = _normalize(params)
+        entry = self.entries.get(key)
+        if entry is None or entry['input']['sha256'] != input_record['sha256'] or entry['params'] != params:
+            entry = {'input': input_record, 'params': params, 'outputs': {}}
+            self.entries[key] = entry
+            self._dirty = True
+        elif entry['input'] != input_record:
+            entry['input'] = input_record
+            self._dirty = True
+
+        valid = set()
+        for name, record in list(entry['outputs'].items()):
+            if self._output_is_valid(name, record):
+                valid.add(name)
+            else:
+                del entry['outputs'][name]
+                self._dirty = True
+        return valid
+
+    def add_output(self, key, name, output_path=None, record=None):
+        """
+        记录一个已完成的输出，并按间隔自动保存清单
+
+        参数:
+            key: 输入在清单中的标识（需先调用 prepare）
+            name: 相对于清单目录的输出名
+            output_path: 输出文件路径，为None时由 name 推出
+            record: 已计算好的 describe_file 结果，为None时现场计算
+        """
+        if record is None:
+            record = describe_file(output_path or os.path.join(self.root, name))
+        self.entries[key]['outputs'][name] = record
+        self._dirty = True
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """原子地写入清单文件"""
+        if not self._dirty:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+
+def batch_hooks(manifest, input_dir, params):
+    """
+    为 batch_executor.run_batch 生成增量处理所需的两个回调
+
+    参数:
+        manifest: 输出目录的 Manifest
+        input_dir: 输入目录，清单中以相对路径作为输入标识
+        params: 影响输出结果的参数字典
+
+    返回:
+        (skip_existing, on_result)，可直接传给 run_batch
+    """
+    def keys(input_path, output_path):
+        return os.path.relpath(input_path, input_dir), os.path.relpath(output_path, manifest.root)
+
+    def skip_existing(input_path, output_path):
+        key, name = keys(input_path, output_path)
+        return name in manifest.prepare(key, input_path, params)
+
+    def on_result(file_result):
+        if file_result.status == 'processed':
+            key, name = keys(file_result.input_path, file_result.output_path)
+            manifest.add_output(key, name, file_result.output_path)
+
+    return skip_existing, on_result
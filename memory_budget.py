@@ -0,0 +1,363 @@
+"""
+内存预算：按页面尺寸和 DPI 估算每页占用的内存，自动缩小渲染窗口（或把窗口暂存到临时文件）并降低并行度
+
+预算按以下顺序确定：显式传入的值 → 全局设置（set_budget 或环境变量 PDF_TOOLS_MEMORY_BUDGET）→ 不限制。
+取值为字节数或带单位的字符串，例如 6G、512M。
+
+估算的总占用 = 主进程 + 每个工作进程（进程本身 + 正在处理的一页 × PAGE_WORKING_FACTOR
++ 窗口中其余已渲染、等待处理的页面）。超出预算时依次:
+
+    1. 去掉窗口占用的内存：支持暂存的后端（pdf2image）保留窗口大小，把整个窗口渲染到临时目录，
+       逐页从磁盘读取，内存中同时只有一页，仍然每个窗口只启动一次 poppler；
+       其他后端把窗口缩小到1页
+    2. 减少工作进程数，最少到1个
+
+暂存只针对渲染窗口：每个进程正在处理的一页、进程池中在途的页面不会暂存，
+它们只能通过减少进程数来控制。1个进程、1页仍然超出预算时照常执行，describe 中会注明。
+
+任务结束后用 track_peak_rss 观测到的整个进程树的峰值内存与预算一起报告。
+"""
+import os
+import threading
+from dataclasses import dataclass
+
+# 指定内存预算的环境变量
+MEMORY_BUDGET_ENV = 'PDF_TOOLS_MEMORY_BUDGET'
+
+# 一个进程本身（解释器、PIL、numpy、渲染库）的常驻内存估计
+PROCESS_BASE_BYTES = 64 * 1024 * 1024
+
+# 正在处理的一页在渲染缓冲区、PIL 图片和处理结果之间的峰值倍数
+PAGE_WORKING_FACTOR = 3
+
+# 观测进程树内存的采样间隔（秒）
+RSS_SAMPLE_INTERVAL = 0.2
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text):
+    """把 6G、512M、1.5g、1048576 这样的字符串转换为字节数"""
+    value = str(text).strip().upper().removesuffix('IB').removesuffix('B')
+    unit = value[-1:] if value[-1:] in _SIZE_UNITS else ''
+    try:
+        number = float(value[:len(value) - len(unit)])
+    except ValueError:
+        raise ValueError(f'无法识别的内存大小: {text}') from None
+    if number <= 0:
+        raise ValueError(f'内存大小必须大于0: {text}')
+    return int(number * _SIZE_UNITS[unit])
+
+
+def format_size(size):
+    """把字节数格式化为 MB/GB"""
+    if size >= 1024 ** 3:
+        return f'{size / 1024 ** 3:.1f} GB'
+    return f'{size / 1024 ** 2:.0f} MB'
+
+
+def set_budget(budget):
+    """
+    设置全局内存预算（字节数或 6G 这样的字符串），为None时取消预算
+
+    预算保存在环境变量中，之后启动的子进程（包括以 spawn 方式启动的）使用同一预算。
+    """
+    if budget is None:
+        os.environ.pop(MEMORY_BUDGET_ENV, None)
+    else:
+        os.environ[MEMORY_BUDGET_ENV] = str(parse_size(budget) if isinstance(budget, str) else int(budget))
+
+
+def get_budget(budget=None):
+    """
+    获取内存预算（字节数）
+
+    参数:
+        budget: 显式指定的预算，为None时使用全局设置（set_budget 或环境变量）
+
+    返回:
+        字节数，没有设置预算时返回None
+    """
+    if budget is not None:
+        return parse_size(budget) if isinstance(budget, str) else budget
+    value = os.environ.get(MEMORY_BUDGET_ENV)
+    return parse_size(value) if value else None
+
+
+def pixel_bytes(mode):
+    """PIL 图片每个像素在内存中占用的字节数（RGB 等多通道模式按4字节存放）"""
+    return 1 if mode in ('1', 'L', 'P') else 4
+
+
+def page_bytes(page_size, dpi, color_mode='rgb'):
+    """
+    估算一页渲染后的图片占用的内存
+
+    参数:
+        page_size: (宽, 高)，单位为 PDF 点（1/72 英寸）
+        dpi: 渲染分辨率
+        color_mode: 'rgb'、'gray' 或 'bilevel'（黑白页面由灰度渲染转换而来，按灰度计）
+    """
+    width, height = page_size
+    pixels = round(width * dpi / 72) * round(height * dpi / 72)
+    return pixels * pixel_bytes('RGB' if color_mode == 'rgb' else 'L')
+
+
+def pdf_page_bytes(pdf_paths, dpi, color_mode='rgb', backend=None):
+    """一个或多个PDF中最大一页渲染后占用的内存（只读取文档结构，不渲染）"""
+    from rasterizer import get_backend
+
+    if isinstance(pdf_paths, str):
+        pdf_paths = [pdf_paths]
+    backend = get_backend(backend)
+    largest = 0
+    for pdf_path in pdf_paths:
+        try:
+            info = backend.probe(pdf_path)
+        except Exception:
+            # 打不开的文档在渲染时再报错
+            continue
+        for size in info['page_sizes']:
+            if size is not None:
+                largest = max(largest, page_bytes(size, dpi, color_mode))
+    return largest
+
+
+def image_page_bytes(paths, sample=8):
+    """
+    估算一批图片文件中最大一张解码后占用的内存
+
+    只读取文件头；为了在很大的目录中保持很快，只检查文件最大的 sample 个文件。
+    """
+    from PIL import Image
+
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append((os.path.getsize(path), path))
+        except OSError:
+            continue
+    largest = 0
+    for _, path in sorted(sizes, reverse=True)[:sample]:
+        try:
+            with Image.open(path) as img:
+                largest = max(largest, img.size[0] * img.size[1] * pixel_bytes(img.mode))
+        except Exception:
+            continue
+    return largest
+
+
+@dataclass
+class MemoryPlan:
+    """按内存预算调整后的执行参数"""
+    budget: int  # 字节数，None 表示不限制
+    page_bytes: int  # 估算的最大一页的字节数
+    workers: int
+    window_size: int
+    spill: bool = False  # 为True时渲染窗口暂存到临时文件，逐页读回
+
+    @property
+    def estimated_bytes(self):
+        """按当前参数估算的峰值内存"""
+        return estimate_bytes(self.page_bytes, self.workers, 1 if self.spill else self.window_size)
+
+    def describe(self):
+        """一行说明，例如 预算 6.0 GB，估计每页 96 MB：4 个进程，窗口 2 页"""
+        budget = format_size(self.budget) if self.budget is not None else '不限'
+        window = f'{self.window_size} 页' if self.window_size else '整个文档'
+        text = (f'预算 {budget}，估计每页 {format_size(self.page_bytes)}：'
+                f'{self.workers} 个进程，窗口 {window}')
+        if self.spill:
+            text += '（暂存到临时文件，逐页读回）'
+        if self.budget is not None and self.estimated_bytes > self.budget:
+            text += '，仍可能超出预算'
+        return text
+
+
+def estimate_bytes(page_bytes, workers, window_size=1):
+    """估算 workers 个进程、每个进程窗口中有 window_size 页时的峰值内存"""
+    per_worker = PROCESS_BASE_BYTES + page_bytes * (PAGE_WORKING_FACTOR + max(window_size, 1) - 1)
+    if workers <= 1:
+        return per_worker
+    return PROCESS_BASE_BYTES + workers * per_worker
+
+
+def plan(page_bytes, workers, window_size=1, budget=None, can_spill=False):
+    """
+    在预算内选择工作进程数和窗口大小
+
+    参数:
+        page_bytes: 最大一页的字节数，见 pdf_page_bytes / image_page_bytes
+        workers: 期望的进程数
+        window_size: 期望的窗口大小（每个进程中同时存在的页数），为None或0时视为整个文档
+        budget: 内存预算，为None时使用全局设置
+        can_spill: 后端是否支持把窗口暂存到临时文件（见 spill_backend）
+
+    返回:
+        MemoryPlan；没有设置预算时参数保持不变
+    """
+    budget = get_budget(budget)
+    workers = max(workers or 1, 1)
+    if budget is None or not page_bytes:
+        return MemoryPlan(budget, page_bytes, workers, window_size)
+    # 整个文档作为一个窗口时按文档页数未知处理：只要超出1页的占用就需要处理
+    spill = False
+    if window_size != 1 and estimate_bytes(page_bytes, workers, window_size or 2) > budget:
+        if can_spill:
+            # 窗口整体渲染到磁盘再逐页读回，内存与1页窗口相同，但不增加渲染调用次数
+            spill = True
+        else:
+            window_size = 1
+    while workers > 1 and estimate_bytes(page_bytes, workers, 1 if spill else window_size or 1) > budget:
+        workers -= 1
+    return MemoryPlan(budget, page_bytes, workers, window_size, spill)
+
+
+def plan_pdf(pdf_paths, dpi, color_mode='rgb', backend=None, workers=1, window_size=1, budget=None):
+    """
+    按PDF中最大一页的尺寸制定渲染计划，没有设置预算时不读取文档
+
+    返回:
+        MemoryPlan
+    """
+    from rasterizer import get_backend
+
+    if get_budget(budget) is None:
+        return MemoryPlan(None, 0, max(workers or 1, 1), window_size)
+    backend = get_backend(backend)
+    return plan(pdf_page_bytes(pdf_paths, dpi, color_mode, backend), workers, window_size, budget,
+                hasattr(backend, 'spill'))
+
+
+def plan_images(paths, workers=1, budget=None):
+    """按一批图片文件中最大一张的尺寸决定进程数，没有设置预算时不读取文件"""
+    if get_budget(budget) is None:
+        return MemoryPlan(None, 0, max(workers or 1, 1), 1)
+    return plan(image_page_bytes(paths), workers, 1, budget)
+
+
+def spill_backend(backend, memory_plan=None):
+    """
+    返回把渲染窗口暂存到临时文件的后端
+
+    memory_plan 不要求暂存，或后端不支持暂存（逐页在进程内渲染）时原样返回。
+    """
+    import copy
+
+    if memory_plan is not None and not memory_plan.spill:
+        return backend
+    if not hasattr(backend, 'spill') or backend.spill:
+        return backend
+    backend = copy.copy(backend)
+    backend.spill = True
+    return backend
+
+
+def _process_rss():
+    """{进程号: (父进程号, 常驻内存字节数)}，只支持 Linux，其他平台返回None"""
+    if not os.path.isdir('/proc/self'):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    processes = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                # 进程名可能包含空格和括号，从最后一个右括号之后开始解析
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # 右括号之后依次为 state ppid ...，rss 是 stat 中的第24项
+        processes[int(name)] = (int(fields[1]), int(fields[21]) * page_size)
+    return processes
+
+
+def tree_rss(pid=None):
+    """进程及其全部子孙进程的常驻内存之和（字节），平台不支持时返回None"""
+    processes = _process_rss()
+    if processes is None:
+        return None
+    root = pid or os.getpid()
+    children = {}
+    for child, (parent, _) in processes.items():
+        children.setdefault(parent, []).append(child)
+    total = 0
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        total += processes.get(current, (0, 0))[1]
+        stack.extend(children.get(current, ()))
+    return total
+
+
+class PeakRssTracker:
+    """
+    在后台线程中定期采样当前进程树的常驻内存之和，记录峰值
+
+    工作进程并发运行时，单个进程的 ru_maxrss 看不出总占用，所以按进程树求和。
+    不支持 /proc 的平台退回到 metrics.peak_rss（单个进程的峰值）。
+    """
+
+    def __init__(self, budget=None, interval=RSS_SAMPLE_INTERVAL):
+        self.budget = get_budget(budget)
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = tree_rss()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name='peak-rss', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        if self.peak is None:
+            import metrics
+
+            self.peak = metrics.peak_rss()
+        return self.peak
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.peak is not None and self.peak > self.budget
+
+    def to_dict(self):
+        return {'peak_rss_bytes': self.peak, 'memory_budget_bytes': self.budget}
+
+    def describe(self):
+        """例如 峰值内存 812 MB / 预算 6.0 GB"""
+        if self.peak is None:
+            return '峰值内存未知'
+        text = f'峰值内存 {format_size(self.peak)}'
+        if self.budget is not None:
+            text += f' / 预算 {format_size(self.budget)}'
+            if self.over_budget:
+                text += '（超出预算）'
+        return text
+
+
+def track_peak_rss(budget=None, interval=RSS_SAMPLE_INTERVAL):
+    """with track_peak_rss() as tracker: ... 结束后 tracker.peak 为观测到的峰值，tracker.describe() 为报告"""
+    return PeakRssTracker(budget, interval)
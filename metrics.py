@@ -0,0 +1,281 @@
+"""
+各工具的分阶段性能指标
+
+启用后记录每个阶段（render 渲染、decode 解码、transform 颜色处理、encode 编码保存、write 写PDF）
+的次数与耗时、输入/输出字节数、页数/文件数、峰值内存，并以事件流的形式通知监听者，
+结束后可导出为 JSON 或 Prometheus 文本格式。未启用时各埋点只做一次判空，几乎没有开销。
+
+用法:
+    with metrics.collect(listener=print) as m:
+        render_pdf('文档.pdf')
+    print(m.to_json())
+
+进程池中的任务在子进程里单独统计，结束后把汇总合并回主进程（事件不会实时转发）。
+
+当前的 Metrics 保存在 contextvars 中：每个线程、每个 asyncio 任务各自收集，
+服务中并发的任务互不干扰。新线程不继承调用方的 Metrics，交给线程池执行的埋点函数用 bind 包装。
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# 当前正在收集的 Metrics，为None表示未启用
+_active = contextvars.ContextVar('metrics_active', default=None)
+
+
+class _NullStage:
+    """未启用时使用的空计时器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def peak_rss():
+    """当前进程及已结束子进程中最大的常驻内存峰值（字节），平台不支持时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux 上单位为 KB，macOS 上为字节
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+class Metrics:
+    """一次收集的指标"""
+
+    def __init__(self, listener=None):
+        """
+        参数:
+            listener: 事件回调，参数为事件字典，例如
+                      {'event': 'stage', 'stage': 'render', 'seconds': 0.12, 'time': ...}
+        """
+        self.stages = {}
+        self.counters = {}
+        self.listeners = [listener] if listener else []
+        self.worker_peak_rss = None
+        self.start = time.perf_counter()
+        self.elapsed = None
+        # 同一个 Metrics 可能被 bind 到多个线程中同时更新
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        """向所有监听者发送一个事件"""
+        if self.listeners:
+            record = {'event': event, 'time': time.time(), **fields}
+            for listener in self.listeners:
+                listener(record)
+
+    def record_stage(self, name, seconds):
+        with self._lock:
+            stage = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0})
+            stage['count'] += 1
+            stage['seconds'] += seconds
+        self.emit('stage', stage=name, seconds=seconds)
+
+    def add(self, name, value=1):
+        """累加计数器，例如 pages、files、bytes_in、bytes_out"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, snapshot):
+        """合并子进程的 snapshot() 结果"""
+        with self._lock:
+            for name, stage in snapshot['stages'].items():
+                merged = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0})
+                merged['count'] += stage['count']
+                merged['seconds'] += stage['seconds']
+        for name, value in snapshot['counters'].items():
+            self.add(name, value)
+        worker_rss = snapshot.get('peak_rss_bytes')
+        if worker_rss is not None:
+            self.worker_peak_rss = max(self.worker_peak_rss or 0, worker_rss)
+        self.emit('merge', stages=snapshot['stages'], counters=snapshot['counters'])
+
+    def snapshot(self):
+        """返回可序列化为 JSON 的汇总字典"""
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.start
+        rss = peak_rss()
+        if self.worker_peak_rss is not None:
+            rss = max(rss or 0, self.worker_peak_rss)
+        pages = self.counters.get('pages', 0)
+        return {
+            'elapsed': elapsed,
+            'stages': {name: dict(stage) for name, stage in self.stages.items()},
+            'counters': dict(self.counters),
+            'pages_per_sec': pages / elapsed if elapsed > 0 else 0.0,
+            'peak_rss_bytes': rss,
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix='pdf_tools'):
+        """导出为 Prometheus 文本格式"""
+        snapshot = self.snapshot()
+        lines = [
+            f'# TYPE {prefix}_stage_seconds_total counter',
+            *(f'{prefix}_stage_seconds_total{{stage="{name}"}} {stage["seconds"]:.6f}'
+              for name, stage in sorted(snapshot['stages'].items())),
+            f'# TYPE {prefix}_stage_calls_total counter',
+            *(f'{prefix}_stage_calls_total{{stage="{name}"}} {stage["count"]}'
+              for name, stage in sorted(snapshot['stages'].items())),
+        ]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {value}']
+        lines += [f'# TYPE {prefix}_elapsed_seconds gauge',
+                  f'{prefix}_elapsed_seconds {snapshot["elapsed"]:.6f}',
+                  f'# TYPE {prefix}_pages_per_second gauge',
+                  f'{prefix}_pages_per_second {snapshot["pages_per_sec"]:.6f}']
+        if snapshot['peak_rss_bytes'] is not None:
+            lines += [f'# TYPE {prefix}_peak_rss_bytes gauge',
+                      f'{prefix}_peak_rss_bytes {snapshot["peak_rss_bytes"]}']
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """写入文件，扩展名为 .prom 时使用 Prometheus 格式，否则为 JSON"""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+@contextlib.contextmanager
+def collect(listener=None):
+    """
+    在 with 块内启用指标收集
+
+    参数:
+        listener: 事件回调，见 Metrics
+
+    返回:
+        Metrics，with 块结束后 elapsed 固定为块内耗时
+    """
+    metrics = Metrics(listener)
+    token = _active.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.elapsed = time.perf_counter() - metrics.start
+        _active.reset(token)
+
+
+def active():
+    """当前正在收集的 Metrics，未启用时为None"""
+    return _active.get()
+
+
+def _call_with(metrics, func, *args, **kwargs):
+    token = _active.set(metrics)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _active.reset(token)
+
+
+def bind(func):
+    """
+    返回在其他线程中执行时仍把埋点计入当前 Metrics 的函数（用于 loop.run_in_executor 等不复制上下文的场合）
+
+    未启用时原样返回 func。
+    """
+    metrics = _active.get()
+    if metrics is None:
+        return func
+    return functools.partial(_call_with, metrics, func)
+
+
+def stage(name):
+    """阶段计时器: with metrics.stage('encode'): ..."""
+    metrics = _active.get()
+    if metrics is None:
+        return _NULL_STAGE
+    return _Stage(metrics, name)
+
+
+def add(name, value=1):
+    """累加计数器，未启用时不做任何事"""
+    metrics = _active.get()
+    if metrics is not None:
+        metrics.add(name, value)
+
+
+def add_file_size(name, path):
+    """把文件大小累加到计数器（bytes_in / bytes_out），未启用时不访问文件系统"""
+    metrics = _active.get()
+    if metrics is not None:
+        try:
+            metrics.add(name, os.path.getsize(path))
+        except OSError:
+            pass
+
+
+def timed_iter(iterable, name):
+    """逐项计时的迭代器包装，每取出一项记为一次 name 阶段"""
+    metrics = _active.get()
+    if metrics is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        metrics.record_stage(name, time.perf_counter() - start)
+        yield item
+
+
+def call_collected(func, *args, **kwargs):
+    """
+    进程池中的包装函数：在子进程中执行 func 并收集指标
+
+    返回:
+        (func 的返回值, 指标快照)，主进程用 merge_result 拆开并合并
+    """
+    with collect() as metrics:
+        result = func(*args, **kwargs)
+    return result, metrics.snapshot()
+
+
+def submit(executor, func, *args, **kwargs):
+    """向进程池提交任务；启用指标时通过 call_collected 在子进程中收集"""
+    if _active.get() is None:
+        return executor.submit(func, *args, **kwargs)
+    return executor.submit(call_collected, func, *args, **kwargs)
+
+
+def merge_result(value):
+    """取出 submit 提交的任务结果，启用指标时把子进程的快照合并到当前 Metrics"""
+    metrics = _active.get()
+    if metrics is None:
+        return value
+    result, snapshot = value
+    metrics.merge(snapshot)
+    return result
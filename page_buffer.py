@@ -0,0 +1,356 @@
+"""
+进程间的页面缓冲区：渲染进程与颜色处理进程通过共享内存交换像素，不经过 pickle
+
+    渲染进程 ──[共享内存环: slot_count 个预分配的槽]──> 处理进程 × N ──> 各自写盘
+
+- 一整块 multiprocessing.shared_memory 被切成 slot_count 个等大的槽，每个槽放一页的原始像素
+- free 队列中是空闲槽的编号，渲染进程取不到空槽时阻塞，内存占用固定为 slot_count 页
+- ready 队列只传递 (槽号, 页码, 模式, 尺寸) 这样的小元组，像素本身不经过管道
+- 处理进程把槽直接映射为 PIL 图片或 numpy 数组（零拷贝），处理完一页后把槽号放回 free 队列
+
+RGB 页面在槽中按 RGBX（每像素4字节）存放：PIL 只能把 RGBX、L 等模式直接映射到外部内存，
+多出的1字节换来读写两端都不需要经过中间缓冲区。模式不受支持或超出槽大小的页面退回到 pickle 传递。
+
+用法:
+    count, output_dir = process_pdf_shared('文档.pdf', recolor=True, workers=4)
+"""
+import os
+
+import memory_budget
+import metrics
+from pdf_to_image import resolve_pages
+from pipeline import build_sink, build_stages
+from rasterizer import get_backend
+
+# 页面模式 → (槽中的存放模式, 每像素字节数)
+SLOT_LAYOUTS = {
+    'RGB': ('RGBX', 4),
+    'L': ('L', 1),
+    '1': ('L', 1),
+}
+
+# 渲染颜色模式 → 槽中每像素字节数
+COLOR_MODE_BYTES = {'rgb': 4, 'gray': 1, 'bilevel': 1}
+
+# 每个处理进程平均分到的槽数，渲染进程最多领先处理进程这么多页
+SLOTS_PER_WORKER = 2
+
+# 主进程等待结果时检查子进程是否意外退出的间隔（秒）
+_POLL_INTERVAL = 0.5
+
+
+class PageRing:
+    """
+    共享内存页面环
+
+    由主进程创建，作为 multiprocessing.Process 的参数传给渲染和处理进程，
+    子进程中按名称重新连接同一块共享内存。主进程负责最后的 close() 和 unlink()。
+
+    参数:
+        slot_count: 槽数
+        slot_bytes: 每个槽的字节数，应不小于最大一页的像素数据
+        context: multiprocessing 上下文，为None时使用默认上下文
+    """
+
+    def __init__(self, slot_count, slot_bytes, context=None):
+        import multiprocessing
+        from multiprocessing import shared_memory
+
+        context = context or multiprocessing.get_context()
+        self.slot_count = slot_count
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slot_count * slot_bytes)
+        self._free = context.Queue()
+        self._ready = context.Queue()
+        for slot in range(slot_count):
+            self._free.put(slot)
+
+    def __getstate__(self):
+        return {'name': self._shm.name, 'slot_count': self.slot_count, 'slot_bytes': self.slot_bytes,
+                'free': self._free, 'ready': self._ready}
+
+    def __setstate__(self, state):
+        from multiprocessing import shared_memory
+
+        self.slot_count = state['slot_count']
+        self.slot_bytes = state['slot_bytes']
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._free = state['free']
+        self._ready = state['ready']
+
+    def _slot_buffer(self, slot, size):
+        offset = slot * self.slot_bytes
+        return self._shm.buf[offset:offset + size]
+
+    def _slot_image(self, slot, mode, size):
+        """按页面模式把槽映射为 PIL 图片，读写都直接作用于共享内存"""
+        from PIL import Image
+
+        layout, pixel_bytes = SLOT_LAYOUTS[mode]
+        buffer = self._slot_buffer(slot, size[0] * size[1] * pixel_bytes)
+        return Image.frombuffer(layout, size, buffer, 'raw', layout, 0, 1)
+
+    def put(self, page_number, img):
+        """
+        把一页放入环中，没有空槽时阻塞
+
+        参数:
+            page_number: 页码
+            img: PIL 图片，RGB/L/1 模式通过共享内存传递，其他模式退回到 pickle
+        """
+        layout = SLOT_LAYOUTS.get(img.mode)
+        width, height = img.size
+        if layout is None or width * height * layout[1] > self.slot_bytes:
+            metrics.add('ring_pages_pickled')
+            self._ready.put(('pickled', page_number, img))
+            return
+        slot = self._free.get()
+        source = img.convert('L') if img.mode == '1' else img
+        target = self._slot_image(slot, img.mode, img.size)
+        # 核心层的 paste 逐行直接写入共享内存，RGB 到 RGBX 只是每像素补一个字节
+        target.im.paste(source.im, (0, 0, width, height))
+        del target
+        metrics.add('ring_pages_shared')
+        self._ready.put(('page', slot, page_number, img.mode, img.size))
+
+    def finish(self, consumers=1, error=None):
+        """通知每个处理进程没有更多页面；error 为渲染出错时的说明"""
+        for _ in range(consumers):
+            self._ready.put(('done', error))
+
+    def _messages(self):
+        """依次取出 ready 队列中的消息，遇到结束消息时停止，渲染出错时抛出 RuntimeError"""
+        while True:
+            message = self._ready.get()
+            if message[0] == 'done':
+                if message[1] is not None:
+                    raise RuntimeError(message[1])
+                return
+            yield message
+
+    def iter_pages(self, restore_rgb=True):
+        """
+        依次取出 (页码, PIL 图片)
+
+        L 页面直接映射共享内存，取下一页时该页的槽才被释放，调用方在此之前要用完（或复制）图片。
+
+        参数:
+            restore_rgb: 为True时把 RGBX 槽转换回 RGB（一次复制后立即释放槽）；
+                         为False时直接交出映射共享内存的 RGBX 图片，后续步骤自己转换为 RGB 时使用
+        """
+        from PIL import Image
+
+        for message in self._messages():
+            if message[0] == 'pickled':
+                yield message[1], message[2]
+                continue
+            _, slot, page_number, mode, size = message
+            img = self._slot_image(slot, mode, size)
+            if mode == '1':
+                img = img.convert('1', dither=Image.Dither.NONE)
+                self._free.put(slot)
+                yield page_number, img
+            elif mode == 'RGB' and restore_rgb:
+                img = img.convert('RGB')
+                self._free.put(slot)
+                yield page_number, img
+            else:
+                try:
+                    yield page_number, img
+                finally:
+                    del img
+                    self._free.put(slot)
+
+    def iter_arrays(self):
+        """
+        依次取出 (页码, 模式, numpy 数组)，数组直接映射共享内存
+
+        RGB 页面是 (高, 宽, 3) 的跨步视图，L/1 页面是 (高, 宽)（1 位页面的取值为 0/255）。
+        取下一页时上一页的槽被释放，调用方在此之前要用完（或复制）数组。
+        """
+        import numpy as np
+
+        for message in self._messages():
+            if message[0] == 'pickled':
+                yield message[1], message[2].mode, np.asarray(message[2])
+                continue
+            _, slot, page_number, mode, size = message
+            width, height = size
+            channels = SLOT_LAYOUTS[mode][1]
+            array = np.frombuffer(self._slot_buffer(slot, width * height * channels), dtype=np.uint8)
+            if channels == 1:
+                array = array.reshape(height, width)
+            else:
+                array = array.reshape(height, width, channels)[:, :, :3]
+            try:
+                yield page_number, mode, array
+            finally:
+                del array
+                self._free.put(slot)
+
+    def close(self):
+        """断开共享内存；调用方仍持有映射的图片或数组时保留映射，由进程退出时释放"""
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+        for queue in (self._free, self._ready):
+            queue.close()
+            queue.cancel_join_thread()
+
+    def unlink(self):
+        """删除共享内存块（只在创建它的主进程中调用）"""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def slot_bytes_for(pdf_path, dpi=200, color_mode='rgb', pages=None, backend=None):
+    """
+    按文档中最大一页的尺寸计算槽大小（只读取文档结构，不渲染）
+
+    尺寸是 PDF 点数（1/72 英寸），两边各留一个像素应对不同后端的取整差异。
+    """
+    import math
+
+    info = get_backend(backend).probe(pdf_path)
+    selected = resolve_pages(pages, info['page_count'])
+    scale = dpi / 72
+    largest = 0
+    for page in selected:
+        size = info['page_sizes'][page - 1]
+        if size is None:
+            continue
+        width, height = size
+        largest = max(largest, (math.ceil(width * scale) + 1) * (math.ceil(height * scale) + 1))
+    return largest * COLOR_MODE_BYTES[color_mode]
+
+
+def _render_worker(ring, results, consumers, pdf_path, dpi, backend, color_mode, pages, collect_metrics):
+    """渲染进程：逐页渲染并放入环中"""
+    import traceback
+
+    from pdf_to_image import iter_pdf_pages
+
+    with metrics.collect() as collected:
+        try:
+            rendered = iter_pdf_pages(pdf_path, dpi, backend=backend, color_mode=color_mode, pages=pages)
+            for page_number, img in metrics.timed_iter(rendered, 'render'):
+                ring.put(page_number, img)
+                del img
+        except Exception:
+            error = traceback.format_exc()
+            ring.finish(consumers, '渲染出错')
+            results.put(('error', None, error))
+            return
+    ring.finish(consumers)
+    results.put(('rendered', collected.snapshot() if collect_metrics else None))
+
+
+def _transform_worker(ring, results, sink, stage_options, collect_metrics):
+    """处理进程：从环中取页，执行颜色处理并写盘"""
+    import traceback
+
+    stages = build_stages(**stage_options)
+    with metrics.collect() as collected:
+        page_number = None
+        try:
+            # 第一个步骤会自己把 RGBX 转换为 RGB，直接交出映射共享内存的图片即可
+            for page_number, img in ring.iter_pages(restore_rgb=not stages):
+                with metrics.stage('transform'):
+                    for stage in stages:
+                        img = stage(img)
+                output_path = sink.write(page_number, img)
+                del img
+                results.put(('page', page_number, output_path))
+        except Exception:
+            results.put(('error', page_number, traceback.format_exc()))
+            return
+    results.put(('done', collected.snapshot() if collect_metrics else None))
+
+
+def process_pdf_shared(pdf_path, output_base_dir=None, dpi=200, recolor=False, invert=False, color_map=None,
+                       tolerance=0, mode='exact', workers=None, progress=None, backend=None, output_format=None,
+                       color_mode='rgb', pages=None, slots=None):
+    """
+    用一个渲染进程和多个处理进程执行 pipeline.process_pdf（输出为图片目录），页面经共享内存传递
+
+    输出与 process_pdf 逐文件相同，适合颜色处理耗时与渲染相当的多核场合。
+
+    参数:
+        pdf_path、output_base_dir、dpi、recolor、invert、color_map、tolerance、mode、backend、
+        output_format、color_mode、pages: 见 pipeline.process_pdf
+        workers: 处理进程数，为None时使用全部CPU核心；设置了内存预算（见 memory_budget）时可能自动减少
+        progress: 进度回调，签名为 progress(已处理页数, 总页数, 输出路径)，在主进程中按完成顺序调用
+        slots: 环中的槽数，为None时为处理进程数的 SLOTS_PER_WORKER 倍（超出内存预算时减少）
+
+    返回:
+        (输出的页数, 输出目录)
+    """
+    import multiprocessing
+    import queue
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    backend = get_backend(backend)
+    slot_bytes = max(1, slot_bytes_for(pdf_path, dpi, color_mode, pages, backend))
+    # 环中的槽相当于每个处理进程的窗口，设置了内存预算时槽数和进程数一起减少（共享内存无法暂存到磁盘）
+    memory_plan = memory_budget.plan(slot_bytes, workers, SLOTS_PER_WORKER)
+    workers = memory_plan.workers
+    if slots is None:
+        slots = workers * memory_plan.window_size
+    total = len(resolve_pages(pages, backend.page_count(pdf_path)))
+    sink, output_dir = build_sink(pdf_path, output_base_dir, output_format=output_format)
+    stage_options = {'recolor': recolor, 'invert': invert, 'color_map': color_map, 'tolerance': tolerance,
+                     'mode': mode}
+    collect_metrics = metrics.active() is not None
+
+    context = multiprocessing.get_context()
+    ring = PageRing(slots, slot_bytes, context)
+    results = context.Queue()
+    processes = [context.Process(target=_render_worker, daemon=True,
+                                 args=(ring, results, workers, pdf_path, dpi, backend, color_mode, pages,
+                                       collect_metrics))]
+    processes += [context.Process(target=_transform_worker, daemon=True,
+                                  args=(ring, results, sink, stage_options, collect_metrics))
+                  for _ in range(workers)]
+    count = 0
+    try:
+        for process in processes:
+            process.start()
+        # 渲染进程和每个处理进程各发一条结束消息
+        pending = workers + 1
+        while pending:
+            try:
+                message = results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError('页面处理进程意外退出')
+                continue
+            kind = message[0]
+            if kind == 'page':
+                count += 1
+                if progress:
+                    progress(count, total, message[2])
+            elif kind == 'error':
+                _, page_number, error = message
+                where = f'第 {page_number} 页' if page_number is not None else '渲染'
+                raise RuntimeError(f'{where}处理失败:\n{error}')
+            else:
+                pending -= 1
+                if message[1] is not None:
+                    metrics.active().merge(message[1])
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            if process.pid is not None:
+                process.join()
+        results.close()
+        results.cancel_join_thread()
+        ring.close()
+        ring.unlink()
+    return count, output_dir
@@ -0,0 +1,143 @@
+"""
+页面内容分类：用很小的代价判断页面是空白、严格两色、灰度还是彩色
+
+扫描归档中大部分页面是空白分隔页或纯黑白文字，不需要完整的逐像素颜色匹配:
+
+    blank    几乎没有内容（缩小后的探测图中与底色明显不同的像素极少）→ 合并PDF时可以跳过
+    bilevel  整页恰好只有一到两种颜色 → 只需替换这两种颜色
+    gray     每个像素的 R、G、B 都相等 → 按灰度值查表
+    color    其他页面 → 完整的颜色匹配引擎
+
+两色与灰度的判断是精确的（走快速路径的结果与完整引擎逐像素相同），
+空白页的判断基于缩小后的探测图，是近似的，只用于决定是否丢弃页面。
+"""
+
+# 页面类别，按判断顺序排列
+PAGE_CLASSES = ('blank', 'bilevel', 'gray', 'color')
+
+# 探测图长边的最大像素数，更大的页面先按整数倍缩小
+PROBE_SIZE = 1024
+
+# 与底色（探测图中最多的灰度值）相差超过该值的像素视为内容
+BLANK_CONTRAST = 48
+
+# 内容像素占探测图的比例不超过该值时视为空白页（扫描噪点、装订孔等）
+BLANK_INK_RATIO = 0.001
+
+
+def probe_image(img, probe_size=PROBE_SIZE):
+    """
+    返回用于判断空白页的灰度探测图
+
+    按整数倍缩小（每个像素是原图一个方块的平均值），细笔画会变浅但不会消失。
+    """
+    if img.mode != 'L':
+        img = img.convert('L')
+    factor = -(-max(img.size) // probe_size)
+    return img.reduce(factor) if factor > 1 else img
+
+
+def is_blank(img, probe_size=PROBE_SIZE, contrast=BLANK_CONTRAST, ink_ratio=BLANK_INK_RATIO):
+    """
+    判断页面是否空白
+
+    参数:
+        img: PIL 图片
+        probe_size: 探测图长边的最大像素数
+        contrast: 与底色相差超过该值的像素视为内容
+        ink_ratio: 内容像素比例不超过该值时视为空白
+    """
+    histogram = probe_image(img, probe_size).histogram()
+    background = max(range(256), key=histogram.__getitem__)
+    ink = sum(histogram[:max(0, background - contrast)]) + sum(histogram[background + contrast + 1:])
+    return ink <= sum(histogram) * ink_ratio
+
+
+def is_blank_file(path, probe_size=PROBE_SIZE):
+    """判断图片文件是否是空白页，JPEG 直接按缩小的尺寸解码"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        if img.format == 'JPEG':
+            # draft 让解码器直接输出 1/2、1/4 或 1/8 大小的灰度图
+            img.draft('L', (probe_size, probe_size))
+        return is_blank(img, probe_size)
+
+
+def two_colors(img):
+    """
+    图片中只有一到两种颜色时返回这些颜色的列表，否则返回None
+
+    getcolors 在遇到第三种颜色时立即停止计数，彩色或抗锯齿的页面很快就会返回。
+    """
+    colors = img.getcolors(2)
+    return [color for _, color in colors] if colors else None
+
+
+def two_color_index(img, colors, values=(0, 1)):
+    """
+    把只有两种颜色的 RGB 图片转换为索引图
+
+    两种颜色至少在一个通道上取值不同，只需查看这一个通道。
+
+    参数:
+        colors: two_colors 返回的两种颜色
+        values: 两种颜色在索引图中的取值
+
+    返回:
+        L 模式图片，colors[0] 的像素为 values[0]，colors[1] 的像素为 values[1]
+    """
+    channel = next(c for c in range(3) if colors[0][c] != colors[1][c])
+    lut = [values[0]] * 256
+    lut[colors[1][channel]] = values[1]
+    return img.getchannel(channel).point(lut)
+
+
+def is_gray(img, probe_size=PROBE_SIZE):
+    """
+    判断 RGB 图片的每个像素是否都满足 R == G == B
+
+    先检查均匀抽样的探测图（只读取抽到的像素），大部分彩色页面在这一步就能排除；
+    探测图是灰度时再逐像素确认。
+    """
+    from PIL import Image, ImageChops
+
+    if img.mode in ('1', 'L'):
+        return True
+    if img.mode != 'RGB':
+        return False
+    factor = -(-max(img.size) // probe_size)
+    samples = ()
+    if factor > 1:
+        width, height = img.size
+        samples = (img.resize((max(1, width // factor), max(1, height // factor)), Image.Resampling.NEAREST),)
+    for image in samples + (img,):
+        red, green, blue = image.split()
+        if ImageChops.difference(red, green).getbbox() or ImageChops.difference(green, blue).getbbox():
+            return False
+    return True
+
+
+def classify_page(img, detect_blank=True, probe_size=PROBE_SIZE):
+    """
+    判断页面类别
+
+    参数:
+        img: PIL 图片
+        detect_blank: 为False时不判断空白页（颜色转换等不会丢弃页面的场合）
+        probe_size: 探测图长边的最大像素数
+
+    返回:
+        PAGE_CLASSES 中的一个
+    """
+    if detect_blank and is_blank(img, probe_size):
+        return 'blank'
+    if two_colors(img) is not None:
+        return 'bilevel'
+    if img.mode == 'P' and img.palette.mode == 'RGB':
+        palette = img.getpalette()
+        used = [palette[index * 3:index * 3 + 3] for _, index in img.getcolors(256)]
+        return 'gray' if all(r == g == b for r, g, b in used) else 'color'
+    if is_gray(img, probe_size):
+        return 'gray'
+    return 'color'
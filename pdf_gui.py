@@ -1,22 +1,30 @@
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QPushButton, QTabWidget, QFileDialog, QMessageBox
+    QLabel, QLineEdit, QPushButton, QTabWidget, QFileDialog, QMessageBox, QComboBox,
+    QProgressBar, QCheckBox
 )
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent
 import os
 import sys
-from pdf_to_image import convert_pdf_to_images
-from PIL import Image, ImageOps
-from color_convert import convert_colors, process_directory
+from pdf_to_image import collect_pdf_documents, parse_page_ranges, render_pdf, render_pdf_batch, render_thumbnails
+from color_convert import process_directory_batch
+from image_invert import invert_directory_batch
+from pipeline import process_pdf
+from pdf_writer import merge_directory_to_pdf
+from job_runner import JobRunner
+
+# 输入框中多个路径之间的分隔符
+PATH_SEPARATOR = ";"
 
 
 class DragDropLineEdit(QLineEdit):
     """支持拖拽的输入框 (浮浮酱特制的拖拽输入框喵～)"""
 
-    def __init__(self, parent=None, accept_files=True, accept_folders=True):
+    def __init__(self, parent=None, accept_files=True, accept_folders=True, accept_multiple=False):
         super().__init__(parent)
         self.accept_files = accept_files  # 是否接受文件
         self.accept_folders = accept_folders  # 是否接受文件夹
+        self.accept_multiple = accept_multiple  # 是否接受多个路径（用分号隔开）
         self.setAcceptDrops(True)
 
     def dragEnterEvent(self, event: QDragEnterEvent):
@@ -28,21 +36,23 @@ class DragDropLineEdit(QLineEdit):
 
     def dropEvent(self, event: QDropEvent):
         """处理放置事件 (处理拖拽放下的文件喵～)"""
-        urls = event.mimeData().urls()
-        if urls:
-            # 只取第一个文件/文件夹
-            file_path = urls[0].toLocalFile()
-
-            # 检查是文件还是文件夹
-            is_file = os.path.isfile(file_path)
-            is_folder = os.path.isdir(file_path)
-
-            # 根据设置决定是否接受
-            if (is_file and self.accept_files) or (is_folder and self.accept_folders):
-                self.setText(file_path)
-                event.acceptProposedAction()
-            else:
-                event.ignore()
+        # 根据设置只留下可以接受的文件/文件夹
+        paths = []
+        for url in event.mimeData().urls():
+            file_path = url.toLocalFile()
+            if (os.path.isfile(file_path) and self.accept_files) or (os.path.isdir(file_path) and self.accept_folders):
+                paths.append(file_path)
+
+        if paths:
+            # 不接受多个时只取第一个
+            self.setText(PATH_SEPARATOR.join(paths) if self.accept_multiple else paths[0])
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def paths(self):
+        """输入框中的所有路径 (分号隔开的都拆出来喵)"""
+        return [path.strip() for path in self.text().split(PATH_SEPARATOR) if path.strip()]
 
 
 class PDFConverterGUI(QMainWindow):
@@ -54,6 +64,11 @@ class PDFConverterGUI(QMainWindow):
         # 居中显示窗口 (让窗口出现在屏幕中央喵～)
         self.center_window()
 
+        # 后台任务队列，各标签页的任务依次在后台执行 (界面不会再卡住喵～)
+        self.job_runner = JobRunner()
+        self.tab_jobs = {}
+        self.progress_bars = {}
+
         # 创建主部件和布局
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -69,6 +84,22 @@ class PDFConverterGUI(QMainWindow):
         self.setup_color_tab()
         self.setup_merge_tab()
 
+    def add_action_buttons(self, layout, key, text, slot):
+        """添加开始/取消按钮和进度条 (每个标签页一套喵～)"""
+        button_layout = QHBoxLayout()
+        start_btn = QPushButton(text)
+        start_btn.clicked.connect(slot)
+        button_layout.addWidget(start_btn, stretch=1)
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(lambda: self.cancel_jobs(key))
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+
+        progress_bar = QProgressBar()
+        progress_bar.setVisible(False)
+        layout.addWidget(progress_bar)
+        self.progress_bars[key] = progress_bar
+
     def center_window(self):
         """将窗口居中显示 (计算屏幕中心位置喵)"""
         screen = QApplication.primaryScreen().geometry()
@@ -84,10 +115,11 @@ class PDFConverterGUI(QMainWindow):
         layout.setSpacing(15)
         layout.setContentsMargins(20, 20, 20, 20)
 
-        # PDF文件选择 (支持拖拽PDF文件进来喵～)
+        # PDF文件选择 (可以一次拖进来好多PDF或整个文件夹喵～)
         pdf_layout = QHBoxLayout()
         pdf_layout.addWidget(QLabel("PDF文件:"))
-        self.pdf_path_edit = DragDropLineEdit(accept_files=True, accept_folders=False)
+        self.pdf_path_edit = DragDropLineEdit(accept_files=True, accept_folders=True, accept_multiple=True)
+        self.pdf_path_edit.setPlaceholderText("可拖入多个PDF或文件夹，用 ; 隔开")
         pdf_layout.addWidget(self.pdf_path_edit, stretch=1)
         pdf_btn = QPushButton("浏览")
         pdf_btn.clicked.connect(self.select_pdf)
@@ -110,13 +142,43 @@ class PDFConverterGUI(QMainWindow):
         self.dpi_edit = QLineEdit("200")
         self.dpi_edit.setMaximumWidth(100)
         dpi_layout.addWidget(self.dpi_edit)
-        dpi_layout.addStretch()
+        # 颜色模式 (黑白文字文档用灰度或黑白渲染，内存和文件都小很多喵～)
+        dpi_layout.addWidget(QLabel("颜色模式:"))
+        self.pdf_color_mode_combo = QComboBox()
+        self.pdf_color_mode_combo.addItems(["彩色", "灰度", "黑白"])
+        dpi_layout.addWidget(self.pdf_color_mode_combo)
+        # 页码范围 (只转换需要的页面，留空就是全部喵～)
+        dpi_layout.addWidget(QLabel("页码:"))
+        self.pdf_pages_edit = QLineEdit()
+        self.pdf_pages_edit.setPlaceholderText("全部，例如 1-5,20,40-")
+        dpi_layout.addWidget(self.pdf_pages_edit, stretch=1)
         layout.addLayout(dpi_layout)
 
+        # 后处理与输出方式 (渲染后直接在内存里处理，不产生中间图片喵～)
+        process_layout = QHBoxLayout()
+        process_layout.addWidget(QLabel("后处理:"))
+        self.pdf_process_combo = QComboBox()
+        self.pdf_process_combo.addItems(["无", "颜色转换", "颜色反转"])
+        process_layout.addWidget(self.pdf_process_combo)
+        process_layout.addWidget(QLabel("输出:"))
+        self.pdf_sink_combo = QComboBox()
+        self.pdf_sink_combo.addItems(["图片", "合并为PDF"])
+        process_layout.addWidget(self.pdf_sink_combo)
+        self.pdf_skip_blank_check = QCheckBox("跳过空白页")
+        process_layout.addWidget(self.pdf_skip_blank_check)
+        process_layout.addStretch()
+        # 快速预览 (低分辨率缩略图，几毫秒一页，先看看再决定转哪些页喵～)
+        preview_btn = QPushButton("生成缩略图预览")
+        preview_btn.clicked.connect(self.start_preview)
+        process_layout.addWidget(preview_btn)
+        layout.addLayout(process_layout)
+
         # 转换按钮
-        convert_btn = QPushButton("开始转换")
-        convert_btn.clicked.connect(self.start_convert)
-        layout.addWidget(convert_btn)
+        # 增量模式 (只处理变化过的内容，中断后可以接着跑喵～)
+        self.pdf_incremental_check = QCheckBox("增量处理（跳过未变化的内容，从中断处继续）")
+        layout.addWidget(self.pdf_incremental_check)
+
+        self.add_action_buttons(layout, "pdf", "开始转换", self.start_convert)
 
         # 状态显示
         self.pdf_status_label = QLabel("")
@@ -154,9 +216,14 @@ class PDFConverterGUI(QMainWindow):
         layout.addLayout(output_layout)
 
         # 反转按钮
-        invert_btn = QPushButton("开始反转")
-        invert_btn.clicked.connect(self.start_invert)
-        layout.addWidget(invert_btn)
+        # 增量模式 (只处理变化过的内容，中断后可以接着跑喵～)
+        self.invert_incremental_check = QCheckBox("增量处理（跳过未变化的内容，从中断处继续）")
+        layout.addWidget(self.invert_incremental_check)
+        # 子目录 (输出保持相同的目录结构喵～)
+        self.invert_recursive_check = QCheckBox("包含子目录")
+        layout.addWidget(self.invert_recursive_check)
+
+        self.add_action_buttons(layout, "invert", "开始反转", self.start_invert)
 
         # 状态显示
         self.invert_status_label = QLabel("")
@@ -200,9 +267,11 @@ class PDFConverterGUI(QMainWindow):
         layout.addWidget(info_label2)
 
         # 转换按钮
-        convert_btn = QPushButton("开始转换")
-        convert_btn.clicked.connect(self.start_color_convert)
-        layout.addWidget(convert_btn)
+        # 增量模式 (只处理变化过的内容，中断后可以接着跑喵～)
+        self.color_incremental_check = QCheckBox("增量处理（跳过未变化的内容，从中断处继续）")
+        layout.addWidget(self.color_incremental_check)
+
+        self.add_action_buttons(layout, "color", "开始转换", self.start_color_convert)
 
         # 状态显示
         self.color_status_label = QLabel("")
@@ -239,10 +308,12 @@ class PDFConverterGUI(QMainWindow):
         output_layout.addWidget(output_btn)
         layout.addLayout(output_layout)
 
+        # 空白页 (扫描件里的空白分隔页、空白背面直接丢掉喵～)
+        self.merge_skip_blank_check = QCheckBox("跳过空白页")
+        layout.addWidget(self.merge_skip_blank_check)
+
         # 合并按钮
-        merge_btn = QPushButton("开始合并")
-        merge_btn.clicked.connect(self.start_merge)
-        layout.addWidget(merge_btn)
+        self.add_action_buttons(layout, "merge", "开始合并", self.start_merge)
 
         # 状态显示
         self.merge_status_label = QLabel("")
@@ -254,16 +325,16 @@ class PDFConverterGUI(QMainWindow):
 
     def select_pdf(self):
         """选择PDF文件 (浏览选择PDF文件喵～)"""
-        filename, _ = QFileDialog.getOpenFileName(
+        filenames, _ = QFileDialog.getOpenFileNames(
             self,
             "选择PDF文件",
             "",
             "PDF文件 (*.pdf);;所有文件 (*.*)"
         )
-        if filename:
-            self.pdf_path_edit.setText(filename)
+        if filenames:
+            self.pdf_path_edit.setText(PATH_SEPARATOR.join(filenames))
             # 自动设置输出目录为PDF所在目录
-            self.pdf_output_edit.setText(os.path.dirname(filename))
+            self.pdf_output_edit.setText(os.path.dirname(filenames[0]))
 
     def select_output_dir(self):
         """选择输出目录"""
@@ -318,29 +389,169 @@ class PDFConverterGUI(QMainWindow):
         if filename:
             self.merge_output_edit.setText(filename)
 
+    def submit_job(self, key, status_label, on_finished, func, *args, **kwargs):
+        """
+        把后台函数提交到任务队列 (界面线程只负责更新状态喵～)
+
+        参数:
+            key: 标签页标识，用于取消该标签页的任务
+            status_label: 显示状态的标签
+            on_finished: 任务成功后在界面线程调用，参数为后台函数的返回值
+        """
+        progress_bar = self.progress_bars[key]
+        job = self.job_runner.submit(func, *args, **kwargs)
+        self.tab_jobs.setdefault(key, []).append(job)
+
+        def on_started():
+            status_label.setText("正在处理...")
+            progress_bar.setRange(0, 0)
+            progress_bar.setVisible(True)
+
+        def on_progress(done, total, message):
+            if total:
+                progress_bar.setRange(0, total)
+                progress_bar.setValue(done)
+                status_label.setText(f"已处理 {done}/{total}：{message}")
+            else:
+                status_label.setText(f"已处理 {done}：{message}")
+
+        def on_done():
+            self.tab_jobs[key].remove(job)
+            progress_bar.setVisible(False)
+
+        def on_success(result):
+            on_done()
+            on_finished(result)
+            # 每个任务结束时报告峰值内存 (设置了预算就一起显示喵)
+            status_label.setText(f"{status_label.text()}（{job.memory.describe()}）")
+
+        def on_failed(error):
+            on_done()
+            status_label.setText(f"处理失败: {error}")
+            QMessageBox.critical(self, "错误", f"处理过程中出现错误：{error}")
+
+        def on_cancelled():
+            on_done()
+            status_label.setText("已取消")
+
+        job.signals.started.connect(on_started)
+        job.signals.progress.connect(on_progress)
+        job.signals.finished.connect(on_success)
+        job.signals.failed.connect(on_failed)
+        job.signals.cancelled.connect(on_cancelled)
+
+        queued = self.job_runner.pending_count() - 1
+        status_label.setText(f"已加入队列，前面还有 {queued} 个任务..." if queued else "正在处理...")
+        return job
+
+    def cancel_jobs(self, key):
+        """取消某个标签页中排队或运行中的任务 (在当前页处理完后停下喵)"""
+        for job in self.tab_jobs.get(key, []):
+            job.cancel()
+
+    def read_pdf_pages(self):
+        """
+        读取页码范围输入框 (格式不对就提示并返回False喵)
+
+        返回:
+            (是否有效, 页码范围字符串或None)
+        """
+        pages = self.pdf_pages_edit.text().strip() or None
+        if pages is not None:
+            try:
+                parse_page_ranges(pages)
+            except ValueError as e:
+                QMessageBox.critical(self, "错误", f"页码范围格式不正确：{e}")
+                return False, None
+        return True, pages
+
+    def read_pdf_documents(self):
+        """
+        读取PDF输入框 (文件夹会展开成里面的PDF喵～)
+
+        返回:
+            [(PDF路径, 输出基础目录或None), ...]，没有找到PDF时提示并返回空列表
+        """
+        output_dir = self.pdf_output_edit.text()
+        documents = collect_pdf_documents(self.pdf_path_edit.paths(), output_dir or None)
+        if not documents:
+            QMessageBox.critical(self, "错误", "请选择PDF文件！")
+        return documents
+
+    def start_preview(self):
+        """生成缩略图预览 (只读页面尺寸再按低分辨率渲染，很快喵～)"""
+        documents = self.read_pdf_documents()
+        if not documents:
+            return
+        valid, pages = self.read_pdf_pages()
+        if not valid:
+            return
+
+        def on_finished(result):
+            count, output_path = result
+            self.pdf_status_label.setText(f"已生成 {count} 张缩略图，保存在: {output_path}")
+
+        color_mode = ("rgb", "gray", "bilevel")[self.pdf_color_mode_combo.currentIndex()]
+        # 多个文档依次排队生成 (缩略图很快，不用一起调度喵)
+        for pdf_path, output_dir in documents:
+            self.submit_job("pdf", self.pdf_status_label, on_finished,
+                            render_thumbnails, pdf_path, output_dir, pages=pages, color_mode=color_mode)
+
     def start_convert(self):
         """开始PDF转换 (执行PDF转图片功能喵～)"""
-        pdf_path = self.pdf_path_edit.text()
-        output_dir = self.pdf_output_edit.text()
+        documents = self.read_pdf_documents()
         dpi = self.dpi_edit.text()
 
-        if not pdf_path:
-            QMessageBox.critical(self, "错误", "请选择PDF文件！")
+        if not documents:
+            return
+        valid, pages = self.read_pdf_pages()
+        if not valid:
             return
 
         try:
             dpi = int(dpi) if dpi.strip() else 200
-            self.pdf_status_label.setText("正在转换中...")
-            QApplication.processEvents()  # 刷新界面
-
-            convert_pdf_to_images(pdf_path, output_dir, dpi)
+        except ValueError:
+            QMessageBox.critical(self, "错误", "DPI必须是整数！")
+            return
 
-            self.pdf_status_label.setText("转换完成！")
+        def on_finished(result):
+            page_count, output_path = result
+            self.pdf_status_label.setText(f"转换完成！共转换 {page_count} 页，已保存到: {output_path}")
             QMessageBox.information(self, "成功", "PDF转换完成！")
 
-        except Exception as e:
-            self.pdf_status_label.setText(f"转换失败: {str(e)}")
-            QMessageBox.critical(self, "错误", f"转换过程中出现错误：{str(e)}")
+        def on_batch_finished(result):
+            summary = (f"共 {len(result.files)} 个文档、{result.pages} 页，失败 {result.failed} 个，"
+                       f"耗时 {result.elapsed:.1f} 秒（{result.pages_per_sec:.1f} 页/秒）")
+            self.pdf_status_label.setText(f"批量转换完成！{summary}")
+            if result.failed:
+                details = "\n".join(f"{path}: {error}" for path, error in result.errors[:10])
+                QMessageBox.warning(self, "部分失败", f"批量转换完成！{summary}\n\n{details}")
+            else:
+                QMessageBox.information(self, "成功", f"批量转换完成！{summary}")
+
+        color_mode = ("rgb", "gray", "bilevel")[self.pdf_color_mode_combo.currentIndex()]
+        process = self.pdf_process_combo.currentIndex()
+        merge_to_pdf = self.pdf_sink_combo.currentIndex() == 1
+        incremental = self.pdf_incremental_check.isChecked()
+        if process == 0 and not merge_to_pdf and not incremental and len(documents) > 1:
+            # 多个文档的页面放在同一个进程池里调度，小文档填大文档的空隙 (CPU一直满着喵～)
+            self.submit_job("pdf", self.pdf_status_label, on_batch_finished,
+                            render_pdf_batch, documents, dpi, workers=None, color_mode=color_mode, pages=pages)
+            return
+
+        for pdf_path, output_dir in documents:
+            if process == 0 and not merge_to_pdf:
+                # 多进程并行渲染
+                self.submit_job("pdf", self.pdf_status_label, on_finished,
+                                render_pdf, pdf_path, output_dir, dpi, workers=None,
+                                incremental=incremental, color_mode=color_mode, pages=pages)
+            else:
+                # 渲染、处理、输出一次完成
+                self.submit_job("pdf", self.pdf_status_label, on_finished,
+                                process_pdf, pdf_path, output_dir, dpi,
+                                recolor=process == 1, invert=process == 2, merge_to_pdf=merge_to_pdf,
+                                color_mode=color_mode, pages=pages,
+                                skip_blank=merge_to_pdf and self.pdf_skip_blank_check.isChecked())
 
     def start_invert(self):
         """开始图片反转 (反转图片颜色喵～)"""
@@ -351,37 +562,20 @@ class PDFConverterGUI(QMainWindow):
             QMessageBox.critical(self, "错误", "请选择图片目录！")
             return
 
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        try:
-            self.invert_status_label.setText("正在处理图片...")
-            QApplication.processEvents()
-
-            # 支持的图片格式
-            image_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
-            processed_count = 0
-
-            for filename in os.listdir(input_dir):
-                if filename.lower().endswith(image_extensions):
-                    input_path = os.path.join(input_dir, filename)
-                    output_path = os.path.join(output_dir, f"inverted_{filename}")
-
-                    # 打开图片并反转颜色
-                    with Image.open(input_path) as img:
-                        inverted_img = ImageOps.invert(img.convert('RGB'))
-                        inverted_img.save(output_path)
-                        processed_count += 1
-
-                    self.invert_status_label.setText(f"已处理 {processed_count} 张图片...")
-                    QApplication.processEvents()
-
-            self.invert_status_label.setText(f"处理完成！共处理 {processed_count} 张图片")
-            QMessageBox.information(self, "成功", f"图片反转完成！共处理 {processed_count} 张图片")
+        def on_finished(result):
+            summary = f"共处理 {result.processed} 张图片，失败 {result.failed} 张，耗时 {result.elapsed:.1f} 秒"
+            self.invert_status_label.setText(f"处理完成！{summary}")
+            if result.failed:
+                details = "\n".join(f"{path}: {error}" for path, error in result.errors[:10])
+                QMessageBox.warning(self, "部分失败", f"图片反转完成！{summary}\n\n{details}")
+            else:
+                QMessageBox.information(self, "成功", f"图片反转完成！{summary}")
 
-        except Exception as e:
-            self.invert_status_label.setText(f"处理失败: {str(e)}")
-            QMessageBox.critical(self, "错误", f"处理过程中出现错误：{str(e)}")
+        # 多进程处理整个目录
+        self.submit_job("invert", self.invert_status_label, on_finished,
+                        invert_directory_batch, input_dir, output_dir or None,
+                        recursive=self.invert_recursive_check.isChecked(), name_prefix="inverted_",
+                        incremental=self.invert_incremental_check.isChecked())
 
     def start_color_convert(self):
         """开始颜色转换 (执行特定颜色转换喵～)"""
@@ -392,20 +586,19 @@ class PDFConverterGUI(QMainWindow):
             QMessageBox.critical(self, "错误", "请选择输入目录！")
             return
 
-        try:
-            self.color_status_label.setText("正在转换颜色...")
-            QApplication.processEvents()
-
-            # 处理整个目录
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            processed_count = process_directory(input_path, output_path)
-            self.color_status_label.setText(f"转换完成！共处理 {processed_count} 个文件")
-            QMessageBox.information(self, "成功", f"目录中的图片颜色转换完成！共处理 {processed_count} 个文件")
+        def on_finished(result):
+            summary = f"共处理 {result.processed} 个文件，失败 {result.failed} 个，耗时 {result.elapsed:.1f} 秒"
+            self.color_status_label.setText(f"转换完成！{summary}")
+            if result.failed:
+                details = "\n".join(f"{path}: {error}" for path, error in result.errors[:10])
+                QMessageBox.warning(self, "部分失败", f"目录中的图片颜色转换完成！{summary}\n\n{details}")
+            else:
+                QMessageBox.information(self, "成功", f"目录中的图片颜色转换完成！{summary}")
 
-        except Exception as e:
-            self.color_status_label.setText(f"转换失败: {str(e)}")
-            QMessageBox.critical(self, "错误", f"转换过程中出现错误：{str(e)}")
+        # 处理整个目录
+        self.submit_job("color", self.color_status_label, on_finished,
+                        process_directory_batch, input_path, output_path or None,
+                        incremental=self.color_incremental_check.isChecked())
 
     def start_merge(self):
         """开始图片合并 (把多张图片合并成一个PDF喵～)"""
@@ -420,51 +613,20 @@ class PDFConverterGUI(QMainWindow):
             QMessageBox.critical(self, "错误", "请选择输出PDF文件！")
             return
 
-        try:
-            self.merge_status_label.setText("正在合并图片...")
-            QApplication.processEvents()
-
-            # 支持的图片格式
-            image_extensions = ('.png', '.jpg', '.jpeg', '.bmp')
-            images = []
-            first_image = None
-
-            # 获取所有图片文件并按自然排序
-            def natural_sort_key(s):
-                import re
-                # 将字符串中的数字转换为整数，用于自然排序
-                return [int(text) if text.isdigit() else text.lower()
-                        for text in re.split('([0-9]+)', s)]
-
-            # 获取所有图片文件并按自然排序
-            image_files = [f for f in os.listdir(input_dir) if f.lower().endswith(image_extensions)]
-            image_files.sort(key=natural_sort_key)
-
-            for filename in image_files:
-                input_path = os.path.join(input_dir, filename)
-                img = Image.open(input_path)
-
-                # 如果是PNG格式且有透明通道,转换为RGB
-                if img.mode == 'RGBA':
-                    img = img.convert('RGB')
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                if first_image is None:
-                    first_image = img
-                else:
-                    images.append(img)
-
-            if first_image:
-                first_image.save(output_file, save_all=True, append_images=images)
-                self.merge_status_label.setText(f"合并完成！共处理 {len(images) + 1} 张图片")
-                QMessageBox.information(self, "成功", f"图片合并完成！共处理 {len(images) + 1} 张图片")
-            else:
-                raise Exception("未找到任何图片文件")
+        def on_finished(page_count):
+            self.merge_status_label.setText(f"合并完成！共处理 {page_count} 张图片")
+            QMessageBox.information(self, "成功", f"图片合并完成！共处理 {page_count} 张图片")
+
+        # 逐页写入PDF，JPEG/PNG 数据直接搬运，不再把所有图片留在内存中
+        self.submit_job("merge", self.merge_status_label, on_finished,
+                        merge_directory_to_pdf, input_dir, output_file,
+                        skip_blank=self.merge_skip_blank_check.isChecked())
 
-        except Exception as e:
-            self.merge_status_label.setText(f"合并失败: {str(e)}")
-            QMessageBox.critical(self, "错误", f"合并过程中出现错误：{str(e)}")
+    def closeEvent(self, event):
+        """关闭窗口时取消所有任务并等待后台线程退出"""
+        self.job_runner.cancel_all()
+        self.job_runner.wait()
+        super().closeEvent(event)
 
 
 if __name__ == '__main__':
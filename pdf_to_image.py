@@ -1,47 +1,615 @@
-from pdf2image import convert_from_path
 import os
+import sys
+import time
+from dataclasses import dataclass, field
 
-def convert_pdf_to_images(pdf_path, output_base_dir=None, dpi=200):
+import memory_budget
+import metrics
+from batch_executor import BatchResult, FileResult
+from file_scanner import PDF_EXTENSIONS, scan_directory
+from image_output import get_output_format, output_path_for, save_image
+from manifest import Manifest, describe_file
+from rasterizer import DEFAULT_WINDOW_SIZE, POPPLER_PATH, get_backend
+
+# 并行渲染时每个进程平均分到的页码区间数，区间越多负载越均衡
+RANGES_PER_WORKER = 4
+
+# 批量渲染多个文档时每个任务最多包含的页数，任务越小，小文档越容易插进大文档之间的空隙
+BATCH_CHUNK_PAGES = 16
+
+# 缩略图长边的默认像素数
+DEFAULT_THUMBNAIL_SIZE = 256
+
+
+def get_page_count(pdf_path, poppler_path=POPPLER_PATH, backend=None):
     """
-    将PDF文件转换为图片
+    获取PDF的总页数（只读取文档信息，不渲染页面）
+    
+    参数:
+        pdf_path: PDF文件路径
+        poppler_path: poppler 可执行文件所在目录（仅 pdf2image 后端使用）
+        backend: 光栅化后端名称或实例，为None时自动选择，见 rasterizer.get_backend
+    """
+    return get_backend(backend, poppler_path).page_count(pdf_path)
+
+
+def probe_pdf(pdf_path, poppler_path=POPPLER_PATH, backend=None):
+    """
+    读取PDF的页数、每页尺寸和文档信息，不渲染任何页面
+    
+    参数:
+        pdf_path: PDF文件路径
+        poppler_path: poppler 可执行文件所在目录（仅 pdf2image 后端使用）
+        backend: 光栅化后端名称或实例，为None时自动选择
+    
+    返回:
+        字典: path、file_size（字节）、page_count、page_sizes（[(宽, 高)]，单位为点，1/72 英寸）、
+        metadata（标题、作者、创建时间等，只包含非空字段）
+    """
+    info = get_backend(backend, poppler_path).probe(pdf_path)
+    return {'path': pdf_path, 'file_size': os.path.getsize(pdf_path), **info}
+
+
+def parse_page_ranges(spec):
+    """
+    解析页码范围字符串
+    
+    例如 "1-5,20,40-" → [(1, 5), (20, 20), (40, None)]，None 表示到最后一页
+    
+    返回:
+        [(起始页, 结束页或None)] 列表，格式错误时抛出 ValueError
+    """
+    ranges = []
+    for part in spec.replace(' ', '').split(','):
+        if not part:
+            continue
+        first, separator, last = part.partition('-')
+        try:
+            first = int(first) if first else 1
+            last = (int(last) if last else None) if separator else first
+        except ValueError:
+            raise ValueError(f'无效的页码范围: {part}') from None
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f'无效的页码范围: {part}')
+        ranges.append((first, last))
+    if not ranges:
+        raise ValueError(f'页码范围为空: {spec!r}')
+    return ranges
+
+
+def resolve_pages(pages, page_count):
+    """
+    把页码选择展开为升序、去重的页码列表，超出文档的部分被忽略
+    
+    参数:
+        pages: None（全部页面）、页码范围字符串（见 parse_page_ranges）或页码列表
+        page_count: 文档总页数
+    
+    返回:
+        页码列表；选择了页面但都不在文档范围内时抛出 ValueError
+    """
+    if pages is None:
+        return list(range(1, page_count + 1))
+    if isinstance(pages, str):
+        selected = set()
+        for first, last in parse_page_ranges(pages):
+            selected.update(range(first, min(last or page_count, page_count) + 1))
+    else:
+        selected = {page for page in pages if 1 <= page <= page_count}
+    if not selected:
+        raise ValueError(f'所选页码不在文档范围内（共 {page_count} 页）: {pages}')
+    return sorted(selected)
+
+
+def iter_pdf_pages(pdf_path, dpi=200, window_size=DEFAULT_WINDOW_SIZE, poppler_path=POPPLER_PATH,
+                   first_page=1, last_page=None, backend=None, color_mode='rgb', pages=None):
+    """
+    按固定大小的页面窗口逐批渲染PDF，依次生成 (页码, 图片)
+    
+    每次只渲染 window_size 页，调用方处理完一页后该页即可被释放，
+    因此峰值内存由窗口大小决定，而不是由总页数决定。
+    进程内渲染的后端本身就是逐页渲染，不受窗口大小影响。
     
     参数:
         pdf_path: PDF文件路径
-        output_base_dir: 输出基础目录，如果为None则使用PDF所在目录
         dpi: 图片分辨率，默认200
+        window_size: 每批渲染的页数，为None或0时一次渲染整个区间
+        poppler_path: poppler 可执行文件所在目录（仅 pdf2image 后端使用）
+        first_page: 起始页码（从1开始）
+        last_page: 结束页码（包含），为None时渲染到最后一页
+        backend: 光栅化后端名称或实例，为None时自动选择
+        color_mode: 'rgb'、'gray'（灰度）或 'bilevel'（1位黑白）
+        pages: 只渲染这些页（页码范围字符串或页码列表），指定时忽略 first_page/last_page
+    """
+    backend = get_backend(backend, poppler_path)
+    if pages is not None:
+        selected = resolve_pages(pages, backend.page_count(pdf_path))
+        return _iter_ranges(backend, pdf_path, dpi, group_page_ranges(selected), window_size, color_mode)
+    if last_page is None:
+        last_page = backend.page_count(pdf_path)
+    return backend.iter_pages(pdf_path, dpi, first_page, last_page, window_size, color_mode)
+
+
+def _iter_ranges(backend, pdf_path, dpi, ranges, window_size, color_mode):
+    """依次渲染多个页码区间"""
+    for first_page, last_page in ranges:
+        yield from backend.iter_pages(pdf_path, dpi, first_page, last_page, window_size, color_mode)
+
+
+def thumbnail_dpi(page_size, size):
+    """使页面长边不超过 size 像素的 DPI，向下取到 0.01（缩略图 DPI 很低，取整数误差太大）"""
+    return max(0.01, int(size * 7200 / max(page_size)) / 100)
+
+
+def iter_thumbnails(pdf_path, size=DEFAULT_THUMBNAIL_SIZE, pages=None, poppler_path=POPPLER_PATH, backend=None,
+                    color_mode='rgb'):
+    """
+    以低分辨率渲染页面缩略图，依次生成 (页码, 图片)
+    
+    先读取页面尺寸，按每页尺寸算出刚好够用的 DPI 再渲染，
+    渲染量只有正常 DPI 的很小一部分，适合预览和抽查。
+    
+    参数:
+        pdf_path: PDF文件路径
+        size: 缩略图长边的最大像素数，默认256
+        pages: 页码范围字符串或页码列表，为None时渲染全部页面
+        poppler_path: poppler 可执行文件所在目录（仅 pdf2image 后端使用）
+        backend: 光栅化后端名称或实例，为None时自动选择
+        color_mode: 'rgb'、'gray' 或 'bilevel'
     """
+    backend = get_backend(backend, poppler_path)
+    info = backend.probe(pdf_path)
+    selected = resolve_pages(pages, info['page_count'])
+    # 尺寸相同的连续页面使用同一 DPI，合并为一次渲染调用
+    groups = []
+    for page in selected:
+        page_size = info['page_sizes'][page - 1]
+        dpi = thumbnail_dpi(page_size, size) if page_size else 72
+        if groups and groups[-1][0] == dpi and groups[-1][2] == page - 1:
+            groups[-1][2] = page
+        else:
+            groups.append([dpi, page, page])
+    for dpi, first_page, last_page in groups:
+        for page_number, image in backend.iter_pages(pdf_path, dpi, first_page, last_page, None, color_mode):
+            # 像素取整或页面尺寸未知时，再缩放到不超过 size
+            image.thumbnail((size, size))
+            yield page_number, image
+
+
+def group_page_ranges(pages):
+    """
+    把升序页码列表合并为连续区间
+    
+    例如 [1, 2, 3, 7, 9, 10] → [(1, 3), (7, 7), (9, 10)]
+    """
+    ranges = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+def split_ranges(ranges, range_count):
+    """把若干页码区间进一步切分，使总区间数接近 range_count，便于并行时均衡负载"""
+    total = sum(last - first + 1 for first, last in ranges)
+    if total == 0:
+        return []
+    chunk_size = max(1, -(-total // max(1, range_count)))
+    chunks = []
+    for first, last in ranges:
+        for chunk_first in range(first, last + 1, chunk_size):
+            chunks.append((chunk_first, min(chunk_first + chunk_size - 1, last)))
+    return chunks
+
+
+def page_file_name(page_number, output_format=None):
+    """页码对应的输出文件名，扩展名随输出格式变化，默认为 .png"""
+    return output_path_for(f'page_{page_number}.png', output_format)
+
+
+def _prepare_output_dir(pdf_path, output_base_dir, suffix=''):
+    """在输出基础目录下创建以PDF文件名（加上 suffix）命名的子目录，返回该目录"""
     # 获取PDF文件名（不含扩展名）
-    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0] + suffix
     
     # 如果没有指定输出基础目录，则使用PDF所在目录
     if output_base_dir is None:
         output_base_dir = os.path.dirname(pdf_path)
     
-    # 在输出基础目录下创建以PDF文件名命名的子目录
     output_dir = os.path.join(output_base_dir, pdf_name)
     
-    # 创建输出目录（如果不存在）
+    # 创建输出目录（如果不存在）；同一文档的多个区间可能在不同进程中同时创建
     if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f'已创建输出目录: {output_dir}')
+        os.makedirs(output_dir, exist_ok=True)
+        # 进度信息写到 stderr，stdout 留给调用方（例如 cli --json）
+        print(f'已创建输出目录: {output_dir}', file=sys.stderr)
+    return output_dir
+
+
+def _render_page_range(pdf_path, output_dir, dpi, first_page, last_page, window_size, backend,
+                       with_records=False, output_format=None, color_mode='rgb'):
+    """
+    进程池中的工作函数：渲染一个页码区间并直接写盘
+    
+    图片在子进程中保存，不经过进程间传递，只返回 [(页码, 文件记录或None), ...]。
+    with_records 为True时顺便计算输出文件的哈希记录，供增量清单使用。
+    """
+    saved_pages = []
+    pages = backend.iter_pages(pdf_path, dpi, first_page, last_page, window_size, color_mode)
+    for page_number, image in metrics.timed_iter(pages, 'render'):
+        image_path = os.path.join(output_dir, page_file_name(page_number, output_format))
+        save_image(image, image_path, output_format)
+        image.close()
+        saved_pages.append((page_number, describe_file(image_path) if with_records else None))
+    return saved_pages
+
+
+def _convert_parallel(pdf_path, output_dir, dpi, window_size, workers, ranges, on_saved, with_records,
+                      backend, output_format, color_mode):
+    """按页码区间把渲染任务分发到进程池，每保存一页调用 on_saved(页码, 文件记录)"""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            metrics.submit(executor, _render_page_range, pdf_path, output_dir, dpi,
+                           first_page, last_page, window_size, backend, with_records, output_format,
+                           color_mode)
+            for first_page, last_page in split_ranges(ranges, workers * RANGES_PER_WORKER)
+        ]
+        for future in as_completed(futures):
+            for page_number, record in metrics.merge_result(future.result()):
+                on_saved(page_number, record)
+    except BaseException:
+        # 出错或被取消时不再启动尚未开始的区间
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def render_thumbnails(pdf_path, output_base_dir=None, size=DEFAULT_THUMBNAIL_SIZE, pages=None, progress=None,
+                      backend=None, output_format=None, color_mode='rgb'):
+    """
+    把页面缩略图保存到 <输出基础目录>/<PDF文件名>_thumbnails/page_N.png，出错时直接抛出异常
+    
+    参数:
+        pdf_path: PDF文件路径
+        output_base_dir: 输出基础目录，如果为None则使用PDF所在目录
+        size: 缩略图长边的最大像素数，默认256
+        pages: 页码范围字符串或页码列表，为None时渲染全部页面
+        progress: 进度回调，签名为 progress(已完成页数, 总页数或None, 输出路径)
+        backend: 光栅化后端名称或实例，为None时自动选择
+        output_format: 输出格式名称或 image_output.OutputFormat，为None时保存为默认参数的PNG
+        color_mode: 'rgb'、'gray' 或 'bilevel'
+    
+    返回:
+        (保存的缩略图数, 输出目录)
+    """
+    output_dir = _prepare_output_dir(pdf_path, output_base_dir, '_thumbnails')
+    metrics.add_file_size('bytes_in', pdf_path)
+    count = 0
+    thumbnails = iter_thumbnails(pdf_path, size, pages, backend=backend, color_mode=color_mode)
+    for page_number, image in metrics.timed_iter(thumbnails, 'render'):
+        image_path = os.path.join(output_dir, page_file_name(page_number, output_format))
+        save_image(image, image_path, output_format)
+        image.close()
+        count += 1
+        metrics.add('pages')
+        metrics.add_file_size('bytes_out', image_path)
+        if progress:
+            progress(count, None, image_path)
+    return count, output_dir
+
+
+def render_pdf(pdf_path, output_base_dir=None, dpi=200, window_size=DEFAULT_WINDOW_SIZE, workers=1,
+               progress=None, incremental=False, backend=None, output_format=None, color_mode='rgb',
+               pages=None):
+    """
+    将PDF文件转换为图片，出错时直接抛出异常
+    
+    参数与 convert_pdf_to_images 相同，另外:
+        progress: 进度回调，签名为 progress(已完成页数, 总页数, 输出路径)
+    
+    返回:
+        (输出目录中已完成的页数, 输出目录)
+    """
+    output_dir = _prepare_output_dir(pdf_path, output_base_dir)
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    backend = get_backend(backend)
+    output_format = get_output_format(output_format)
+    selected = resolve_pages(pages, backend.page_count(pdf_path))
+    page_count = len(selected)
+    # 设置了内存预算时按最大一页的尺寸缩小窗口（或把窗口暂存到临时文件）并减少进程数
+    memory_plan = memory_budget.plan_pdf(pdf_path, dpi, color_mode, backend, workers, window_size)
+    workers, window_size = memory_plan.workers, memory_plan.window_size
+    backend = memory_budget.spill_backend(backend, memory_plan)
+    metrics.add_file_size('bytes_in', pdf_path)
+    ranges = group_page_ranges(selected)
+    manifest = None
+    manifest_key = os.path.basename(pdf_path)
+    done_count = 0
+    if incremental:
+        # 只渲染清单中缺失或已失效的页面
+        manifest = Manifest(output_dir)
+        format_params = output_format.params() if output_format else 'PNG'
+        params = {'dpi': dpi, 'format': format_params}
+        if color_mode != 'rgb':
+            params['color_mode'] = color_mode
+        done = manifest.prepare(manifest_key, pdf_path, params)
+        missing = [page for page in selected if page_file_name(page, output_format) not in done]
+        ranges = group_page_ranges(missing)
+        done_count = page_count - len(missing)
+    
+    def on_saved(page_number, record):
+        nonlocal done_count
+        done_count += 1
+        image_name = page_file_name(page_number, output_format)
+        image_path = os.path.join(output_dir, image_name)
+        metrics.add('pages')
+        metrics.add_file_size('bytes_out', image_path)
+        if manifest is not None:
+            manifest.add_output(manifest_key, image_name, image_path, record)
+        if progress:
+            progress(done_count, page_count, image_path)
     
     try:
-        # 指定 poppler 路径
-        poppler_path = r"C:\Program Files\poppler\poppler-24.08.0\Library\bin"
-        # 将PDF转换为图片
-        images = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path)
+        if workers > 1 and ranges:
+            _convert_parallel(pdf_path, output_dir, dpi, window_size, workers, ranges, on_saved,
+                              manifest is not None, backend, output_format, color_mode)
+        else:
+            # 逐页渲染并保存，保存后立即释放
+            for first_page, last_page in ranges:
+                pages = backend.iter_pages(pdf_path, dpi, first_page, last_page, window_size, color_mode)
+                for page_number, image in metrics.timed_iter(pages, 'render'):
+                    save_image(image, os.path.join(output_dir, page_file_name(page_number, output_format)),
+                               output_format)
+                    image.close()
+                    on_saved(page_number, None)
+    finally:
+        if manifest is not None:
+            manifest.save()
+    return done_count, output_dir
+
+
+@dataclass
+class RenderBatchResult(BatchResult):
+    """多个PDF批量渲染的汇总结果，files 中每项对应一个文档，output_path 为其输出目录"""
+    pages: int = 0
+    page_counts: dict = field(default_factory=dict)  # PDF路径 → 保存的页数
+
+    @property
+    def pages_per_sec(self):
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {**super().to_dict(), 'pages': self.pages, 'pages_per_sec': self.pages_per_sec,
+                'page_counts': dict(self.page_counts)}
+
+
+@dataclass
+class _BatchDocument:
+    """批量渲染中单个文档的进度"""
+    pdf_path: str
+    output_dir: str
+    remaining: int = 0  # 尚未完成的区间数
+    start: float = None
+    error: str = None
+
+
+def collect_pdf_documents(inputs, output_base_dir=None, recursive=True):
+    """
+    把输入的PDF文件和目录展开为文档列表
+
+    参数:
+        inputs: PDF文件或目录路径列表
+        output_base_dir: 输出基础目录；目录中的PDF在其下保持原有的子目录结构，
+                         为None时每个PDF输出到所在目录
+        recursive: 是否递归子目录
+
+    返回:
+        [(PDF路径, 该文档的输出基础目录或None), ...]，目录中的文件按文件名自然排序，
+        没有 .pdf 扩展名的文件按文件头识别
+    """
+    documents = []
+    for path in inputs:
+        if not os.path.isdir(path):
+            documents.append((path, output_base_dir))
+            continue
+        # 输出目录位于输入目录内时跳过其中的内容（例如上一次生成的PDF）
+        exclude = []
+        if output_base_dir is not None and os.path.abspath(output_base_dir) != os.path.abspath(path):
+            exclude.append(output_base_dir)
+        for rel_path, _ in scan_directory(path, PDF_EXTENSIONS, recursive, exclude, sniff=True):
+            base_dir = None
+            if output_base_dir is not None:
+                rel_dir = os.path.dirname(rel_path)
+                base_dir = os.path.join(output_base_dir, rel_dir) if rel_dir else output_base_dir
+            documents.append((os.path.join(path, rel_path), base_dir))
+    return documents
+
+
+def render_pdf_batch(documents, dpi=200, workers=None, window_size=DEFAULT_WINDOW_SIZE, progress=None,
+                     backend=None, output_format=None, color_mode='rgb', pages=None, on_document=None):
+    """
+    批量渲染多个PDF，所有文档的页面共用一个进程池
+
+    每个文档被切成不超过 BATCH_CHUNK_PAGES 页的区间，所有区间按文档页数从多到少排队，
+    同时提交给进程池的区间不超过 workers 的两倍。大文档先开始，小文档的区间填补
+    大文档收尾时空出来的进程，整批的CPU占用保持在 workers 个核心。
+    单个文档出错（打不开、页码超出范围等）只影响该文档。
+
+    参数:
+        documents: [(PDF路径, 输出基础目录或None), ...]，见 collect_pdf_documents；也可以直接传PDF路径列表
+        dpi、window_size、backend、output_format、color_mode、pages: 见 convert_pdf_to_images，对每个文档相同
+        workers: 进程数，为None时使用全部CPU核心
+        progress: 进度回调，签名为 progress(已完成页数, 总页数, 输出路径)
+        on_document: 每个文档完成（或失败）时调用，参数为 batch_executor.FileResult
+
+    返回:
+        RenderBatchResult
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    backend = get_backend(backend)
+    output_format = get_output_format(output_format)
+    pdf_paths = [item if isinstance(item, str) else item[0] for item in documents]
+    memory_plan = memory_budget.plan_pdf(pdf_paths, dpi, color_mode, backend, workers, window_size)
+    workers, window_size = memory_plan.workers, memory_plan.window_size
+    backend = memory_budget.spill_backend(backend, memory_plan)
+    result = RenderBatchResult(workers=workers)
+    start = time.perf_counter()
+    
+    chunks = []
+    for item in documents:
+        pdf_path, output_base_dir = (item, None) if isinstance(item, str) else item
+        try:
+            selected = resolve_pages(pages, backend.page_count(pdf_path))
+            output_dir = _prepare_output_dir(pdf_path, output_base_dir)
+        except Exception as e:
+            file_result = FileResult(pdf_path, None, 'failed', 0.0, str(e))
+            result.files.append(file_result)
+            if on_document:
+                on_document(file_result)
+            continue
+        metrics.add_file_size('bytes_in', pdf_path)
+        document = _BatchDocument(pdf_path, output_dir)
+        for first_page, last_page in split_ranges(group_page_ranges(selected),
+                                                  -(-len(selected) // BATCH_CHUNK_PAGES)):
+            chunks.append((document, first_page, last_page))
+            document.remaining += 1
+    # 页数多的文档排在前面（稳定排序，同一文档的区间保持页码顺序）
+    chunks.sort(key=lambda chunk: -chunk[0].remaining)
+    total_pages = sum(last - first + 1 for _, first, last in chunks)
+    
+    def finish_chunk(document, saved_pages, error=None):
+        for page_number, _ in saved_pages:
+            result.pages += 1
+            result.page_counts[document.pdf_path] = result.page_counts.get(document.pdf_path, 0) + 1
+            image_path = os.path.join(document.output_dir, page_file_name(page_number, output_format))
+            metrics.add('pages')
+            metrics.add_file_size('bytes_out', image_path)
+            if progress:
+                progress(result.pages, total_pages, image_path)
+        if document.error is None:
+            document.error = error
+        document.remaining -= 1
+        if document.remaining == 0:
+            status = 'failed' if document.error else 'processed'
+            file_result = FileResult(document.pdf_path, document.output_dir, status,
+                                     time.perf_counter() - document.start, document.error)
+            result.files.append(file_result)
+            metrics.add('documents')
+            if on_document:
+                on_document(file_result)
+    
+    def chunk_args(document, first_page, last_page):
+        if document.start is None:
+            document.start = time.perf_counter()
+        return (document.pdf_path, document.output_dir, dpi, first_page, last_page, window_size, backend, False,
+                output_format, color_mode)
+    
+    if workers > 1 and len(chunks) > 1:
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
         
-        # 保存每一页为单独的图片
-        for i, image in enumerate(images):
-            image_path = os.path.join(output_dir, f'page_{i+1}.png')
-            image.save(image_path, 'PNG')
-            print(f'已保存第 {i+1} 页到: {image_path}')
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+        running = {}
+        chunk_iter = iter(chunks)
+        try:
+            while True:
+                while len(running) < workers * 2:
+                    chunk = next(chunk_iter, None)
+                    if chunk is None:
+                        break
+                    document = chunk[0]
+                    if document.error is not None:
+                        # 文档已出错，不再渲染其余区间
+                        finish_chunk(document, [])
+                        continue
+                    future = metrics.submit(executor, _render_page_range, *chunk_args(*chunk))
+                    running[future] = document
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    document = running.pop(future)
+                    try:
+                        saved_pages = metrics.merge_result(future.result())
+                    except Exception as e:
+                        finish_chunk(document, [], str(e))
+                    else:
+                        finish_chunk(document, saved_pages)
+        except BaseException:
+            # 出错或被取消时不再启动尚未开始的区间
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown()
+    else:
+        for document, first_page, last_page in chunks:
+            if document.error is not None:
+                finish_chunk(document, [])
+                continue
+            try:
+                saved_pages = _render_page_range(*chunk_args(document, first_page, last_page))
+            except Exception as e:
+                finish_chunk(document, [], str(e))
+            else:
+                finish_chunk(document, saved_pages)
+    
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def convert_pdf_to_images(pdf_path, output_base_dir=None, dpi=200, window_size=DEFAULT_WINDOW_SIZE,
+                          workers=1, incremental=False, backend=None, output_format=None, color_mode='rgb',
+                          pages=None):
+    """
+    将PDF文件转换为图片
+    
+    页面按窗口流式渲染，每渲染出一页就立即保存并释放。
+    workers 大于1时，文档被切分成多个页码区间，在进程池中并行渲染，
+    输出文件名与单进程模式完全相同。
+    
+    参数:
+        pdf_path: PDF文件路径
+        output_base_dir: 输出基础目录，如果为None则使用PDF所在目录
+        dpi: 图片分辨率，默认200
+        window_size: 每批渲染的页数，为None或0时一次渲染整个文档
+        workers: 并行渲染的进程数，默认1；为None时使用全部CPU核心。
+                 设置了内存预算（见 memory_budget）时进程数和窗口会按页面大小自动减少
+        incremental: 为True时根据输出目录中的清单跳过已是最新的页面，
+                     并从中断处继续未完成的转换
+        backend: 光栅化后端名称（pdf2image / pypdfium2 / pymupdf）或实例，
+                 为None时自动选择，见 rasterizer.get_backend
+        output_format: 输出格式名称或 image_output.OutputFormat，为None时保存为默认参数的PNG
+        color_mode: 'rgb'（默认）、'gray'（灰度）或 'bilevel'（1位黑白），
+                    黑白文字文档用后两种可大幅减少内存和文件大小
+        pages: 只转换这些页，可以是页码范围字符串（如 "1-5,20,40-"）或页码列表，为None时转换全部页面
+    
+    返回:
+        成功保存的页数
+    """
+    def report(saved_count, page_count, image_path):
+        print(f'已保存 {saved_count}/{page_count} 页: {image_path}')
+    
+    saved_count = 0
+    try:
+        with memory_budget.track_peak_rss() as memory:
+            saved_count, output_dir = render_pdf(pdf_path, output_base_dir, dpi, window_size, workers, report,
+                                                 incremental, backend, output_format, color_mode, pages)
             
-        print(f'转换完成！共转换 {len(images)} 页')
+        print(f'转换完成！共转换 {saved_count} 页')
         print(f'所有图片已保存到目录: {output_dir}')
+        print(memory.describe())
         
     except Exception as e:
         print(f'转换过程中出现错误: {str(e)}')
+    
+    return saved_count
 
 if __name__ == '__main__':
     # 示例使用
@@ -0,0 +1,338 @@
+"""
+逐页写入的图片合并PDF引擎
+
+每添加一页就立即把该页的图片和页面对象写入文件，内存占用与总页数无关：
+- JPEG 文件直接作为 DCTDecode 数据流原样写入，不解码也不重新编码
+- 非隔行扫描、无透明通道的 PNG 直接搬运其压缩数据（FlateDecode + PNG 预测器）
+- 其他图片才解码后以 FlateDecode 无损压缩写入
+"""
+import os
+import struct
+import zlib
+
+import metrics
+from file_scanner import IMAGE_EXTENSIONS, list_files
+from page_class import is_blank_file, is_gray, two_color_index, two_colors
+
+# 复制文件数据时的块大小
+COPY_CHUNK_SIZE = 1 << 20
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG 颜色类型 → (PDF 颜色空间, 通道数)，3 为调色板
+_PNG_COLOR_TYPES = {0: ('/DeviceGray', 1), 2: ('/DeviceRGB', 3), 3: (None, 1)}
+
+# JPEG 可以直接写入的模式
+_JPEG_COLOR_SPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB'}
+
+def list_images(input_dir, extensions=IMAGE_EXTENSIONS, recursive=False):
+    """获取目录中的所有图片文件路径（没有扩展名的图片按文件头识别），按文件名自然排序"""
+    return list_files(input_dir, extensions, recursive)
+
+
+def _read_png_layout(path):
+    """
+    读取 PNG 的块结构（只读块头，不读像素数据）
+
+    返回:
+        可以直接写入时返回 (宽, 高, 位深, 颜色类型, 调色板, [(IDAT偏移, 长度), ...])，
+        否则返回 None
+    """
+    with open(path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        header = None
+        palette = None
+        idat_chunks = []
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            length, chunk_type = struct.unpack('>I4s', chunk_header)
+            if chunk_type == b'IHDR':
+                header = struct.unpack('>IIBBBBB', f.read(13))
+                f.seek(4, os.SEEK_CUR)
+            elif chunk_type == b'PLTE':
+                palette = f.read(length)
+                f.seek(4, os.SEEK_CUR)
+            elif chunk_type == b'IDAT':
+                idat_chunks.append((f.tell(), length))
+                f.seek(length + 4, os.SEEK_CUR)
+            elif chunk_type == b'IEND':
+                break
+            else:
+                f.seek(length + 4, os.SEEK_CUR)
+
+    if header is None or not idat_chunks:
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = header
+    # 带透明通道、隔行扫描或16位的图片需要解码处理
+    if color_type not in _PNG_COLOR_TYPES or interlace or bit_depth > 8:
+        return None
+    if color_type == 3 and not palette:
+        return None
+    return width, height, bit_depth, color_type, palette, idat_chunks
+
+
+class StreamingPdfWriter:
+    """
+    逐页写入图片的PDF写入器
+
+    用法:
+        with StreamingPdfWriter('输出.pdf') as writer:
+            writer.add_image_file('page_1.jpg')
+            writer.add_image(pil_image)
+    """
+
+    def __init__(self, output_file, resolution=72.0):
+        """
+        参数:
+            output_file: 输出PDF文件路径
+            resolution: 图片分辨率，用于计算页面尺寸，默认72（1像素=1点）
+        """
+        self.output_file = output_file
+        self.resolution = resolution
+        self.page_count = 0
+        self._file = open(output_file, 'wb')
+        self._offsets = {}
+        self._page_ids = []
+        # 1 号对象为文档目录，2 号对象为页面树（在关闭时写入）
+        self._next_id = 3
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _allocate(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _begin_object(self, object_id):
+        self._offsets[object_id] = self._file.tell()
+        self._file.write(f'{object_id} 0 obj\n'.encode('ascii'))
+
+    def _write_object(self, object_id, body):
+        self._begin_object(object_id)
+        self._file.write(body)
+        self._file.write(b'\nendobj\n')
+
+    def _write_stream(self, object_id, dictionary, chunks):
+        """
+        写入数据流对象，数据按块写入，长度写在随后的单独对象中
+
+        参数:
+            dictionary: 数据流字典的内容（不含 /Length 和外层尖括号）
+            chunks: 产生数据块的可迭代对象
+        """
+        length_id = self._allocate()
+        self._begin_object(object_id)
+        self._file.write(f'<< {dictionary} /Length {length_id} 0 R >>\nstream\n'.encode('ascii'))
+        length = 0
+        with metrics.stage('write'):
+            for chunk in chunks:
+                self._file.write(chunk)
+                length += len(chunk)
+        self._file.write(b'\nendstream\nendobj\n')
+        self._write_object(length_id, str(length).encode('ascii'))
+
+    def _add_page(self, width, height, image_id):
+        """写入引用图片对象的内容流和页面对象"""
+        page_width = width * 72.0 / self.resolution
+        page_height = height * 72.0 / self.resolution
+        content = f'q {page_width:.4f} 0 0 {page_height:.4f} 0 0 cm /Im0 Do Q'.encode('ascii')
+        content_id = self._allocate()
+        self._write_stream(content_id, '', [content])
+
+        page_id = self._allocate()
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent 2 0 R '
+            f'/MediaBox [0 0 {page_width:.4f} {page_height:.4f}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>'
+        ).encode('ascii'))
+        self._page_ids.append(page_id)
+        self.page_count += 1
+        metrics.add('pages')
+
+    def _copy_file_ranges(self, path, ranges):
+        """按块读取文件中的若干区间"""
+        with open(path, 'rb') as f:
+            for offset, length in ranges:
+                f.seek(offset)
+                while length > 0:
+                    chunk = f.read(min(length, COPY_CHUNK_SIZE))
+                    if not chunk:
+                        raise Exception(f'文件意外结束: {path}')
+                    length -= len(chunk)
+                    yield chunk
+
+    def _add_jpeg(self, path, width, height, mode):
+        image_id = self._allocate()
+        dictionary = (f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                      f'/ColorSpace {_JPEG_COLOR_SPACES[mode]} /BitsPerComponent 8 /Filter /DCTDecode')
+        self._write_stream(image_id, dictionary,
+                           self._copy_file_ranges(path, [(0, os.path.getsize(path))]))
+        self._add_page(width, height, image_id)
+
+    def _add_png(self, path, layout):
+        width, height, bit_depth, color_type, palette, idat_chunks = layout
+        color_space, colors = _PNG_COLOR_TYPES[color_type]
+        if color_type == 3:
+            color_space = f'[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]'
+        image_id = self._allocate()
+        dictionary = (f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                      f'/ColorSpace {color_space} /BitsPerComponent {bit_depth} /Filter /FlateDecode '
+                      f'/DecodeParms << /Predictor 15 /Colors {colors} '
+                      f'/BitsPerComponent {bit_depth} /Columns {width} >>')
+        self._write_stream(image_id, dictionary, self._copy_file_ranges(path, idat_chunks))
+        self._add_page(width, height, image_id)
+
+    def add_image(self, img):
+        """
+        添加一张已解码的 PIL 图片作为新的一页
+
+        灰度、黑白和调色板图片保持原有模式；其他模式转换为RGB，其中只有两种颜色的页面
+        写成 1 位的两色调色板图片，纯灰度的页面写成 8 位灰度，都是无损的，数据量只有RGB的 1/24 和 1/3。
+        """
+        from PIL import Image
+
+        if img.mode == '1':
+            color_space, bits = '/DeviceGray', 1
+        elif img.mode == 'L':
+            color_space, bits = '/DeviceGray', 8
+        elif img.mode == 'P' and img.palette.mode == 'RGB' and 'transparency' not in img.info:
+            # 调色板补足256项，保证所有索引都有对应颜色
+            palette = bytes(img.getpalette()).ljust(768, b'\0')[:768]
+            color_space, bits = f'[/Indexed /DeviceRGB 255 <{palette.hex()}>]', 8
+        else:
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            colors = two_colors(img)
+            if colors is not None:
+                palette = bytes(colors[0] + colors[-1])
+                if len(colors) == 2:
+                    img = two_color_index(img, colors, (0, 255)).convert('1', dither=Image.Dither.NONE)
+                else:
+                    img = Image.new('1', img.size, 0)
+                color_space, bits = f'[/Indexed /DeviceRGB 1 <{palette.hex()}>]', 1
+                metrics.add('pdf_pages_bilevel')
+            elif is_gray(img):
+                img = img.getchannel(0)
+                color_space, bits = '/DeviceGray', 8
+                metrics.add('pdf_pages_gray')
+            else:
+                color_space, bits = '/DeviceRGB', 8
+
+        width, height = img.size
+        image_id = self._allocate()
+        dictionary = (f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                      f'/ColorSpace {color_space} /BitsPerComponent {bits} /Filter /FlateDecode')
+        self._write_stream(image_id, dictionary, self._compress_rows(img))
+        self._add_page(width, height, image_id)
+
+    def _compress_rows(self, img):
+        """按行块压缩图片数据，避免一次性生成整幅的压缩副本"""
+        compressor = zlib.compressobj(6)
+        width, height = img.size
+        row_bytes = (width + 7) // 8 if img.mode == '1' else width * len(img.getbands())
+        rows_per_chunk = max(1, COPY_CHUNK_SIZE // max(1, row_bytes))
+        for top in range(0, height, rows_per_chunk):
+            strip = img.crop((0, top, width, min(top + rows_per_chunk, height)))
+            data = compressor.compress(strip.tobytes())
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def add_image_file(self, path):
+        """
+        添加一个图片文件作为新的一页
+
+        JPEG 与普通 PNG 直接搬运压缩数据，其他情况解码后写入。
+        """
+        from PIL import Image
+
+        metrics.add_file_size('bytes_in', path)
+        with Image.open(path) as img:
+            # Image.open 只读取文件头，此时尚未解码像素
+            image_format = img.format
+            width, height = img.size
+            mode = img.mode
+            if image_format == 'JPEG' and mode in _JPEG_COLOR_SPACES:
+                self._add_jpeg(path, width, height, mode)
+                return
+            if image_format == 'PNG':
+                layout = _read_png_layout(path)
+                if layout is not None:
+                    self._add_png(path, layout)
+                    return
+            with metrics.stage('decode'):
+                img.load()
+            self.add_image(img)
+
+    def close(self):
+        """写入页面树、交叉引用表和文件尾，并关闭文件"""
+        if self._file is None:
+            return
+        if not self._page_ids:
+            self.abort()
+            raise Exception("未找到任何图片文件")
+
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._page_ids)
+        self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>'.encode('ascii'))
+
+        xref_offset = self._file.tell()
+        size = self._next_id
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for object_id in range(1, size):
+            lines.append(f'{self._offsets[object_id]:010d} 00000 n \n')
+        lines.append(f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n')
+        self._file.write(''.join(lines).encode('ascii'))
+        self._file.close()
+        self._file = None
+        metrics.add_file_size('bytes_out', self.output_file)
+
+    def abort(self):
+        """放弃写入并删除未完成的文件"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
+
+
+def merge_images_to_pdf(image_paths, output_file, progress=None, skip_blank=False):
+    """
+    把图片逐页合并为一个PDF文件
+
+    参数:
+        image_paths: 图片路径列表，按页面顺序排列
+        output_file: 输出PDF文件路径
+        progress: 进度回调，签名为 progress(已处理数, 总数, 图片路径)
+        skip_blank: 为True时不写入空白页（见 page_class.is_blank），需要额外解码一次缩小的图片
+
+    返回:
+        合并的页数
+    """
+    with StreamingPdfWriter(output_file) as writer:
+        for done, path in enumerate(image_paths, 1):
+            if skip_blank and is_blank_file(path):
+                metrics.add('pages_blank')
+            else:
+                writer.add_image_file(path)
+            if progress:
+                progress(done, len(image_paths), path)
+    return writer.page_count
+
+
+def merge_directory_to_pdf(input_dir, output_file, progress=None, skip_blank=False):
+    """把目录中的所有图片按文件名自然排序后合并为一个PDF文件，返回合并的页数"""
+    return merge_images_to_pdf(list_images(input_dir), output_file, progress, skip_blank)
@@ -0,0 +1,191 @@
+"""
+PDF 渲染 → 颜色处理 → 输出 的单遍流水线
+
+每一页只渲染一次、编码一次，渲染出的图片在内存中直接交给后续处理步骤，
+不再先写出中间 PNG 再重新读取解码。
+
+命令行入口见 cli.py:
+    python cli.py render 文档.pdf --recolor -o 输出目录
+    python cli.py render 文档.pdf --invert --pdf -o 输出目录
+"""
+import os
+
+import memory_budget
+import metrics
+
+from color_map import remap_image
+from image_invert import invert_image
+from image_output import output_path_for, save_image
+from page_class import is_blank
+from pdf_writer import StreamingPdfWriter
+from pdf_to_image import DEFAULT_WINDOW_SIZE, iter_pdf_pages
+from rasterizer import get_backend
+
+
+def recolor_stage(color_map=None, tolerance=0, mode='exact'):
+    """
+    颜色映射步骤
+
+    参数与 color_map.remap_image 相同
+    """
+    def stage(img):
+        return remap_image(img, color_map, tolerance, mode)
+    return stage
+
+
+def invert_stage():
+    """颜色反转步骤"""
+    return invert_image
+
+
+class ImageDirectorySink:
+    """把每一页保存为目录中的单独图片，output_format 为输出格式名称或 image_output.OutputFormat"""
+
+    def __init__(self, output_dir, name_pattern='page_{page}.png', output_format=None):
+        self.output_dir = output_dir
+        self.name_pattern = output_path_for(name_pattern, output_format)
+        self.output_format = output_format
+        self.count = 0
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+    def write(self, page_number, img):
+        image_path = os.path.join(self.output_dir, self.name_pattern.format(page=page_number))
+        save_image(img, image_path, self.output_format)
+        metrics.add('pages')
+        metrics.add_file_size('bytes_out', image_path)
+        self.count += 1
+        return image_path
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+class PdfSink:
+    """把所有页面逐页写入一个PDF文件，skip_blank 为True时不写入空白页"""
+
+    def __init__(self, output_file, skip_blank=False):
+        self.output_file = output_file
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        self.writer = StreamingPdfWriter(output_file)
+        self.skip_blank = skip_blank
+        self.count = 0
+
+    def write(self, page_number, img):
+        if self.skip_blank and is_blank(img):
+            metrics.add('pages_blank')
+            return self.output_file
+        self.writer.add_image(img)
+        self.count += 1
+        return self.output_file
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
+
+
+def run_pipeline(pdf_path, stages, sink, dpi=200, window_size=DEFAULT_WINDOW_SIZE, progress=None,
+                 backend=None, color_mode='rgb', pages=None):
+    """
+    执行流水线：逐页渲染PDF，依次经过各处理步骤后交给输出端
+
+    参数:
+        pdf_path: PDF文件路径
+        stages: 处理步骤列表，每个步骤是接收并返回 PIL 图片的函数
+        sink: 输出端，需提供 write(页码, 图片)、close() 和 abort()
+        dpi: 渲染分辨率，默认200
+        window_size: 每批渲染的页数
+        progress: 进度回调，签名为 progress(已处理页数, 总页数或None, 输出路径)
+        backend: 光栅化后端名称或实例，为None时自动选择
+        color_mode: 渲染颜色模式，'rgb'、'gray' 或 'bilevel'；灰度/黑白页面在各步骤中保持紧凑模式，
+                    颜色转换时才展开为调色板颜色
+        pages: 只处理这些页（页码范围字符串或页码列表），为None时处理全部页面
+
+    返回:
+        处理的页数
+    """
+    try:
+        rendered = iter_pdf_pages(pdf_path, dpi, window_size, backend=backend, color_mode=color_mode, pages=pages)
+        for page_number, img in metrics.timed_iter(rendered, 'render'):
+            with metrics.stage('transform'):
+                for stage in stages:
+                    img = stage(img)
+            output_path = sink.write(page_number, img)
+            if progress:
+                progress(sink.count, None, output_path)
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+    return sink.count
+
+
+def build_stages(recolor=False, invert=False, color_map=None, tolerance=0, mode='exact'):
+    """按选项组装处理步骤，颜色映射在反转之前执行"""
+    stages = []
+    if recolor:
+        stages.append(recolor_stage(color_map, tolerance, mode))
+    if invert:
+        stages.append(invert_stage())
+    return stages
+
+
+def build_sink(pdf_path, output_base_dir=None, merge_to_pdf=False, output_format=None, skip_blank=False):
+    """
+    按 process_pdf 的约定创建输出端
+
+    返回:
+        (输出端, 输出路径)：合并为PDF时是 <文件名>_processed.pdf，否则是 <文件名> 目录
+    """
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    if not output_base_dir:
+        output_base_dir = os.path.dirname(pdf_path)
+    if merge_to_pdf:
+        sink = PdfSink(os.path.join(output_base_dir, f'{pdf_name}_processed.pdf'), skip_blank)
+        return sink, sink.output_file
+    sink = ImageDirectorySink(os.path.join(output_base_dir, pdf_name), output_format=output_format)
+    return sink, sink.output_dir
+
+
+def process_pdf(pdf_path, output_base_dir=None, dpi=200, recolor=False, invert=False, merge_to_pdf=False,
+                color_map=None, tolerance=0, mode='exact', progress=None, backend=None, output_format=None,
+                color_mode='rgb', pages=None, skip_blank=False):
+    """
+    按常用选项执行流水线
+
+    参数:
+        pdf_path: PDF文件路径
+        output_base_dir: 输出基础目录，如果为None则使用PDF所在目录
+        dpi: 渲染分辨率，默认200
+        recolor: 是否执行颜色转换
+        invert: 是否反转颜色
+        merge_to_pdf: 为True时输出为 <文件名>_processed.pdf，否则输出到 <文件名>/page_N.png
+        color_map: {源颜色: 目标颜色} 字典，为None时使用默认配色
+        tolerance: 颜色匹配容差
+        mode: 颜色映射模式，'exact' 或 'gradient'
+        progress: 进度回调
+        backend: 光栅化后端名称或实例，为None时自动选择
+        output_format: 图片输出格式，合并为PDF时不使用
+        color_mode: 渲染颜色模式，'rgb'、'gray' 或 'bilevel'
+        pages: 只处理这些页（页码范围字符串或页码列表），为None时处理全部页面
+        skip_blank: 合并为PDF时不写入空白页
+
+    设置了内存预算（见 memory_budget）时按页面大小缩小渲染窗口，必要时把窗口暂存到临时文件。
+
+    返回:
+        (输出的页数, 输出路径)
+    """
+    stages = build_stages(recolor, invert, color_map, tolerance, mode)
+    sink, output_path = build_sink(pdf_path, output_base_dir, merge_to_pdf, output_format, skip_blank)
+    backend = get_backend(backend)
+    memory_plan = memory_budget.plan_pdf(pdf_path, dpi, color_mode, backend, 1, DEFAULT_WINDOW_SIZE)
+    return run_pipeline(pdf_path, stages, sink, dpi, memory_plan.window_size, progress,
+                        memory_budget.spill_backend(backend, memory_plan), color_mode, pages), output_path
+
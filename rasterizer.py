@@ -0,0 +1,261 @@
+"""
+PDF 光栅化后端
+
+pdf2image 通过 poppler 的 pdftoppm 子进程渲染，每批页面都要启动进程并经过临时文件中转；
+pypdfium2 / PyMuPDF 在当前进程内渲染，直接返回像素数据。所有后端提供相同的接口:
+
+    backend.page_count(pdf_path)
+    backend.probe(pdf_path) → {'page_count', 'page_sizes', 'metadata'}（只读取文档结构，不渲染）
+    backend.iter_pages(pdf_path, dpi, first_page, last_page, window_size, color_mode) → (页码, PIL 图片)
+
+color_mode 为 'rgb'（默认）、'gray'（8 位灰度，L 模式）或 'bilevel'（1 位黑白）。
+灰度/黑白页面的像素数据只有 RGB 的 1/3 或 1/24，适合黑白文字文档。
+
+后端按以下顺序选择：显式传入的名称 → 环境变量 PDF_TOOLS_RASTERIZER → 自动检测
+（已安装的进程内渲染器优先，否则使用 pdf2image）。
+"""
+import os
+
+# poppler 路径：Windows 下使用随工具分发的 poppler，其他系统从 PATH 中查找 pdftoppm
+WINDOWS_POPPLER_PATH = r"C:\Program Files\poppler\poppler-24.08.0\Library\bin"
+POPPLER_PATH = WINDOWS_POPPLER_PATH if os.name == 'nt' else None
+
+# 指定后端的环境变量，取值为 BACKENDS 中的名称或 auto
+BACKEND_ENV = 'PDF_TOOLS_RASTERIZER'
+
+# 未指定窗口大小时 pdf2image 每次调用渲染的页数
+DEFAULT_WINDOW_SIZE = 4
+
+# 渲染颜色模式
+COLOR_MODES = ('rgb', 'gray', 'bilevel')
+
+# probe 返回的文档信息字段（PDF 文档信息字典中的标准键）
+METADATA_KEYS = ('Title', 'Author', 'Subject', 'Keywords', 'Creator', 'Producer', 'CreationDate', 'ModDate')
+
+
+def _finish_color_mode(image, color_mode):
+    """后端只能输出灰度时，在这里完成到黑白的转换"""
+    if color_mode == 'bilevel':
+        from image_output import to_bilevel
+
+        return to_bilevel(image)
+    return image
+
+
+class Pdf2ImageBackend:
+    """
+    通过 poppler 子进程渲染（pdf2image）
+
+    spill 为True时每个窗口先由 poppler 直接写入临时目录，再逐页从磁盘读取，
+    窗口再大内存中也只有正在交出的一页（见 memory_budget）。
+    """
+
+    name = 'pdf2image'
+
+    def __init__(self, poppler_path=POPPLER_PATH, spill=False):
+        self.poppler_path = poppler_path
+        self.spill = spill
+
+    def page_count(self, pdf_path):
+        from pdf2image import pdfinfo_from_path
+
+        info = pdfinfo_from_path(pdf_path, poppler_path=self.poppler_path)
+        return int(info['Pages'])
+
+    def probe(self, pdf_path):
+        import re
+        from pdf2image import pdfinfo_from_path
+
+        info = pdfinfo_from_path(pdf_path, poppler_path=self.poppler_path)
+        page_count = int(info['Pages'])
+        size_re = re.compile(r'([0-9.]+) x ([0-9.]+)')
+        page_sizes = []
+        if page_count > 1:
+            # 指定页码范围时 pdfinfo 逐页输出 "Page    N size: 宽 x 高 pts"
+            ranged = pdfinfo_from_path(pdf_path, poppler_path=self.poppler_path, first_page=1,
+                                       last_page=page_count)
+            for page in range(1, page_count + 1):
+                match = size_re.match(ranged.get(f'Page {page:4d} size', ''))
+                if match is None:
+                    page_sizes = []
+                    break
+                page_sizes.append((float(match.group(1)), float(match.group(2))))
+        if not page_sizes:
+            # 只能拿到第一页的尺寸时，假定所有页面相同
+            match = size_re.match(info.get('Page size', ''))
+            size = (float(match.group(1)), float(match.group(2))) if match else None
+            page_sizes = [size] * page_count
+        metadata = {key: str(info[key]) for key in METADATA_KEYS if info.get(key)}
+        return {'page_count': page_count, 'page_sizes': page_sizes, 'metadata': metadata}
+
+    def iter_pages(self, pdf_path, dpi, first_page, last_page, window_size=DEFAULT_WINDOW_SIZE,
+                   color_mode='rgb'):
+        from pdf2image import convert_from_path
+
+        if not window_size:
+            window_size = max(last_page - first_page + 1, 1)
+        for window_first in range(first_page, last_page + 1, window_size):
+            window_last = min(window_first + window_size - 1, last_page)
+            if self.spill:
+                yield from self._iter_spilled(pdf_path, dpi, window_first, window_last, color_mode)
+                continue
+            images = convert_from_path(pdf_path, dpi=dpi, first_page=window_first,
+                                       last_page=window_last, poppler_path=self.poppler_path,
+                                       grayscale=color_mode != 'rgb')
+            # 倒序后逐个弹出，交出去的页面不再被列表引用
+            images.reverse()
+            page_number = window_first
+            while images:
+                yield page_number, _finish_color_mode(images.pop(), color_mode)
+                page_number += 1
+
+    def _iter_spilled(self, pdf_path, dpi, first_page, last_page, color_mode):
+        """把一个窗口渲染为临时目录中的 PPM 文件，逐页读入后立即删除"""
+        import tempfile
+        from pdf2image import convert_from_path
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory(prefix='pdf_spill_') as folder:
+            paths = convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page,
+                                      poppler_path=self.poppler_path, grayscale=color_mode != 'rgb',
+                                      output_folder=folder, paths_only=True)
+            for page_number, path in enumerate(sorted(paths), first_page):
+                with Image.open(path) as image:
+                    image.load()
+                os.remove(path)
+                yield page_number, _finish_color_mode(image, color_mode)
+
+
+class PdfiumBackend:
+    """在当前进程内用 pypdfium2 渲染，逐页返回，不需要窗口"""
+
+    name = 'pypdfium2'
+
+    def page_count(self, pdf_path):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    def probe(self, pdf_path):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            page_sizes = [document.get_page_size(index) for index in range(len(document))]
+            metadata = {key: value for key, value in document.get_metadata_dict().items()
+                        if key in METADATA_KEYS and value}
+            return {'page_count': len(page_sizes), 'page_sizes': page_sizes, 'metadata': metadata}
+        finally:
+            document.close()
+
+    def iter_pages(self, pdf_path, dpi, first_page, last_page, window_size=None, color_mode='rgb'):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            for page_number in range(first_page, last_page + 1):
+                page = document[page_number - 1]
+                try:
+                    image = page.render(scale=dpi / 72, grayscale=color_mode != 'rgb').to_pil()
+                finally:
+                    page.close()
+                yield page_number, _finish_color_mode(image, color_mode)
+        finally:
+            document.close()
+
+
+class PyMuPDFBackend:
+    """在当前进程内用 PyMuPDF 渲染，逐页返回，不需要窗口"""
+
+    name = 'pymupdf'
+
+    def page_count(self, pdf_path):
+        import fitz
+
+        with fitz.open(pdf_path) as document:
+            return document.page_count
+
+    def probe(self, pdf_path):
+        import fitz
+
+        with fitz.open(pdf_path) as document:
+            page_sizes = [(page.rect.width, page.rect.height) for page in document]
+            # PyMuPDF 的键是小写开头的（title、creationDate），换成 PDF 标准键名
+            metadata = {}
+            for key in METADATA_KEYS:
+                value = (document.metadata or {}).get(key[0].lower() + key[1:])
+                if value:
+                    metadata[key] = value
+            return {'page_count': document.page_count, 'page_sizes': page_sizes, 'metadata': metadata}
+
+    def iter_pages(self, pdf_path, dpi, first_page, last_page, window_size=None, color_mode='rgb'):
+        import fitz
+        from PIL import Image
+
+        gray = color_mode != 'rgb'
+        colorspace = fitz.csGRAY if gray else fitz.csRGB
+        with fitz.open(pdf_path) as document:
+            for page_number in range(first_page, last_page + 1):
+                pixmap = document[page_number - 1].get_pixmap(dpi=dpi, colorspace=colorspace)
+                image = Image.frombytes('L' if gray else 'RGB', (pixmap.width, pixmap.height), pixmap.samples)
+                yield page_number, _finish_color_mode(image, color_mode)
+
+
+# 后端名称 → (后端类, 需要能导入的模块)，自动检测时按此顺序尝试
+BACKENDS = {
+    'pypdfium2': (PdfiumBackend, 'pypdfium2'),
+    'pymupdf': (PyMuPDFBackend, 'fitz'),
+    'pdf2image': (Pdf2ImageBackend, 'pdf2image'),
+}
+
+
+def _poppler_installed(poppler_path=POPPLER_PATH):
+    """pdf2image 还需要 poppler 的命令行工具"""
+    import shutil
+
+    return shutil.which('pdftoppm', path=poppler_path) is not None
+
+
+def available_backends(poppler_path=POPPLER_PATH):
+    """返回当前环境中可用的后端名称列表（Python 包已安装，pdf2image 还要求能找到 poppler）"""
+    from importlib.util import find_spec
+
+    names = []
+    for name, (backend_class, module) in BACKENDS.items():
+        if find_spec(module) is None:
+            continue
+        if backend_class is Pdf2ImageBackend and not _poppler_installed(poppler_path):
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend(backend=None, poppler_path=POPPLER_PATH):
+    """
+    获取光栅化后端
+
+    参数:
+        backend: 后端名称、后端实例或None；为None时读取环境变量 PDF_TOOLS_RASTERIZER，
+                 仍未指定或为 auto 时自动检测
+        poppler_path: pdf2image 后端使用的 poppler 目录
+
+    返回:
+        后端实例
+    """
+    if backend is not None and not isinstance(backend, str):
+        return backend
+    name = (backend or os.environ.get(BACKEND_ENV) or 'auto').lower()
+    if name == 'auto':
+        installed = available_backends(poppler_path)
+        # 都没有安装时仍返回 pdf2image，渲染时再给出缺少依赖的错误
+        name = installed[0] if installed else 'pdf2image'
+    if name not in BACKENDS:
+        raise ValueError(f'未知的光栅化后端: {name}，可选: {", ".join(BACKENDS)}')
+    backend_class = BACKENDS[name][0]
+    if backend_class is Pdf2ImageBackend:
+        return backend_class(poppler_path)
+    return backend_class()
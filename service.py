@@ -0,0 +1,751 @@
+"""
+本地转换服务：常驻进程通过 HTTP（TCP 或 Unix 套接字）接收渲染/颜色转换/反转/合并任务
+
+启动时创建固定数量的工作进程并预先导入 PIL、numpy 和光栅化后端，光栅化后端也只在启动时检测一次，
+之后每个任务都直接在已预热的进程中执行，不再有解释器启动和依赖检测的开销。
+
+一个任务（job）被拆成多个子任务：渲染按页码区间拆分，颜色转换/反转按文件拆分，合并为单个子任务。
+- 每个任务同时占用的工作进程数不超过 concurrency（请求中指定，受 --job-concurrency 限制）
+- 同时运行的任务数不超过 --max-running，其余任务排队
+- 排队的任务超过 --max-queued 时拒绝新任务，返回 503 和 Retry-After，由调用方稍后重试
+- 设置了 --memory-budget 时同时运行的任务平分预算，按最大一页的估计大小进一步减少任务的并发数，
+  任务信息中报告运行期间观测到的峰值内存（peak_rss_bytes）
+
+接口（请求与响应均为 JSON）:
+    POST   /jobs                提交任务，返回 202 和任务信息
+           {"command": "render", "inputs": ["a.pdf"], "options": {"output": "输出目录", "dpi": 150},
+            "concurrency": 2}
+    GET    /jobs                所有任务的概要
+    GET    /jobs/<id>?wait=30   任务状态与每个子任务的结果；指定 wait 时最多等待该秒数直到任务结束
+    DELETE /jobs/<id>           取消任务：排队中的任务不再执行，运行中的任务不再启动新的子任务
+    GET    /metrics             Prometheus 格式的累计指标（?format=json 为 JSON）
+    GET    /health              服务状态
+
+options 与命令行选项对应（见 cli.py），例如 dpi、pages、color_mode、recolor、invert、pdf、thumbnail、
+map（[[[255,255,255],[255,223,63]], ...]）、tolerance、mode、recursive、skip_blank、format、quality、
+compress_level、optimize、palette、bilevel。
+
+用法:
+    python service.py --port 8765 --workers 4
+    python service.py --socket /tmp/pdf_tools.sock
+
+    client = ServiceClient(port=8765)
+    job = client.submit('render', ['文档.pdf'], output='输出目录', dpi=150)
+    print(client.wait(job['id']))
+"""
+import argparse
+import concurrent.futures
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import memory_budget
+import metrics
+from batch_executor import collect_tasks
+from color_convert import collect_image_tasks, recolor_file
+from file_scanner import IMAGE_EXTENSIONS
+from image_invert import invert_file
+from image_output import OutputFormat, output_path_for
+from pdf_to_image import group_page_ranges, render_pdf, render_thumbnails, resolve_pages, split_ranges
+from pdf_writer import list_images, merge_images_to_pdf
+from pipeline import process_pdf
+from rasterizer import BACKENDS, get_backend
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 渲染任务每个子任务的页数
+RENDER_CHUNK_PAGES = 8
+
+# 保留的已结束任务数，超过时删除最早的
+MAX_FINISHED_JOBS = 1000
+
+# GET /jobs/<id>?wait= 的最长等待秒数
+MAX_WAIT_SECONDS = 300
+
+# 队列已满时建议调用方等待的秒数
+RETRY_AFTER_SECONDS = 1
+
+COMMANDS = ('render', 'recolor', 'invert', 'merge')
+
+_FINISHED = ('done', 'failed', 'cancelled')
+
+_OUTPUT_OPTIONS = ('format', 'quality', 'compress_level', 'optimize', 'palette', 'bilevel')
+
+
+class ServiceBusy(Exception):
+    """排队的任务已达上限"""
+
+
+class ServiceError(Exception):
+    """ServiceClient 收到的错误响应"""
+
+    def __init__(self, status, message):
+        super().__init__(f'{status}: {message}')
+        self.status = status
+        self.message = message
+
+
+def _warm_worker(backend):
+    """工作进程初始化：预先导入依赖并创建光栅化后端，第一个任务不再承担这些开销"""
+    # Ctrl+C 只由主进程处理，工作进程在主进程关闭进程池时退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from PIL import Image  # noqa: F401
+    import numpy  # noqa: F401
+
+    get_backend(backend)
+    try:
+        __import__(BACKENDS[backend][1])
+    except ImportError:
+        # 依赖缺失时在渲染时报错，不影响其他命令
+        pass
+
+
+def _execute(func, args, kwargs):
+    """
+    在工作进程中执行一个子任务并收集指标，异常记录在结果中
+
+    返回:
+        {'seconds', 'error', 'value', 'metrics'}
+    """
+    start = time.perf_counter()
+    value = error = None
+    with metrics.collect() as collected:
+        try:
+            value = func(*args, **kwargs)
+        except Exception as e:
+            error = str(e)
+    if isinstance(value, tuple):
+        value = list(value)
+    return {'seconds': time.perf_counter() - start, 'error': error, 'value': value,
+            'metrics': collected.snapshot()}
+
+
+def _output_format(options):
+    if not any(options.get(key) not in (None, False) for key in _OUTPUT_OPTIONS):
+        return None
+    return OutputFormat(options.get('format') or 'png', options.get('quality'), options.get('compress_level'),
+                        bool(options.get('optimize')), bool(options.get('palette')), bool(options.get('bilevel')))
+
+
+def _color_options(options):
+    """返回 (color_map, tolerance, mode)"""
+    pairs = options.get('map')
+    color_map = {tuple(source): tuple(target) for source, target in pairs} if pairs else None
+    return color_map, int(options.get('tolerance', 0)), options.get('mode', 'exact')
+
+
+def _plan_render(inputs, options, backend):
+    output = options.get('output')
+    dpi = int(options.get('dpi', 200))
+    pages = options.get('pages')
+    output_format = _output_format(options)
+    color_mode = options.get('color_mode', 'rgb')
+    tasks = []
+    for pdf_path in inputs:
+        if options.get('thumbnail'):
+            tasks.append((pdf_path, render_thumbnails, (pdf_path, output, int(options['thumbnail']), pages),
+                          {'backend': backend, 'output_format': output_format, 'color_mode': color_mode}))
+        elif options.get('recolor') or options.get('invert') or options.get('pdf'):
+            # 流水线（尤其是合并为PDF）按顺序逐页输出，不拆分
+            color_map, tolerance, mode = _color_options(options)
+            tasks.append((pdf_path, process_pdf,
+                          (pdf_path, output, dpi, bool(options.get('recolor')), bool(options.get('invert')),
+                           bool(options.get('pdf')), color_map, tolerance, mode),
+                          {'backend': backend, 'output_format': output_format, 'color_mode': color_mode,
+                           'pages': pages, 'skip_blank': bool(options.get('skip_blank'))}))
+        else:
+            try:
+                page_count = get_backend(backend).page_count(pdf_path)
+            except Exception as e:
+                # 后端自己的异常（PdfiumError、PDFPageCountError 等）同样作为无效输入报告
+                raise ValueError(f'无法读取PDF {pdf_path}: {e}') from e
+            selected = resolve_pages(pages, page_count)
+            chunk_count = -(-len(selected) // RENDER_CHUNK_PAGES)
+            for first_page, last_page in split_ranges(group_page_ranges(selected), chunk_count):
+                tasks.append((f'{pdf_path}:{first_page}-{last_page}', render_pdf, (pdf_path, output, dpi),
+                              {'backend': backend, 'output_format': output_format, 'color_mode': color_mode,
+                               'pages': list(range(first_page, last_page + 1))}))
+    return tasks
+
+
+def _file_pairs(path, output, default_subdir, collect, name_prefix=''):
+    """目录展开为其中的文件，单个文件默认输出到所在目录"""
+    if os.path.isdir(path):
+        output_dir = output or os.path.join(path, default_subdir)
+        os.makedirs(output_dir, exist_ok=True)
+        return collect(path, output_dir)
+    output_dir = output or os.path.dirname(path)
+    os.makedirs(output_dir, exist_ok=True)
+    return [(path, os.path.join(output_dir, name_prefix + os.path.basename(path)))]
+
+
+def _plan_recolor(inputs, options, backend):
+    output_format = _output_format(options)
+    color_map, tolerance, mode = _color_options(options)
+    tasks = []
+    for path in inputs:
+        for input_path, output_path in _file_pairs(path, options.get('output'), 'color_converted',
+                                                   collect_image_tasks):
+            tasks.append((input_path, recolor_file,
+                          (input_path, output_path_for(output_path, output_format), color_map, tolerance, mode,
+                           output_format), {}))
+    return tasks
+
+
+def _plan_invert(inputs, options, backend):
+    output_format = _output_format(options)
+    recursive = bool(options.get('recursive'))
+
+    def collect(input_dir, output_dir):
+        return collect_tasks(input_dir, output_dir, IMAGE_EXTENSIONS, recursive, 'inverted_')
+
+    tasks = []
+    for path in inputs:
+        for input_path, output_path in _file_pairs(path, options.get('output'), 'inverted', collect, 'inverted_'):
+            tasks.append((input_path, invert_file,
+                          (input_path, output_path_for(output_path, output_format), output_format), {}))
+    return tasks
+
+
+def _plan_merge(inputs, options, backend):
+    output = options.get('output')
+    if not output:
+        raise ValueError('merge 任务需要 options.output（输出PDF文件）')
+    image_paths = []
+    for path in inputs:
+        image_paths.extend(list_images(path) if os.path.isdir(path) else [path])
+    return [(output, merge_images_to_pdf, (image_paths, output), {'skip_blank': bool(options.get('skip_blank'))})]
+
+
+_PLANNERS = {
+    'render': _plan_render,
+    'recolor': _plan_recolor,
+    'invert': _plan_invert,
+    'merge': _plan_merge,
+}
+
+
+def estimate_page_bytes(command, tasks, options=None, backend=None):
+    """估算任务中最大一页（或一张图片）占用的内存，用于按内存预算限制任务的并发数"""
+    options = options or {}
+    if command == 'render':
+        pdf_paths = list(dict.fromkeys(args[0] for _, _, args, _ in tasks))
+        return memory_budget.pdf_page_bytes(pdf_paths, int(options.get('dpi', 200)),
+                                            options.get('color_mode', 'rgb'), backend)
+    if command in ('recolor', 'invert'):
+        return memory_budget.image_page_bytes([args[0] for _, _, args, _ in tasks])
+    # 合并是单个子任务，逐页写入
+    return 0
+
+
+def plan_tasks(command, inputs, options=None, backend=None):
+    """
+    把任务拆分为子任务
+
+    返回:
+        [(说明, 函数, 位置参数, 关键字参数), ...]；参数无效或输入无法读取（例如不是PDF）时抛出 ValueError
+    """
+    if command not in _PLANNERS:
+        raise ValueError(f'未知的命令: {command}，可选: {", ".join(COMMANDS)}')
+    if not inputs or not isinstance(inputs, list):
+        raise ValueError('inputs 必须是非空的路径列表')
+    for path in inputs:
+        if not os.path.exists(path):
+            raise ValueError(f'输入不存在: {path}')
+    return _PLANNERS[command](inputs, options or {}, backend)
+
+
+class Job:
+    """一个提交的任务及其进度"""
+
+    def __init__(self, command, inputs, options, tasks, concurrency):
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.inputs = inputs
+        self.options = options
+        self.tasks = tasks
+        self.concurrency = concurrency
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.results = []
+        self.metrics = metrics.Metrics()
+        # 运行期间观测到的服务进程树峰值内存（包括同时运行的其他任务）
+        self.memory = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    @property
+    def failed_count(self):
+        return sum(1 for result in self.results if result['error'])
+
+    def to_dict(self, details=True):
+        record = {
+            'id': self.id,
+            'command': self.command,
+            'status': self.status,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'concurrency': self.concurrency,
+            'tasks': len(self.tasks),
+            'completed': len(self.results),
+            'failed': self.failed_count,
+        }
+        if self.memory is not None:
+            record.update(self.memory.to_dict())
+        if details:
+            record.update(inputs=self.inputs, options=self.options, results=self.results,
+                          metrics=self.metrics.snapshot())
+        return record
+
+
+class ConversionService:
+    """
+    任务队列与预热的工作进程池
+
+    参数:
+        workers: 工作进程数，为None时使用全部CPU核心
+        max_running_jobs: 同时运行的任务数
+        max_queued_jobs: 最多排队的任务数，超过时 submit 抛出 ServiceBusy
+        job_concurrency: 单个任务最多同时占用的工作进程数，为None时等于 workers
+        backend: 光栅化后端名称，为None时启动时自动检测一次
+        budget: 内存预算（字节数或 6G 这样的字符串），为None时使用全局设置（见 memory_budget）。
+                同时运行的任务平分预算，每个任务按最大一页的估计大小减少并发数
+    """
+
+    def __init__(self, workers=None, max_running_jobs=2, max_queued_jobs=16, job_concurrency=None, backend=None,
+                 budget=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_running_jobs = max_running_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.job_concurrency = job_concurrency or self.workers
+        self.backend = get_backend(backend).name
+        self.budget = memory_budget.get_budget(budget)
+        self.metrics = metrics.Metrics()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.pool = None
+        self.runner = None
+
+    def start(self):
+        """创建工作进程并等待全部完成预热"""
+        if self.budget is not None:
+            # 工作进程中的子任务（例如整篇文档的流水线）按同一预算调整渲染窗口
+            memory_budget.set_budget(self.budget)
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=_warm_worker,
+                                                           initargs=(self.backend,))
+        concurrent.futures.wait([self.pool.submit(os.getpid) for _ in range(self.workers)])
+        self.runner = concurrent.futures.ThreadPoolExecutor(self.max_running_jobs, thread_name_prefix='job')
+
+    def shutdown(self):
+        """取消排队的任务，等待运行中的子任务结束后关闭工作进程"""
+        with self.lock:
+            for job in self.jobs.values():
+                job.cancel_event.set()
+        if self.runner:
+            self.runner.shutdown(wait=True, cancel_futures=True)
+        if self.pool:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def _count(self, status):
+        return sum(1 for job in self.jobs.values() if job.status == status)
+
+    def submit(self, command, inputs, options=None, concurrency=None):
+        """
+        提交任务
+
+        返回:
+            Job；参数无效时抛出 ValueError，队列已满时抛出 ServiceBusy
+        """
+        options = options or {}
+        tasks = plan_tasks(command, inputs, options, self.backend)
+        concurrency = min(int(concurrency or self.job_concurrency), self.job_concurrency)
+        if self.budget is not None:
+            page_bytes = estimate_page_bytes(command, tasks, options, self.backend)
+            concurrency = memory_budget.plan(page_bytes, concurrency, 1,
+                                             self.budget // self.max_running_jobs).workers
+        with self.lock:
+            if self._count('queued') >= self.max_queued_jobs:
+                self.metrics.add('jobs_rejected')
+                raise ServiceBusy(f'排队的任务已达上限 {self.max_queued_jobs}')
+            job = Job(command, inputs, options, tasks, max(1, concurrency))
+            self.jobs[job.id] = job
+            self.metrics.add('jobs_submitted')
+            self._prune()
+        self.runner.submit(self._run_job, job)
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in _FINISHED]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            return [job.to_dict(details=False) for job in self.jobs.values()]
+
+    def cancel(self, job_id):
+        """
+        取消任务
+
+        返回:
+            Job；任务不存在时返回None
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in _FINISHED:
+                return job
+            job.cancel_event.set()
+            if job.status == 'queued':
+                self._finish(job, 'cancelled')
+            return job
+
+    def _finish(self, job, status):
+        """在持有锁时调用"""
+        job.status = status
+        job.finished = time.time()
+        self.metrics.add(f'jobs_{status}')
+        job.done_event.set()
+
+    def _record(self, job, description, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            # 工作进程异常退出等
+            result = {'seconds': 0.0, 'error': f'{type(e).__name__}: {e}', 'value': None, 'metrics': None}
+        snapshot = result.pop('metrics')
+        with self.lock:
+            job.results.append({'task': description, **result})
+            self.metrics.add('tasks')
+            if result['error']:
+                self.metrics.add('tasks_failed')
+            if snapshot:
+                job.metrics.merge(snapshot)
+                self.metrics.merge(snapshot)
+
+    def _run_job(self, job):
+        with self.lock:
+            if job.cancel_event.is_set():
+                return
+            job.status = 'running'
+            job.started = time.time()
+            job.memory = memory_budget.track_peak_rss(self.budget).start()
+        running = {}
+        task_iter = iter(job.tasks)
+        try:
+            while True:
+                while len(running) < job.concurrency and not job.cancel_event.is_set():
+                    task = next(task_iter, None)
+                    if task is None:
+                        break
+                    description, func, args, kwargs = task
+                    running[self.pool.submit(_execute, func, args, kwargs)] = description
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    self._record(job, running.pop(future), future)
+        finally:
+            job.metrics.elapsed = time.time() - job.started
+            job.memory.stop()
+            with self.lock:
+                if job.cancel_event.is_set() and len(job.results) < len(job.tasks):
+                    status = 'cancelled'
+                else:
+                    status = 'failed' if job.failed_count else 'done'
+                self._finish(job, status)
+
+    def _health(self):
+        return {'status': 'ok', 'workers': self.workers, 'backend': self.backend,
+                'running': self._count('running'), 'queued': self._count('queued'),
+                'max_running': self.max_running_jobs, 'max_queued': self.max_queued_jobs,
+                'job_concurrency': self.job_concurrency, 'memory_budget_bytes': self.budget}
+
+    def health(self):
+        with self.lock:
+            return self._health()
+
+    def metrics_snapshot(self):
+        with self.lock:
+            return {**self.metrics.snapshot(), 'service': self._health()}
+
+    def metrics_prometheus(self, prefix='pdf_tools'):
+        with self.lock:
+            text = self.metrics.to_prometheus(prefix)
+            gauges = [f'# TYPE {prefix}_jobs gauge']
+            for status in ('queued', 'running'):
+                gauges.append(f'{prefix}_jobs{{status="{status}"}} {self._count(status)}')
+            gauges += [f'# TYPE {prefix}_workers gauge', f'{prefix}_workers {self.workers}']
+        return text + '\n'.join(gauges) + '\n'
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """把 HTTP 请求转交给 server.service"""
+
+    server_version = 'PDFTools/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        # Unix 套接字没有客户端地址
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='application/json; charset=utf-8', headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {'error': message}, headers=headers)
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        return parts, parse_qs(url.query)
+
+    def do_GET(self):
+        parts, query = self._route()
+        if parts == ['health']:
+            self._send(200, self.service.health())
+        elif parts == ['metrics']:
+            if query.get('format') == ['json']:
+                self._send(200, self.service.metrics_snapshot())
+            else:
+                self._send(200, self.service.metrics_prometheus().encode('utf-8'),
+                           'text/plain; version=0.0.4; charset=utf-8')
+        elif parts == ['jobs']:
+            self._send(200, {'jobs': self.service.list()})
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                self._error(404, f'任务不存在: {parts[1]}')
+                return
+            if 'wait' in query:
+                try:
+                    wait = float(query['wait'][0])
+                except ValueError:
+                    wait = None
+                # 同时排除负数和 nan
+                if wait is None or not wait >= 0:
+                    self._error(400, f'wait 必须是非负的秒数: {query["wait"][0]}')
+                    return
+                job.done_event.wait(min(wait, MAX_WAIT_SECONDS))
+            with self.service.lock:
+                record = job.to_dict()
+            self._send(200, record)
+        else:
+            self._error(404, f'未知的路径: {self.path}')
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ['jobs']:
+            self._error(404, f'未知的路径: {self.path}')
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            job = self.service.submit(body.get('command'), body.get('inputs'), body.get('options'),
+                                      body.get('concurrency'))
+        except ServiceBusy as e:
+            self._error(503, str(e), {'Retry-After': str(RETRY_AFTER_SECONDS)})
+            return
+        except (ValueError, TypeError, AttributeError) as e:
+            self._error(400, str(e))
+            return
+        with self.service.lock:
+            record = job.to_dict(details=False)
+        self._send(202, record, headers={'Location': f'/jobs/{job.id}'})
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self._error(404, f'未知的路径: {self.path}')
+            return
+        job = self.service.cancel(parts[1])
+        if job is None:
+            self._error(404, f'任务不存在: {parts[1]}')
+            return
+        with self.service.lock:
+            record = job.to_dict(details=False)
+        self._send(200, record)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        self.service = service
+        self.verbose = verbose
+        super().__init__(address, ServiceRequestHandler)
+
+
+class UnixServiceHTTPServer(ServiceHTTPServer):
+    """监听 Unix 套接字的服务"""
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            # 上次运行残留的套接字文件
+            os.remove(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """创建 HTTP 服务器，指定 socket_path 时监听 Unix 套接字"""
+    if socket_path:
+        return UnixServiceHTTPServer(socket_path, service, verbose)
+    return ServiceHTTPServer((host, port), service, verbose)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """
+    服务的简单客户端（只用标准库），便于脚本调用和本机测试
+
+    参数:
+        host、port: TCP 地址
+        socket_path: 指定时通过 Unix 套接字连接
+        timeout: 单次请求的超时秒数
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=60):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, timeout=None):
+        """发送请求，返回 (状态码, 响应头字典, 解析后的响应体)"""
+        timeout = timeout or self.timeout
+        if self.socket_path:
+            connection = _UnixHTTPConnection(self.socket_path, timeout)
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        try:
+            payload = json.dumps(body).encode('utf-8') if body is not None else None
+            headers = {'Content-Type': 'application/json'} if payload is not None else {}
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            data = response.read()
+            if response.getheader('Content-Type', '').startswith('application/json'):
+                data = json.loads(data)
+            else:
+                data = data.decode('utf-8')
+            return response.status, dict(response.getheaders()), data
+        finally:
+            connection.close()
+
+    def _checked(self, method, path, body=None, timeout=None):
+        status, _, data = self.request(method, path, body, timeout)
+        if status >= 400:
+            raise ServiceError(status, data.get('error') if isinstance(data, dict) else data)
+        return data
+
+    def submit(self, command, inputs, concurrency=None, **options):
+        """提交任务，返回任务信息；队列已满时抛出 status 为 503 的 ServiceError"""
+        return self._checked('POST', '/jobs', {'command': command, 'inputs': inputs, 'options': options,
+                                               'concurrency': concurrency})
+
+    def status(self, job_id, wait=None):
+        path = f'/jobs/{job_id}' + (f'?wait={wait}' if wait else '')
+        return self._checked('GET', path, timeout=(wait or 0) + self.timeout)
+
+    def wait(self, job_id, timeout=None, poll=30):
+        """等待任务结束并返回最终状态，超时时返回当前状态"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = poll if deadline is None else max(0.0, min(poll, deadline - time.monotonic()))
+            job = self.status(job_id, wait=remaining or None)
+            if job['status'] in _FINISHED or (deadline is not None and time.monotonic() >= deadline):
+                return job
+
+    def cancel(self, job_id):
+        return self._checked('DELETE', f'/jobs/{job_id}')
+
+    def metrics(self, fmt='prometheus'):
+        return self._checked('GET', '/metrics?format=json' if fmt == 'json' else '/metrics')
+
+    def health(self):
+        return self._checked('GET', '/health')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF工具集本地转换服务')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'监听地址，默认 {DEFAULT_HOST}（只接受本机连接）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'监听端口，默认 {DEFAULT_PORT}')
+    parser.add_argument('--socket', dest='socket_path', default=None, help='改为监听 Unix 套接字')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数，默认使用全部CPU核心')
+    parser.add_argument('--max-running', type=int, default=2, help='同时运行的任务数，默认2')
+    parser.add_argument('--max-queued', type=int, default=16, help='最多排队的任务数，超过时返回503，默认16')
+    parser.add_argument('--job-concurrency', type=int, default=None,
+                        help='单个任务最多同时占用的工作进程数，默认等于 --workers')
+    parser.add_argument('--backend', default=None, help='光栅化后端，默认自动检测')
+    parser.add_argument('--memory-budget', default=None, metavar='SIZE',
+                        help='内存预算，例如 6G，默认读取环境变量 PDF_TOOLS_MEMORY_BUDGET')
+    parser.add_argument('--verbose', action='store_true', help='输出每个请求的访问日志')
+    args = parser.parse_args()
+
+    service = ConversionService(args.workers, args.max_running, args.max_queued, args.job_concurrency,
+                                args.backend, args.memory_budget)
+    service.start()
+    server = make_server(service, args.host, args.port, args.socket_path, args.verbose)
+    address = args.socket_path or f'http://{args.host}:{server.server_port}'
+    budget = f'，内存预算 {memory_budget.format_size(service.budget)}' if service.budget is not None else ''
+    print(f'服务已启动: {address}（{service.workers} 个工作进程，后端 {service.backend}{budget}）')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('正在停止服务...')
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from batch_executor import collect_tasks
+from file_scanner import IMAGE_EXTENSIONS
+from image_invert import invert_directory_batch
+
+
+class CollectTasksTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        for name in ('page_1.png', 'page_2.png'):
+            Image.new('RGB', (8, 8), 'white').save(os.path.join(self.tmp, name))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_output_subdirectory_is_skipped(self):
+        output_dir = os.path.join(self.tmp, 'inverted')
+        os.makedirs(output_dir)
+        Image.new('RGB', (8, 8)).save(os.path.join(output_dir, 'old.png'))
+
+        tasks = collect_tasks(self.tmp, output_dir, IMAGE_EXTENSIONS)
+
+        self.assertEqual([os.path.basename(input_path) for input_path, _ in tasks], ['page_1.png', 'page_2.png'])
+
+    def test_same_output_directory(self):
+        """输出目录与输入目录相同时，带前缀的结果写在原图旁边"""
+        result = invert_directory_batch(self.tmp, self.tmp, workers=1, name_prefix='inverted_')
+
+        self.assertEqual(result.processed, 2)
+        self.assertEqual(sorted(os.listdir(self.tmp)),
+                         ['inverted_page_1.png', 'inverted_page_2.png', 'page_1.png', 'page_2.png'])
+        with Image.open(os.path.join(self.tmp, 'inverted_page_1.png')) as img:
+            self.assertEqual(img.getpixel((0, 0)), (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
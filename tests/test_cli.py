@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from PIL import Image
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cli.py')
+
+
+class JsonOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def run_cli(self, *args):
+        completed = subprocess.run([sys.executable, CLI, '--json', *args], capture_output=True, text=True,
+                                   check=True)
+        return json.loads(completed.stdout)
+
+    def test_render_to_new_directory(self):
+        """创建输出目录的提示不能混进 stdout 中的 JSON"""
+        pdf_path = os.path.join(self.tmp, 'doc.pdf')
+        Image.new('RGB', (100, 140), 'white').save(pdf_path)
+
+        summary = self.run_cli('render', pdf_path, '-o', os.path.join(self.tmp, 'new_dir'), '--dpi', '36')
+
+        self.assertEqual(summary['command'], 'render')
+
+    def test_recolor_to_new_directory(self):
+        input_dir = os.path.join(self.tmp, 'images')
+        os.makedirs(input_dir)
+        Image.new('RGB', (8, 8), 'white').save(os.path.join(input_dir, 'page_1.png'))
+
+        summary = self.run_cli('recolor', input_dir, '-o', os.path.join(self.tmp, 'new_dir'))
+
+        self.assertEqual(summary['command'], 'recolor')
+
+
+class ArgumentTest(unittest.TestCase):
+
+    def test_incremental_rejected_with_pipeline_options(self):
+        """--incremental 只对直接渲染生效，与其他选项组合时报错而不是被忽略"""
+        for option in ('--recolor', '--invert', '--pdf', '--thumbnail'):
+            completed = subprocess.run([sys.executable, CLI, 'render', 'doc.pdf', '--incremental', option],
+                                       capture_output=True, text=True)
+            self.assertEqual(completed.returncode, 2, option)
+            self.assertIn('--incremental', completed.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
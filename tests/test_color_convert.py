@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from color_convert import recolor_file
+
+
+class RecolorFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_grayscale_jpeg(self):
+        """灰度 JPEG 映射为调色板结果后仍能按原扩展名保存"""
+        input_path = os.path.join(self.tmp, 'scan.jpg')
+        output_path = os.path.join(self.tmp, 'scan_out.jpg')
+        img = Image.new('L', (32, 16), 255)
+        img.paste(0, (0, 0, 16, 16))
+        img.save(input_path)
+
+        recolor_file(input_path, output_path)
+
+        with Image.open(output_path) as result:
+            self.assertEqual(result.format, 'JPEG')
+            self.assertEqual(result.mode, 'RGB')
+            # 默认配色：白色 → (255, 223, 63)，黑色 → (31, 77, 120)，JPEG 有损，允许少量误差
+            for position, expected in (((24, 8), (255, 223, 63)), ((8, 8), (31, 77, 120))):
+                for actual, target in zip(result.getpixel(position), expected):
+                    self.assertLessEqual(abs(actual - target), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
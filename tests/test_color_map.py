@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from color_map import DEFAULT_COLOR_MAP, build_gradient_luts, map_colors, remap_image
+
+
+def reference_map(array, color_map, tolerance=0):
+    """逐像素的参考实现：按映射中的顺序取第一个每个通道差值都不超过 tolerance 的源颜色"""
+    result = array.copy()
+    height, width, _ = array.shape
+    for y in range(height):
+        for x in range(width):
+            pixel = array[y, x].astype(int)
+            for source, target in color_map.items():
+                if all(abs(pixel[channel] - source[channel]) <= tolerance for channel in range(3)):
+                    result[y, x] = target
+                    break
+    return result
+
+
+def make_page(seed, width=48, height=32, colors=()):
+    """随机像素，混入映射中的源颜色及其附近的颜色"""
+    rng = np.random.default_rng(seed)
+    array = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    for color in colors:
+        for offset in (0, 1, 2, 5):
+            mask = rng.random((height, width)) < 0.03
+            array[mask] = np.clip(np.array(color) + offset, 0, 255)
+    return array
+
+
+class MapColorsTest(unittest.TestCase):
+
+    def assert_matches_reference(self, array, color_map, tolerance=0):
+        result = map_colors(Image.fromarray(array), color_map, tolerance)
+        np.testing.assert_array_equal(np.asarray(result.convert('RGB')),
+                                      reference_map(array, color_map, tolerance))
+
+    def test_default_color_map(self):
+        self.assert_matches_reference(make_page(0, colors=DEFAULT_COLOR_MAP), DEFAULT_COLOR_MAP)
+
+    def test_tolerance(self):
+        self.assert_matches_reference(make_page(1, colors=DEFAULT_COLOR_MAP), DEFAULT_COLOR_MAP, tolerance=3)
+
+    def test_many_overlapping_colors(self):
+        """超过一组（8种）源颜色、容差范围互相重叠时，映射中靠前的优先"""
+        rng = np.random.default_rng(2)
+        sources = [tuple(int(v) for v in rng.integers(100, 120, 3)) for _ in range(20)]
+        color_map = {source: tuple(int(v) for v in rng.integers(0, 256, 3)) for source in sources}
+        self.assert_matches_reference(make_page(3, colors=color_map), color_map, tolerance=6)
+
+    def test_other_modes_match_rgb(self):
+        """灰度、RGBA 图片的结果与先转为 RGB 再映射相同"""
+        array = make_page(4, colors=DEFAULT_COLOR_MAP)
+        for img in (Image.fromarray(array).convert('L'), Image.fromarray(array).convert('RGBA')):
+            expected = reference_map(np.asarray(img.convert('RGB')), DEFAULT_COLOR_MAP)
+            np.testing.assert_array_equal(np.asarray(remap_image(img).convert('RGB')), expected, img.mode)
+
+    def test_gradient(self):
+        """渐变模式：端点映射为目标颜色，中间按通道线性插值"""
+        luts = build_gradient_luts()
+        gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+        result = np.asarray(remap_image(Image.fromarray(gray), mode='gradient').convert('RGB'))
+        np.testing.assert_array_equal(result[0, 0], DEFAULT_COLOR_MAP[(0, 0, 0)])
+        np.testing.assert_array_equal(result[15, 15], DEFAULT_COLOR_MAP[(255, 255, 255)])
+        for channel in range(3):
+            start = DEFAULT_COLOR_MAP[(0, 0, 0)][channel]
+            end = DEFAULT_COLOR_MAP[(255, 255, 255)][channel]
+            expected = np.rint(start + (end - start) * np.arange(256) / 255).astype(np.uint8)
+            np.testing.assert_array_equal(luts[channel], expected)
+            np.testing.assert_array_equal(result[:, :, channel].ravel(), expected)
+
+    def test_invalid_color_map(self):
+        with self.assertRaises(ValueError):
+            map_colors(Image.new('RGB', (4, 4)), {})
+        with self.assertRaises(ValueError):
+            map_colors(Image.new('RGB', (4, 4)), {(0, 0, 0): (256, 0, 0)})
+        with self.assertRaises(ValueError):
+            remap_image(Image.new('RGB', (4, 4)), mode='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
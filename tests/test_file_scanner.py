@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+import unittest
+
+import file_scanner
+from file_scanner import scan_directory
+
+
+class ScanDirectoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        file_scanner.clear_cache()
+
+    def tearDown(self):
+        file_scanner.clear_cache()
+        self._tmp.cleanup()
+
+    def touch(self, *parts, data=b''):
+        path = os.path.join(self.tmp, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def set_mtime(self, timestamp):
+        """设置目录的修改时间；早于 CACHE_SETTLE_SECONDS 之前的目录列表才会被缓存"""
+        os.utime(self.tmp, ns=(timestamp, timestamp))
+
+    def test_natural_order_and_exclude(self):
+        for name in ('page_10.png', 'page_2.jpg', 'page_1.png', 'notes.txt'):
+            self.touch(name)
+        self.touch('sub', 'page_1.png')
+        self.touch('out', 'page_1.png')
+        self.touch('scan', data=b'\x89PNG\r\n\x1a\n')
+
+        found = scan_directory(self.tmp, exclude=[os.path.join(self.tmp, 'out')], sniff=True)
+
+        self.assertEqual(found, [('page_1.png', 'png'), ('page_2.jpg', 'jpeg'), ('page_10.png', 'png'),
+                                 ('scan', 'png'), (os.path.join('sub', 'page_1.png'), 'png')])
+        self.assertEqual(scan_directory(self.tmp, ('.png',), recursive=False), [('page_1.png', 'png'),
+                                                                                ('page_10.png', 'png')])
+
+    def test_cache_invalidated_by_mtime(self):
+        """目录内容变化后修改时间改变，缓存的列表不再使用"""
+        self.touch('page_1.png')
+        self.set_mtime(time.time_ns() - 60 * 10 ** 9)
+        self.assertEqual(scan_directory(self.tmp), [('page_1.png', 'png')])
+        self.assertIn(os.path.abspath(self.tmp), file_scanner._cache)
+
+        self.touch('page_2.png')
+        self.set_mtime(time.time_ns() - 30 * 10 ** 9)
+        self.assertEqual(scan_directory(self.tmp), [('page_1.png', 'png'), ('page_2.png', 'png')])
+
+        os.remove(os.path.join(self.tmp, 'page_1.png'))
+        self.assertEqual(scan_directory(self.tmp), [('page_2.png', 'png')])
+
+    def test_cache_reused_while_mtime_unchanged(self):
+        """修改时间不变时直接复用缓存，不重新列出目录"""
+        timestamp = time.time_ns() - 60 * 10 ** 9
+        self.touch('page_1.png')
+        self.set_mtime(timestamp)
+        scan_directory(self.tmp)
+
+        self.touch('page_2.png')
+        self.set_mtime(timestamp)
+        self.assertEqual(scan_directory(self.tmp), [('page_1.png', 'png')])
+        self.assertEqual(scan_directory(self.tmp, use_cache=False), [('page_1.png', 'png'), ('page_2.png', 'png')])
+
+    def test_recent_directory_not_cached(self):
+        """刚修改过的目录不缓存，同一时间刻度内的后续修改也能看到"""
+        self.touch('page_1.png')
+        scan_directory(self.tmp)
+        self.assertNotIn(os.path.abspath(self.tmp), file_scanner._cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
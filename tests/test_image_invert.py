@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from image_invert import invert_image
+
+
+def make_image(seed, mode, width=24, height=16):
+    rng = np.random.default_rng(seed)
+    bands = len(Image.new(mode, (1, 1)).getbands())
+    array = rng.integers(0, 256, size=(height, width, bands), dtype=np.uint8)
+    return Image.fromarray(array[:, :, 0] if bands == 1 else array, mode)
+
+
+class InvertImageTest(unittest.TestCase):
+
+    def test_color_modes(self):
+        """颜色通道取反，透明通道不变，模式不变"""
+        for mode in ('L', 'LA', 'RGB', 'RGBA'):
+            for in_place in (False, True):
+                img = make_image(0, mode)
+                source = np.asarray(img).copy()
+                result = invert_image(img, in_place=in_place)
+                self.assertEqual(result.mode, mode)
+                actual = np.asarray(result)
+                if mode in ('LA', 'RGBA'):
+                    np.testing.assert_array_equal(actual[:, :, :-1], 255 - source[:, :, :-1])
+                    np.testing.assert_array_equal(actual[:, :, -1], source[:, :, -1])
+                else:
+                    np.testing.assert_array_equal(actual, 255 - source)
+
+    def test_not_in_place_keeps_input(self):
+        img = make_image(1, 'RGB')
+        source = np.asarray(img).copy()
+        invert_image(img)
+        np.testing.assert_array_equal(np.asarray(img), source)
+
+    def test_palette(self):
+        """调色板图片只反转调色板，索引不变"""
+        img = make_image(2, 'RGB').quantize(16)
+        result = invert_image(img)
+        self.assertEqual(result.mode, 'P')
+        np.testing.assert_array_equal(np.asarray(result), np.asarray(img))
+        np.testing.assert_array_equal(np.asarray(result.convert('RGB')), 255 - np.asarray(img.convert('RGB')))
+
+    def test_palette_with_alpha(self):
+        img = make_image(3, 'RGBA').quantize(16)
+        self.assertEqual(img.palette.mode, 'RGBA')
+        result = invert_image(img)
+        self.assertEqual(result.mode, 'P')
+        source = np.asarray(img.convert('RGBA'))
+        actual = np.asarray(result.convert('RGBA'))
+        np.testing.assert_array_equal(actual[:, :, :3], 255 - source[:, :, :3])
+        np.testing.assert_array_equal(actual[:, :, 3], source[:, :, 3])
+
+    def test_bilevel(self):
+        img = make_image(4, 'L').convert('1')
+        result = invert_image(img)
+        self.assertEqual(result.mode, '1')
+        np.testing.assert_array_equal(np.asarray(result), ~np.asarray(img))
+
+    def test_other_modes_convert_to_rgb(self):
+        img = make_image(5, 'CMYK')
+        result = invert_image(img)
+        self.assertEqual(result.mode, 'RGB')
+        np.testing.assert_array_equal(np.asarray(result), 255 - np.asarray(img.convert('RGB')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import sys
+import tempfile
+import types
+import unittest
+import weakref
+from unittest import mock
+
+from PIL import Image
+
+import async_pipeline
+import memory_budget
+from rasterizer import DEFAULT_WINDOW_SIZE, Pdf2ImageBackend
+
+MB = 1024 * 1024
+
+# 假的渲染结果：每页 400x500 RGB
+PAGE_SIZE = (400, 500)
+
+
+def fake_convert_from_path(pdf_path, dpi, first_page, last_page, poppler_path=None, grayscale=False,
+                           output_folder=None, paths_only=False):
+    """代替 pdf2image.convert_from_path，不需要 poppler；记录创建的每一页"""
+    images = []
+    paths = []
+    for page_number in range(first_page, last_page + 1):
+        img = Image.new('RGB', PAGE_SIZE, (page_number, 0, 0))
+        fake_convert_from_path.created.append(weakref.ref(img))
+        if output_folder is None:
+            images.append(img)
+        else:
+            path = os.path.join(output_folder, f'page-{page_number:04d}.ppm')
+            img.save(path)
+            paths.append(path)
+    return paths if paths_only else images
+
+
+def alive_bytes(refs):
+    """弱引用中仍然存活的页面占用的字节数（同一页面只计一次）"""
+    alive = {id(ref()): ref() for ref in refs if ref() is not None}
+    return sum(page.width * page.height * 4 for page in alive.values())
+
+
+class PlanTest(unittest.TestCase):
+
+    def test_no_budget_keeps_parameters(self):
+        memory_plan = memory_budget.plan(100 * MB, 4, 8, budget=None)
+        self.assertEqual((memory_plan.workers, memory_plan.window_size, memory_plan.spill), (4, 8, False))
+
+    def test_spill_keeps_window(self):
+        """支持暂存的后端在缩小窗口之前先暂存，窗口大小不变"""
+        budget = memory_budget.estimate_bytes(100 * MB, 2, 1)
+        memory_plan = memory_budget.plan(100 * MB, 2, 8, budget, can_spill=True)
+        self.assertEqual((memory_plan.workers, memory_plan.window_size, memory_plan.spill), (2, 8, True))
+        self.assertLessEqual(memory_plan.estimated_bytes, budget)
+
+    def test_window_shrinks_without_spill(self):
+        budget = memory_budget.estimate_bytes(100 * MB, 2, 1)
+        memory_plan = memory_budget.plan(100 * MB, 2, 8, budget)
+        self.assertEqual((memory_plan.workers, memory_plan.window_size, memory_plan.spill), (2, 1, False))
+
+    def test_one_page_window_is_not_spilled(self):
+        """1页的窗口暂存没有意义，只减少进程数"""
+        budget = memory_budget.estimate_bytes(100 * MB, 1, 1)
+        memory_plan = memory_budget.plan(100 * MB, 4, 1, budget, can_spill=True)
+        self.assertEqual((memory_plan.workers, memory_plan.spill), (1, False))
+
+
+class SpillTest(unittest.TestCase):
+
+    def peak_page_bytes(self, backend, window_size):
+        """逐页消费时同时存活的页面占用的最大字节数"""
+        fake_convert_from_path.created = []
+        received = []
+        peak = 0
+        module = types.SimpleNamespace(convert_from_path=fake_convert_from_path)
+        with mock.patch.dict(sys.modules, {'pdf2image': module}):
+            for _, img in backend.iter_pages('doc.pdf', 72, 1, window_size, window_size):
+                received.append(weakref.ref(img))
+                peak = max(peak, alive_bytes(fake_convert_from_path.created + received))
+                del img
+        return peak
+
+    def test_spill_lowers_peak_memory(self):
+        window_size = 8
+        page_bytes = PAGE_SIZE[0] * PAGE_SIZE[1] * 4
+        in_memory = self.peak_page_bytes(Pdf2ImageBackend(), window_size)
+        spilled = self.peak_page_bytes(Pdf2ImageBackend(spill=True), window_size)
+        self.assertEqual(in_memory, window_size * page_bytes)
+        self.assertEqual(spilled, page_bytes)
+
+
+class AsyncPipelinePlanTest(unittest.TestCase):
+
+    def run_async(self, budget):
+        """返回 process_pdf_async 交给 run_pipeline_async 的 (后端, 队列长度, 同时处理页数, 窗口大小)"""
+        calls = []
+
+        async def fake_run_pipeline_async(pdf_path, stages, sink, dpi, pages, backend, color_mode, progress,
+                                          queue_size, transform_workers, window_size):
+            calls.append((backend, queue_size, transform_workers, window_size))
+            return 0
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ), \
+                mock.patch.object(memory_budget, 'pdf_page_bytes', return_value=100 * MB), \
+                mock.patch.object(async_pipeline, 'run_pipeline_async', fake_run_pipeline_async):
+            memory_budget.set_budget(budget)
+            asyncio.run(async_pipeline.process_pdf_async(os.path.join(tmp, 'doc.pdf'), tmp,
+                                                         backend=Pdf2ImageBackend(), queue_size=4,
+                                                         transform_workers=4))
+        return calls[0]
+
+    def test_no_budget(self):
+        backend, queue_size, transform_workers, window_size = self.run_async(None)
+        self.assertEqual((backend.spill, queue_size, transform_workers, window_size),
+                         (False, 4, 4, DEFAULT_WINDOW_SIZE))
+
+    def test_budget_spills_window_and_shortens_queue(self):
+        """与同步版本一样暂存渲染窗口，已解码的队列按预算缩短"""
+        backend, queue_size, transform_workers, window_size = self.run_async(
+            memory_budget.estimate_bytes(100 * MB, 1, 1))
+        self.assertEqual((backend.spill, queue_size, transform_workers, window_size),
+                         (True, 1, 1, DEFAULT_WINDOW_SIZE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import unittest
+
+import metrics
+
+
+class ActiveMetricsTest(unittest.TestCase):
+
+    def test_threads_collect_separately(self):
+        """并发线程各自的收集互不干扰"""
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def job(name, count):
+            with metrics.collect() as collected:
+                barrier.wait()
+                for _ in range(count):
+                    metrics.add('pages')
+                    with metrics.stage('render'):
+                        pass
+                barrier.wait()
+            results[name] = collected.snapshot()
+
+        threads = [threading.Thread(target=job, args=(name, count)) for name, count in (('a', 100), ('b', 7))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results['a']['counters'], {'pages': 100})
+        self.assertEqual(results['b']['counters'], {'pages': 7})
+        self.assertEqual(results['b']['stages']['render']['count'], 7)
+        self.assertIsNone(metrics.active())
+
+    def test_asyncio_tasks_collect_separately(self):
+        async def job(count):
+            with metrics.collect() as collected:
+                for _ in range(count):
+                    metrics.add('files')
+                    await asyncio.sleep(0)
+            return collected.counters
+
+        async def main():
+            return await asyncio.gather(job(3), job(5))
+
+        self.assertEqual(asyncio.run(main()), [{'files': 3}, {'files': 5}])
+
+    def test_bind_to_other_thread(self):
+        """新线程不继承 Metrics，bind 包装后计入调用方"""
+        with metrics.collect() as collected:
+            threads = [threading.Thread(target=metrics.add, args=('unbound',)),
+                       threading.Thread(target=metrics.bind(metrics.add), args=('bound',))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(collected.counters, {'bound': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from page_buffer import process_pdf_shared
+from pipeline import process_pdf
+from rasterizer import available_backends
+
+
+@unittest.skipUnless('pypdfium2' in available_backends(), '需要 pypdfium2 后端渲染测试文档')
+class ProcessPdfSharedTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.pdf_path = os.path.join(self.tmp, 'doc.pdf')
+        rng = np.random.default_rng(0)
+        pages = []
+        for _ in range(5):
+            # 大块纯色加少量噪点，覆盖映射中的源颜色与其他颜色
+            array = rng.choice(np.array([[0, 0, 0], [255, 255, 255], [200, 30, 30], [12, 120, 240]], np.uint8),
+                               size=(14, 10)).repeat(12, axis=0).repeat(12, axis=1)
+            pages.append(Image.fromarray(array))
+        pages[0].save(self.pdf_path, save_all=True, append_images=pages[1:], resolution=72)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def assert_same_output(self, **options):
+        count, expected_dir = process_pdf(self.pdf_path, os.path.join(self.tmp, 'expected'), dpi=50,
+                                          backend='pypdfium2', **options)
+        shared_count, actual_dir = process_pdf_shared(self.pdf_path, os.path.join(self.tmp, 'actual'), dpi=50,
+                                                      workers=2, backend='pypdfium2', **options)
+        self.assertGreater(count, 0)
+        self.assertEqual(shared_count, count)
+        self.assertEqual(sorted(os.listdir(actual_dir)), sorted(os.listdir(expected_dir)))
+        for name in os.listdir(expected_dir):
+            with Image.open(os.path.join(expected_dir, name)) as expected, \
+                    Image.open(os.path.join(actual_dir, name)) as actual:
+                self.assertEqual(actual.mode, expected.mode, name)
+                np.testing.assert_array_equal(np.asarray(actual), np.asarray(expected), name)
+
+    def test_recolor(self):
+        self.assert_same_output(recolor=True, tolerance=2)
+
+    def test_recolor_and_invert(self):
+        self.assert_same_output(recolor=True, invert=True)
+
+    def test_gradient_pages(self):
+        self.assert_same_output(recolor=True, mode='gradient', pages='2-3,5')
+
+    def test_invert_gray(self):
+        self.assert_same_output(invert=True, color_mode='gray', output_format='jpeg')
+
+    def test_bilevel(self):
+        self.assert_same_output(color_mode='bilevel')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from pdf_to_image import group_page_ranges, parse_page_ranges, resolve_pages
+
+
+class PageRangeTest(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(parse_page_ranges('1-5,20,40-'), [(1, 5), (20, 20), (40, None)])
+        self.assertEqual(parse_page_ranges(' 3 , -2 ,'), [(3, 3), (1, 2)])
+        self.assertEqual(parse_page_ranges('7-7'), [(7, 7)])
+
+    def test_parse_errors(self):
+        for spec in ('', ',', 'a', '1-b', '0', '0-3', '5-2', '1--3', '2.5'):
+            with self.assertRaises(ValueError, msg=spec):
+                parse_page_ranges(spec)
+
+    def test_resolve(self):
+        """展开为升序、去重的页码，超出文档的部分被忽略"""
+        self.assertEqual(resolve_pages(None, 4), [1, 2, 3, 4])
+        self.assertEqual(resolve_pages('3-,1-2,2', 5), [1, 2, 3, 4, 5])
+        self.assertEqual(resolve_pages('4-10', 6), [4, 5, 6])
+        self.assertEqual(resolve_pages([5, 1, 1, 9], 6), [1, 5])
+
+    def test_resolve_errors(self):
+        """所选页码都不在文档范围内时报错"""
+        with self.assertRaises(ValueError):
+            resolve_pages('7-', 6)
+        with self.assertRaises(ValueError):
+            resolve_pages([0, 8], 6)
+        with self.assertRaises(ValueError):
+            resolve_pages('x', 6)
+
+    def test_group(self):
+        self.assertEqual(group_page_ranges([1, 2, 3, 7, 9, 10]), [(1, 3), (7, 7), (9, 10)])
+        self.assertEqual(group_page_ranges([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
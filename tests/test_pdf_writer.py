@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from pdf_writer import StreamingPdfWriter, merge_images_to_pdf
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+
+def make_image(seed, width=30, height=20):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8))
+
+
+@unittest.skipUnless(pdfium, '需要 pypdfium2 读取生成的PDF')
+class StreamingPdfWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.output_file = os.path.join(self.tmp, 'merged.pdf')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def page_images(self):
+        """读取每一页上的图片对象，返回 [(PdfImage, 解码后的 PIL 图片), ...]"""
+        pdf = pdfium.PdfDocument(self.output_file)
+        self.addCleanup(pdf.close)
+        images = []
+        for page in pdf:
+            objects = [obj for obj in page.get_objects() if isinstance(obj, pdfium.PdfImage)]
+            self.assertEqual(len(objects), 1)
+            images.append((objects[0], objects[0].get_bitmap(render=False).to_pil()))
+        return images
+
+    def assert_same_pixels(self, actual, expected):
+        self.assertEqual(actual.size, expected.size)
+        np.testing.assert_array_equal(np.asarray(actual.convert('RGB')), np.asarray(expected.convert('RGB')))
+
+    def test_png_passthrough(self):
+        """RGB、灰度、调色板 PNG 直接搬运压缩数据，像素不变"""
+        source = make_image(0)
+        images = {'rgb.png': source, 'gray.png': source.convert('L'), 'palette.png': source.quantize(16)}
+        paths = []
+        for name, img in images.items():
+            path = os.path.join(self.tmp, name)
+            img.save(path)
+            paths.append(path)
+
+        self.assertEqual(merge_images_to_pdf(paths, self.output_file), 3)
+
+        for (obj, actual), expected in zip(self.page_images(), images.values()):
+            self.assertEqual(obj.get_filters(), ['FlateDecode'])
+            self.assert_same_pixels(actual, expected)
+
+    def test_jpeg_passthrough(self):
+        """JPEG 原样写入，数据流与文件字节相同"""
+        paths = []
+        for name, img in (('rgb.jpg', make_image(1)), ('gray.jpg', make_image(2).convert('L'))):
+            path = os.path.join(self.tmp, name)
+            img.save(path, quality=90)
+            paths.append(path)
+
+        merge_images_to_pdf(paths, self.output_file)
+
+        for (obj, actual), path in zip(self.page_images(), paths):
+            self.assertEqual(obj.get_filters(), ['DCTDecode'])
+            with open(path, 'rb') as f:
+                self.assertEqual(bytes(obj.get_data(decode_simple=False)), f.read())
+            with Image.open(path) as expected:
+                self.assert_same_pixels(actual, expected)
+
+    def test_decoded_images(self):
+        """解码写入的 1/L/P/RGBA 图片像素不变（P 与 RGBA 转换为 RGB）"""
+        source = make_image(3)
+        images = [source.convert('1'), source.convert('L'), source.quantize(16), source.convert('RGBA')]
+        with StreamingPdfWriter(self.output_file) as writer:
+            for img in images:
+                writer.add_image(img)
+
+        pages = self.page_images()
+        self.assertEqual(len(pages), len(images))
+        for (_, actual), expected in zip(pages, images):
+            self.assert_same_pixels(actual, expected)
+
+    def test_abort_removes_file(self):
+        with self.assertRaises(RuntimeError):
+            with StreamingPdfWriter(self.output_file) as writer:
+                writer.add_image(make_image(4))
+                raise RuntimeError
+        self.assertFalse(os.path.exists(self.output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from PIL import Image
+
+from service import ConversionService, ServiceClient, make_server
+
+
+class ServiceHTTPTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ConversionService(workers=1)
+        cls.service.start()
+        cls.server = make_server(cls.service, port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.client = ServiceClient(port=cls.server.server_port, timeout=30)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.shutdown()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def submit_merge(self):
+        image_path = os.path.join(self.tmp, 'page_1.png')
+        Image.new('RGB', (8, 8), 'white').save(image_path)
+        return self.client.submit('merge', [image_path], output=os.path.join(self.tmp, 'merged.pdf'))
+
+    def test_wait(self):
+        job = self.submit_merge()
+        self.assertEqual(self.client.wait(job['id'], timeout=30)['status'], 'done')
+
+    def test_invalid_wait(self):
+        """wait 不是非负数时返回 400，而不是断开连接"""
+        job = self.submit_merge()
+        for value in ('abc', '-1', 'nan'):
+            status, _, body = self.client.request('GET', f'/jobs/{job["id"]}?wait={value}')
+            self.assertEqual(status, 400, value)
+            self.assertIn('wait', body['error'])
+
+    def test_unreadable_input(self):
+        """拆分任务时读取输入失败返回 400，而不是断开连接"""
+        pdf_path = os.path.join(self.tmp, 'broken.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(b'not a pdf')
+        status, _, body = self.client.request('POST', '/jobs', {'command': 'render', 'inputs': [pdf_path],
+                                                                'options': {'output': self.tmp}})
+        self.assertEqual(status, 400)
+        self.assertIn('broken.pdf', body['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()